@@ -6,13 +6,12 @@ A professional Flask application for student query resolution using RAG and AI.
 import os
 import sys
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_mail import Mail
 from werkzeug.middleware.proxy_fix import ProxyFix
-import cloudinary
 
 # Import configurations
 from config.config import config
@@ -36,10 +35,141 @@ from middleware.middleware import (
 )
 
 # Import utilities
-from utils.pdf_utils import create_embeddings, embeddings_exist
+from utils.warmup import WarmupManager
 
-from pinecone import Pinecone
-from langchain_pinecone import PineconeVectorStore
+def get_cors_origins():
+    """Allowed CORS origins, shared with the ASGI app (asgi.py)"""
+    # Get CORS origins from environment variable - supports multiple comma-separated origins
+    cors_origins_env = os.environ.get('CORS_ORIGINS', '')
+    
+    if cors_origins_env:
+        return [origin.strip() for origin in cors_origins_env.split(',') if origin.strip()]
+    # Fallback origins for development and common deployment platforms
+    return [
+        'http://localhost:3000',
+        'http://localhost:5173', 
+        'http://127.0.0.1:3000',
+        'http://127.0.0.1:5173',
+        'https://*.vercel.app',
+        'https://*.netlify.app'
+    ]
+
+def create_warmup(app):
+    """Warm-up steps for the dependencies that are too slow to initialize at import time"""
+    warmup = WarmupManager()
+    
+    def check_pinecone():
+        from utils.vector_store import list_index_names
+        # Round trip to verify the API key and reachability
+        return list_index_names()
+    
+    def load_embeddings():
+        from utils.embeddings import get_embeddings_model
+        embeddings = get_embeddings_model()
+        # Run one encode so lazily loaded weights are in memory before the first query
+        embeddings.embed_query("warm-up")
+        return embeddings
+    
+    def connect_vectorstore():
+        from utils.vector_store import create_vector_store
+        from utils.vector_namespaces import get_active_namespace
+        # Queries follow the active namespace, so a later rebuild is picked up without a restart
+        return create_vector_store(
+            warmup.result('embeddings'),
+            namespace=get_active_namespace(),
+            index_name=app.config.get('PINECONE_INDEX_NAME')
+        )
+    
+    def ensure_index():
+        from utils.pdf_utils import create_embeddings, embeddings_exist
+        if embeddings_exist():
+            print("Embeddings already exist in Pinecone, skipping creation")
+            return "existing"
+        if not app.config.get('BUILD_INDEX_ON_START'):
+            print("WARNING: The vector index is empty; rebuild embeddings from the admin panel")
+            return "empty"
+        print("No embeddings found in Pinecone, creating new embeddings")
+        create_embeddings()
+        return "built"
+    
+    warmup.add_step('mongo', db_instance.ensure_indexes)
+    # Backfills can take a while on large collections; nothing waits for them
+    warmup.add_step('migrations', db_instance.run_migrations, requires=('mongo',), critical=False)
+    warmup.add_step('pinecone', check_pinecone)
+    warmup.add_step('embeddings', load_embeddings)
+    warmup.add_step('vectorstore', connect_vectorstore, requires=('mongo', 'pinecone', 'embeddings'))
+    # A first build can take minutes; the instance serves (empty) results meanwhile
+    warmup.add_step('index', ensure_index, requires=('vectorstore',), critical=False)
+    return warmup
+
+def start_background_tasks(app):
+    """Start the warm-up and periodic jobs; once per serving process"""
+    app.config['WARMUP'].start()
+    
+    # Periodically reconcile the vector index against the Cloudinary listing;
+    # the lease keeps several workers from sweeping at the same time
+    from utils.scheduler import schedule_job
+    from utils.vector_maintenance import sweep_orphan_vectors
+    schedule_job("orphan-vector-sweep", app.config.get('ORPHAN_SWEEP_INTERVAL'), sweep_orphan_vectors, lease=True)
+    
+    # Requeue indexing jobs whose worker exited before finishing them
+    from services.indexing_service import get_indexing_service
+    schedule_job(
+        "indexing-recovery", app.config.get('INDEXING_RECOVERY_INTERVAL'),
+        lambda: get_indexing_service().recover_stale_jobs(),
+        initial_delay=60, lease=True
+    )
+    
+    # Recount the dashboard counters to correct drift from writes that bypass the models
+    from models.models import Counter
+    schedule_job("counter-reconcile", app.config.get('COUNTER_RECONCILE_INTERVAL'), lambda: Counter().reconcile(), lease=True)
+    
+    # Retry migrations that failed during warm-up; each one takes its own lease
+    schedule_job("migrations", app.config.get('MIGRATION_RETRY_INTERVAL'), db_instance.run_migrations)
+    
+    # Repair chat entries written with a user's old name; a token issued before
+    # a rename carries the old name until it expires
+    from models.models import ChatHistory
+    from utils.auth import USER_TOKEN_HOURS
+    reconcile_interval = app.config.get('USERNAME_RECONCILE_INTERVAL')
+    
+    def reconcile_usernames():
+        window = timedelta(hours=USER_TOKEN_HOURS, seconds=2 * reconcile_interval)
+        return ChatHistory().reconcile_usernames(since=datetime.utcnow() - window)
+    
+    schedule_job("username-reconcile", reconcile_interval, reconcile_usernames, lease=True)
+    
+    # Roll new chat entries into the daily query analytics
+    from utils.analytics import update_rollups
+    schedule_job("analytics-rollup", app.config.get('ANALYTICS_ROLLUP_INTERVAL'), update_rollups, lease=True)
+
+def preload_shared_state():
+    """Load read-only state in the gunicorn master so workers share it copy-on-write"""
+    started = time.time()
+    from utils.embeddings import get_embeddings_model
+    # Weights only: running inference here would start torch's thread pool before fork
+    get_embeddings_model()
+    try:
+        from utils.keyword_index import get_keyword_index
+        from utils.vector_namespaces import get_active_namespace
+        get_keyword_index(get_active_namespace(refresh=True))
+    except Exception as e:
+        print(f"Skipping keyword index preload: {str(e)}")
+    finally:
+        # Workers connect with their own client after fork
+        db_instance.close_connection()
+    print(f"Preloaded shared state in {time.time() - started:.1f}s")
+
+def init_worker(app):
+    """Re-create per-process clients in a forked worker, then start its background tasks"""
+    db_instance.reconnect_after_fork()
+    from utils.llm import reset_chat_models
+    from utils.vector_store import reset_pinecone
+    from utils.pdf_cache import reset_pdf_cache
+    reset_chat_models()
+    reset_pinecone()
+    reset_pdf_cache()
+    start_background_tasks(app)
 
 def create_app(config_name='default'):
     """Application factory pattern"""
@@ -49,21 +179,7 @@ def create_app(config_name='default'):
     app.config.from_object(config[config_name])
     
     # Initialize extensions
-    # Get CORS origins from environment variable - supports multiple comma-separated origins
-    cors_origins_env = os.environ.get('CORS_ORIGINS', '')
-    
-    if cors_origins_env:
-        cors_origins = [origin.strip() for origin in cors_origins_env.split(',') if origin.strip()]
-    else:
-        # Fallback origins for development and common deployment platforms
-        cors_origins = [
-            'http://localhost:3000',
-            'http://localhost:5173', 
-            'http://127.0.0.1:3000',
-            'http://127.0.0.1:5173',
-            'https://*.vercel.app',
-            'https://*.netlify.app'
-        ]
+    cors_origins = get_cors_origins()
     
     print(f"CORS Origins configured: {cors_origins}")
     
@@ -81,20 +197,15 @@ def create_app(config_name='default'):
     )
     mail = Mail(app)
     
-    # Initialize Cloudinary
-    cloudinary.config(
-        cloud_name=app.config["CLOUDINARY_CLOUD_NAME"],
-        api_key=app.config["CLOUDINARY_API_KEY"],
-        api_secret=app.config["CLOUDINARY_API_SECRET"]
-    )
+    # Cloudinary is imported and configured on first use (services.cloudinary_service.get_cloudinary)
     
     # Initialize middleware
     EnvironmentMiddleware(app)
     CORSMiddleware(app)
     ErrorHandlingMiddleware(app)
     
-    # Initialize database
-    if not db_instance.connect():
+    # Create the client only; the server round trip and index creation happen during warm-up
+    if not db_instance.connect(create_indexes=False):
         raise Exception("Failed to connect to database")
     
     # Initialize email service
@@ -103,74 +214,41 @@ def create_app(config_name='default'):
     
     # Store email service in app config for global access
     app.config['EMAIL_SERVICE'] = email_service
-
-     # Initialize Pinecone
-    print("Initializing Pinecone...")
-    try:
-        # Using Pinecone v3 client API
-        pc = Pinecone(api_key=app.config.get('PINECONE_API_KEY'))
-        print("Pinecone initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing Pinecone: {str(e)}")
-        raise
     
-    # Initialize Cloudinary
-    print("Initializing Cloudinary...")
-    try:
-        from services.cloudinary_service import CloudinaryService
-        cloudinary_service = CloudinaryService()
-        print("Cloudinary initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing Cloudinary: {str(e)}")
-        raise
+    # Pinecone, the embedding model and the vector store load in the background,
+    # so the process serves /health immediately and /ready once they are up
+    warmup = create_warmup(app)
+    app.config['WARMUP'] = warmup
     
-    # Create embeddings and vectorstore
-    print("Initializing embeddings...")
-    try:
-        # Check if embeddings already exist in Pinecone
-        if embeddings_exist():
-            print("Embeddings already exist in Pinecone, skipping creation")
-            from langchain_huggingface import HuggingFaceEmbeddings
-            from langchain_pinecone import PineconeVectorStore
-            embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
-            )
-            vectorstore_global = PineconeVectorStore(
-                index_name=app.config.get('PINECONE_INDEX_NAME'),
-                embedding=embeddings,
-                namespace="course_materials"
-            )
-        else:
-            print("No embeddings found in Pinecone, creating new embeddings")
-            vectorstore_global = create_embeddings()
-        
-        print("Embeddings initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing embeddings: {str(e)}")
-        # Create a fallback vectorstore with minimal default content
-        print("Creating fallback vectorstore with default content")
-        # Use a simple default text for embedding
-        default_text = ["This is a student query chatbot for academic assistance."]
-        try:
-            # Try to create a minimal vectorstore
-            from utils.pdf_utils import get_vector_store
-            vectorstore_global = get_vector_store(default_text)
-            print("Fallback vectorstore created successfully")
-        except Exception as fallback_error:
-            print(f"Error creating fallback vectorstore: {str(fallback_error)}")
-            # If all else fails, set to None and handle in routes
-            vectorstore_global = None
-            print("WARNING: No vectorstore available, chat functionality will be limited")
+    def get_vectorstore():
+        return warmup.result('vectorstore')
     
     # Register blueprints (routes)
     app.register_blueprint(create_auth_routes(app))
-    app.register_blueprint(create_chat_routes(vectorstore_global))
+    app.register_blueprint(create_chat_routes(get_vectorstore))
     app.register_blueprint(create_admin_routes(email_service))
     app.register_blueprint(create_legacy_admin_routes(email_service))  # For backward compatibility
     app.register_blueprint(create_pdf_routes())
     
+    # Seed the local PDF cache with uploads so the next rebuild does not download them
+    if app.config.get('PDF_CACHE_ENABLED'):
+        from services.cloudinary_service import CloudinaryService
+        from utils.pdf_cache import cache_uploaded_pdf
+        CloudinaryService.register_upload_hook('pdf-cache', cache_uploaded_pdf)
+    
+    # Index newly uploaded PDFs in the background instead of waiting for a rebuild
+    if app.config.get('INDEX_ON_UPLOAD'):
+        from services.cloudinary_service import CloudinaryService
+        from services.indexing_service import queue_pdf_indexing
+        CloudinaryService.register_upload_hook('indexing', queue_pdf_indexing)
+    
+    if app.config.get('PRELOAD_APP'):
+        # gunicorn --preload (gunicorn.conf.py): load shared read-only state once in the
+        # master; threads do not survive fork, so each worker starts its own in post_fork
+        preload_shared_state()
+    else:
+        start_background_tasks(app)
+    
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     @app.route('/api/health', methods=['GET'])  # Adding API prefix for Render health checks
@@ -182,6 +260,23 @@ def create_app(config_name='default'):
             "environment": os.environ.get("FLASK_ENV", "development")
         }), 200
     
+    # Readiness probe: 503 until every critical dependency has warmed up
+    @app.route('/ready', methods=['GET'])
+    @app.route('/api/ready', methods=['GET'])
+    def readiness_check():
+        status = warmup.status()
+        status["timestamp"] = datetime.now().isoformat()
+        return jsonify(status), 200 if status["ready"] else 503
+    
+    # Memory of the worker serving the request, split into shared and private pages
+    @app.route('/debug/memory', methods=['GET'])
+    def worker_memory():
+        from utils.memory import process_memory
+        memory = process_memory()
+        memory["preload_app"] = bool(app.config.get('PRELOAD_APP'))
+        memory["ready"] = warmup.is_ready()
+        return jsonify(memory), 200
+    
     # Debug endpoint to list all routes
     @app.route('/debug/routes', methods=['GET'])
     def list_routes():
@@ -219,7 +314,7 @@ def create_app(config_name='default'):
                 "status": "Query endpoint test successful",
                 "received_question": question,
                 "mock_answer": f"This is a mock response to: {question}",
-                "vectorstore_available": vectorstore_global is not None,
+                "vectorstore_available": get_vectorstore() is not None,
                 "timestamp": datetime.now().isoformat()
             }), 200
         except Exception as e:
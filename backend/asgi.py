@@ -0,0 +1,73 @@
+"""
+Async serving mode for the Student Chatbot API.
+
+/api/query and /api/chat-history run natively on the event loop:
+- the conversation chain is awaited;
+- hybrid retrieval fans out its dense and keyword searches;
+- MongoDB goes through motor;
+- chat history and unanswered queries are written without holding up the response.
+
+While one student waits on Groq or Pinecone, the same worker serves others.
+Every other route is the regular Flask app, run in a thread pool. The Flask
+app also runs the warm-up, so the async routes use the same vector store.
+
+Usage (from the backend directory):
+    uvicorn asgi:app --host 0.0.0.0 --port 8080 --workers 4
+"""
+
+import re
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+
+from app import app as flask_app, get_cors_origins
+from config.database import async_db_instance
+from routes.async_chat_routes import create_async_chat_routes
+from services.async_chat_service import drain_background_writes
+
+def cors_middleware():
+    """Starlette CORS settings matching the Flask app's; '*' in an origin matches one subdomain label"""
+    origins = get_cors_origins()
+    exact = [origin for origin in origins if '*' not in origin or origin == '*']
+    patterns = [re.escape(origin).replace(r'\*', '[^./]+') for origin in origins if origin not in exact]
+    return Middleware(
+        CORSMiddleware,
+        allow_origins=exact,
+        allow_origin_regex='|'.join(patterns) or None,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"],
+        allow_credentials=True
+    )
+
+def create_asgi_app(flask_app):
+    """ASGI app serving the async chat routes natively and everything else through Flask"""
+    warmup = flask_app.config['WARMUP']
+
+    def get_vectorstore():
+        return warmup.result('vectorstore')
+
+    routes = create_async_chat_routes(get_vectorstore)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Let chat history writes land before the worker exits
+        await drain_background_writes()
+        async_db_instance.close_connection()
+
+    native = Starlette(routes=routes, middleware=[cors_middleware()], lifespan=lifespan)
+    native_paths = {route.path for route in routes}
+    wsgi = WSGIMiddleware(flask_app)
+
+    async def dispatch(scope, receive, send):
+        if scope["type"] == "lifespan" or scope.get("path") in native_paths:
+            await native(scope, receive, send)
+        else:
+            await wsgi(scope, receive, send)
+
+    return dispatch
+
+app = create_asgi_app(flask_app)
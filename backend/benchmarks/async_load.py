@@ -0,0 +1,69 @@
+"""
+Sync vs async serving under concurrent load.
+
+Sends the same mix of /api/query requests to a sync server (gunicorn,
+gunicorn.conf.py) and an async one (uvicorn asgi:app) at increasing
+concurrency, each client on its own session, and reports throughput,
+latency percentiles and errors per level. Start both servers with the same
+worker count so the comparison is per worker; the sync side is capped by
+workers x GUNICORN_THREADS concurrent queries, the async side is not.
+
+Usage (from the backend directory):
+    gunicorn --config gunicorn.conf.py app:app                 # :8080
+    uvicorn asgi:app --port 8081 --workers 4
+    python -m benchmarks.async_load --sync-url http://localhost:8080 --async-url http://localhost:8081 \
+        [--concurrency 1,8,32,64] [--requests 64]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.chat_concurrency import QUESTIONS, post_query
+
+def run_level(url, concurrency, requests, label):
+    """Fire requests from concurrency clients; returns (queries/s, latencies, error count)"""
+    run_id = f"{label}-{concurrency}-{int(time.time())}"
+    jobs = [(QUESTIONS[i % len(QUESTIONS)], f"load-{run_id}-{i % concurrency}") for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda job: post_query(url, *job), jobs))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for _, _, latency in results)
+    # 404 is the normal "unanswered" outcome of the chat endpoint
+    errors = sum(1 for status, _, _ in results if status not in (200, 404))
+    return requests / elapsed, latencies, errors
+
+def percentile(sorted_values, fraction):
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync-url", default="http://localhost:8080")
+    parser.add_argument("--async-url", default="http://localhost:8081")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per level")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    servers = [("sync", args.sync_url.rstrip("/")), ("async", args.async_url.rstrip("/"))]
+
+    print(f"{'server':<8}{'clients':>8}{'q/s':>9}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'errors':>8}")
+    throughput = {}
+    for concurrency in levels:
+        for label, url in servers:
+            rate, latencies, errors = run_level(url, concurrency, max(args.requests, concurrency), label)
+            throughput[(label, concurrency)] = rate
+            print(f"{label:<8}{concurrency:>8}{rate:>9.2f}{statistics.median(latencies):>9.2f}"
+                  f"{percentile(latencies, 0.95):>9.2f}{percentile(latencies, 0.99):>9.2f}{errors:>8}")
+
+    print()
+    for concurrency in levels:
+        sync_rate = throughput[("sync", concurrency)]
+        if sync_rate:
+            print(f"{concurrency} clients: async serves {throughput[('async', concurrency)] / sync_rate:.1f}x "
+                  f"the sync throughput")
+
+if __name__ == "__main__":
+    main()
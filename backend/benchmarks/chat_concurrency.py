@@ -0,0 +1,172 @@
+"""
+Concurrency stress test for the chat path.
+
+--local hammers the session store with many threads and no network: turns
+of the same session must never interleave, different sessions must run in
+parallel, and idle-session cleanup must not drop a session mid-turn.
+
+--url sends concurrent /api/query requests to a running server, several of
+them on the same session at once. Every turn answered with 200 reports the
+session's history, and since turns of a session are serialized those
+histories must all have different lengths. It also reports throughput and
+latency, so runs with GUNICORN_THREADS=1 and 8 can be compared.
+
+Exits non-zero on any violation or server error.
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_concurrency --local [--threads 32] [--sessions 8] [--turns 50]
+    python -m benchmarks.chat_concurrency --url http://localhost:8080 [--threads 16] [--sessions 4] [--turns 8]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    "What is the minimum attendance required to sit for the end-semester exam?",
+    "How do I apply for re-evaluation of my answer sheet?",
+    "What are the library timings on weekends?",
+    "What is the late fee for paying the semester fee after the due date?",
+]
+
+class _ChatMemory:
+    def __init__(self):
+        self.messages = []
+
+class _Memory:
+    """Stand-in with the chat_memory.messages shape of the LangChain memory"""
+
+    def __init__(self):
+        self.chat_memory = _ChatMemory()
+
+def run_local(args):
+    from utils.sessions import SessionStore
+
+    store = SessionStore(_Memory, timeout=0.05, cleanup_interval=0)
+    active = {}
+    active_lock = threading.Lock()
+    violations = []
+    max_parallel = [0]
+
+    def turn(i):
+        session_id = f"s{i % args.sessions}"
+        with store.hold(session_id):
+            with active_lock:
+                if active.get(session_id):
+                    violations.append(f"two turns of {session_id} overlapped")
+                active[session_id] = True
+                max_parallel[0] = max(max_parallel[0], sum(active.values()))
+            memory = store.get_memory(session_id, create=True)
+            before = len(memory.chat_memory.messages)
+            memory.chat_memory.messages.append(f"user {i}")
+            time.sleep(0.001)  # Stand-in for the LLM call
+            memory.chat_memory.messages.append(f"ai {i}")
+            if len(memory.chat_memory.messages) != before + 2:
+                violations.append(f"{session_id} lost or interleaved messages")
+            with active_lock:
+                active[session_id] = False
+
+    stop = threading.Event()
+
+    def cleaner():
+        while not stop.is_set():
+            store.cleanup_expired(force=True)
+            time.sleep(0.01)
+
+    cleanup_thread = threading.Thread(target=cleaner, daemon=True)
+    cleanup_thread.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(turn, range(args.sessions * args.turns)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    cleanup_thread.join()
+
+    print(f"{args.sessions * args.turns} turns over {args.sessions} sessions with {args.threads} threads "
+          f"in {elapsed:.2f}s; up to {max_parallel[0]} sessions ran in parallel")
+    if max_parallel[0] < min(args.sessions, args.threads):
+        print(f"note: expected up to {min(args.sessions, args.threads)} sessions in parallel")
+    return violations
+
+def post_query(url, question, session_id):
+    body = json.dumps({"question": question, "session_id": session_id}).encode("utf-8")
+    request = urllib.request.Request(f"{url}/api/query", data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            status, payload = response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        status = e.code
+        try:
+            payload = json.load(e)
+        except ValueError:
+            payload = {}
+    return status, payload, time.perf_counter() - started
+
+def run_http(args):
+    jobs = [
+        (f"stress-{int(time.time())}-{s}", QUESTIONS[t % len(QUESTIONS)])
+        for t in range(args.turns) for s in range(args.sessions)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(lambda job: (job[0],) + post_query(args.url, job[1], job[0]), jobs))
+    elapsed = time.perf_counter() - started
+
+    violations = []
+    history_lengths = {}
+    statuses = {}
+    for session_id, status, payload, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+        if status >= 500 and status != 503:
+            violations.append(f"{session_id}: HTTP {status} {payload.get('error', '')}")
+        if status == 200:
+            history_lengths.setdefault(session_id, []).append(len(payload.get("chat_history", [])))
+    for session_id, lengths in history_lengths.items():
+        if len(set(lengths)) != len(lengths):
+            violations.append(f"{session_id}: turns saw the same history length {sorted(lengths)}, so they overlapped")
+
+    latencies = sorted(latency for _, _, _, latency in results)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{len(results)} queries in {elapsed:.1f}s = {len(results) / elapsed:.2f} queries/s "
+          f"with {args.threads} client threads")
+    print(f"latency p50 {statistics.median(latencies):.2f}s, p95 {p95:.2f}s; statuses {statuses}")
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--local", action="store_true", help="Stress the session store in-process")
+    mode.add_argument("--url", help="Base URL of a running server")
+    parser.add_argument("--threads", type=int, default=None, help="Concurrent client threads")
+    parser.add_argument("--sessions", type=int, default=None)
+    parser.add_argument("--turns", type=int, default=None, help="Turns per session")
+    args = parser.parse_args()
+
+    if args.local:
+        args.threads = args.threads or 32
+        args.sessions = args.sessions or 8
+        args.turns = args.turns or 50
+        violations = run_local(args)
+    else:
+        args.url = args.url.rstrip("/")
+        args.threads = args.threads or 16
+        args.sessions = args.sessions or 4
+        args.turns = args.turns or 8
+        violations = run_http(args)
+
+    if violations:
+        print(f"\nFAIL: {len(violations)} violations")
+        for violation in violations[:20]:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Parity check and throughput benchmark for the embedding backends.
+
+Compares the quantized ONNX model against the PyTorch sentence-transformers
+model on a sample corpus and exits non-zero if their cosine agreement falls
+below the threshold.
+
+Usage (from the backend directory):
+    python -m utils.embeddings export
+    python -m benchmarks.embedding_backends [--pdf-dir DIR] [--threshold 0.98]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+SAMPLE_CORPUS = [
+    "Students must maintain a minimum of 75% attendance in every course to be eligible for the end-semester examination.",
+    "Form 16A must be submitted to the accounts office in room CS-301 before the last working day of the month.",
+    "The library remains open from 8 AM to 10 PM on weekdays and from 10 AM to 6 PM on weekends.",
+    "Re-evaluation requests can be filed within seven days of the result declaration by paying the prescribed fee.",
+    "Hostel allotment is done on the basis of distance from the home town and the academic performance of the student.",
+    "CS-301 Database Management Systems covers relational algebra, SQL, normalization and transaction processing.",
+    "Scholarship applications are accepted through the student portal until the 15th of September.",
+    "A student who misses a mid-term test due to illness must submit a medical certificate within three days.",
+    "EXAMINATION RULES",
+    "The B.Tech programme requires 160 credits, including 20 credits of open electives and a final year project.",
+    "Fee payment after the due date attracts a late fine of Rs. 100 per day.",
+    "What is the procedure for obtaining a bonafide certificate?",
+    "Internship credits are awarded only after the company submits the evaluation form to the training and placement cell.",
+    "Ragging in any form is strictly prohibited and punishable under the university anti-ragging regulations.",
+    "Students can change their minor specialization only once, before the start of the fifth semester.",
+    "hello",
+]
+
+def load_pdf_corpus(pdf_dir):
+    """Chunk every PDF in a directory into sample texts"""
+    from PyPDF2 import PdfReader
+    from utils.chunking import chunk_pages
+    from utils.cloudinary_utils import clean_text
+
+    pages = []
+    for name in sorted(os.listdir(pdf_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        reader = PdfReader(os.path.join(pdf_dir, name))
+        for number, page in enumerate(reader.pages, start=1):
+            text = clean_text(page.extract_text() or "", keep_newlines=True)
+            if text:
+                pages.append({"source": name, "page": number, "text": text})
+    texts, _ = chunk_pages(pages)
+    return texts
+
+def rss_mb():
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def time_encoding(model, texts, repeats):
+    model.embed_documents(texts[:8])  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        vectors = model.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    return vectors, len(texts) * repeats / elapsed
+
+def cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    return dot / (norm_a * norm_b)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use as the sample corpus")
+    parser.add_argument("--threshold", type=float, default=0.98, help="Minimum per-text cosine agreement")
+    parser.add_argument("--repeats", type=int, default=5, help="Encoding passes for the throughput measurement")
+    args = parser.parse_args()
+
+    texts = load_pdf_corpus(args.pdf_dir) if args.pdf_dir else SAMPLE_CORPUS
+    print(f"Sample corpus: {len(texts)} texts")
+
+    # Load ONNX first so its memory footprint is measured without torch loaded
+    from utils.embeddings import OnnxEmbeddings
+    baseline_rss = rss_mb()
+    onnx_model = OnnxEmbeddings()
+    onnx_vectors, onnx_rate = time_encoding(onnx_model, texts, args.repeats)
+    onnx_rss = rss_mb()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    torch_model = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    torch_vectors, torch_rate = time_encoding(torch_model, texts, args.repeats)
+    torch_rss = rss_mb()
+
+    similarities = [cosine(a, b) for a, b in zip(onnx_vectors, torch_vectors)]
+    mean_similarity = sum(similarities) / len(similarities)
+    worst = min(range(len(similarities)), key=similarities.__getitem__)
+
+    print(f"\nThroughput  torch: {torch_rate:8.1f} texts/sec   onnx: {onnx_rate:8.1f} texts/sec   "
+          f"speedup: {onnx_rate / torch_rate:.2f}x")
+    print(f"Memory      onnx model: +{onnx_rss - baseline_rss:.1f} MB   "
+          f"torch model: +{torch_rss - onnx_rss:.1f} MB (peak RSS growth)")
+    print(f"Cosine agreement  mean: {mean_similarity:.4f}   min: {similarities[worst]:.4f}")
+    print(f"Least similar text: {texts[worst][:80]!r}")
+
+    if similarities[worst] < args.threshold:
+        print(f"FAIL: cosine agreement below {args.threshold}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == "__main__":
+    main()
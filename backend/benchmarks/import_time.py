@@ -0,0 +1,89 @@
+"""
+Import-time budget check for the backend.
+
+Imports the given module in a fresh interpreter under `python -X importtime`,
+prints the slowest imports, and exits non-zero if the total exceeds the
+budget or if any heavy dependency (torch, langchain, pinecone, ...) was
+imported. Those must load on first use behind their facades:
+utils.llm, utils.embeddings, utils.vector_store, utils.pdf_utils and
+utils.analytics.
+
+Importing `app` builds the app, which starts the background warm-up; the
+interpreter exits right after the import, so no requests are sent.
+
+Usage (from the backend directory):
+    python -m benchmarks.import_time [--module app] [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Top-level packages that must not be imported when the app module loads
+HEAVY_PACKAGES = [
+    "torch", "transformers", "sentence_transformers", "onnxruntime",
+    "langchain", "langchain_classic", "langchain_community", "langchain_core",
+    "langchain_groq", "langchain_huggingface", "langchain_pinecone", "langchain_text_splitters",
+    "pinecone", "reportlab", "PyPDF2", "pypdfium2", "pdfminer", "cloudinary", "textblob", "nltk",
+]
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def measure(module):
+    """Run the import and parse -X importtime output into (self_us, cumulative_us, depth, name)"""
+    env = dict(os.environ)
+    env.setdefault("FLASK_ENV", "production")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.getcwd()
+    )
+    if completed.returncode != 0:
+        print(completed.stderr[-4000:])
+        raise SystemExit(f"Importing {module} failed")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum total import time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    entries = measure(args.module)
+    if not entries:
+        raise SystemExit("No -X importtime output was captured")
+
+    # Top-level imports (depth 0) add up to the total
+    total_ms = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0) / 1000
+    heavy = sorted({
+        name.split(".")[0] for _, _, _, name in entries
+        if name.split(".")[0] in HEAVY_PACKAGES
+    })
+
+    print(f"Importing {args.module}: {total_ms:.0f} ms over {len(entries)} modules (budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for self_us, cumulative_us, depth, name in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    failed = False
+    if heavy:
+        print(f"\nFAIL: heavy dependencies imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\nFAIL: import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
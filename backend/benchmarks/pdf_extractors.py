@@ -0,0 +1,105 @@
+"""
+Speed and quality benchmark for the PDF text extractors.
+
+Runs every available extractor over a directory of PDFs and reports
+pages/sec together with simple quality signals: the share of pages that
+yield text, characters per page, and the share of characters that survive
+clean_text (garbled output loses many characters there).
+
+Usage (from the backend directory):
+    python -m benchmarks.pdf_extractors --pdf-dir DIR [--extractors pypdf2,pypdfium2,pdfminer] [--repeats 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+def load_pdfs(pdf_dir):
+    paths = [
+        os.path.join(pdf_dir, name) for name in sorted(os.listdir(pdf_dir))
+        if name.lower().endswith(".pdf")
+    ]
+    if not paths:
+        print(f"No PDFs found in {pdf_dir}")
+        sys.exit(1)
+    return paths
+
+def run_extractor(extractor, paths, repeats):
+    from utils.cloudinary_utils import clean_text
+
+    pages = 0
+    non_empty = 0
+    raw_chars = 0
+    clean_chars = 0
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for path in paths:
+            try:
+                texts = extractor.extract_pages(path)
+            except Exception as e:
+                failures += 1
+                print(f"  {extractor.name} failed on {os.path.basename(path)}: {str(e)}")
+                continue
+            pages += len(texts)
+            for text in texts:
+                cleaned = clean_text(text)
+                raw_chars += len(text)
+                clean_chars += len(cleaned)
+                non_empty += 1 if cleaned else 0
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "non_empty_ratio": non_empty / pages if pages else 0.0,
+        "chars_per_page": clean_chars / pages if pages else 0.0,
+        "clean_ratio": clean_chars / raw_chars if raw_chars else 0.0,
+        "pages": pages // repeats,
+        "failures": failures // repeats
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", required=True, help="Directory of sample PDFs")
+    parser.add_argument("--extractors", default="pypdf2,pypdfium2,pdfminer", help="Comma-separated extractor names")
+    parser.add_argument("--repeats", type=int, default=1, help="Passes over the corpus for the timing")
+    args = parser.parse_args()
+
+    from utils.extractors import EXTRACTORS
+
+    paths = load_pdfs(args.pdf_dir)
+    print(f"Sample corpus: {len(paths)} PDFs")
+
+    results = {}
+    for name in args.extractors.split(","):
+        name = name.strip().lower()
+        extractor_class = EXTRACTORS.get(name)
+        if extractor_class is None:
+            print(f"Unknown extractor '{name}', skipping")
+            continue
+        extractor = extractor_class()
+        try:
+            version = extractor.version
+        except ImportError as e:
+            print(f"{name} is not installed ({str(e)}), skipping")
+            continue
+        print(f"Running {version}...")
+        results[name] = run_extractor(extractor, paths, args.repeats)
+
+    if not results:
+        print("No extractors could be run")
+        sys.exit(1)
+
+    print(f"\n{'extractor':<12}{'pages/sec':>12}{'non-empty':>12}{'chars/page':>12}{'kept chars':>12}{'failures':>10}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['pages_per_sec']:>12.1f}{result['non_empty_ratio']:>12.1%}"
+              f"{result['chars_per_page']:>12.0f}{result['clean_ratio']:>12.1%}{result['failures']:>10}")
+
+    baseline = results.get("pypdf2")
+    if baseline and baseline["pages_per_sec"]:
+        for name, result in results.items():
+            if name != "pypdf2":
+                print(f"{name} is {result['pages_per_sec'] / baseline['pages_per_sec']:.2f}x pypdf2")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Correctness and latency of the query analytics rollups.
+
+Rolls up the chat history with utils.analytics.update_rollups, then recomputes
+the same per-day sentiment from scratch the way the endpoint used to: every
+question read and scored on each request. Exits non-zero if the rollups
+disagree with the recount, if a second run scores entries again, or if
+reading a date range from the rollups exceeds the budget.
+
+Use a scratch database: --seed inserts synthetic chat entries spread over
+--days days, which --cleanup removes again along with the rollups.
+
+Usage (from the backend directory):
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.query_analytics [--seed 20000] [--days 90] [--cleanup] [--budget-ms 50]
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+QUESTIONS = [
+    "When is the last date to pay the hostel fee?",
+    "How many credits are needed to graduate?",
+    "Can I change my elective after registration closes?",
+    "Where do I collect my ID card?",
+    "The library portal is terrible, who do I contact?",
+    "Thanks, the timetable is really helpful!",
+]
+
+def seed(collection, count, days):
+    now = datetime.datetime.utcnow()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "user_id": None,
+            "username": None,
+            "question": random.choice(QUESTIONS),
+            "answer": "",
+            "timestamp": now - datetime.timedelta(minutes=random.randrange(60, days * 24 * 60)),
+            "seeded_by": "benchmark"
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    print(f"Seeded {count} chat entries over {days} days")
+
+def recount(collection):
+    """Per-day sentiment and term counts computed from every entry"""
+    from textblob import TextBlob
+    from utils.analytics import question_terms
+    by_date = defaultdict(list)
+    terms = Counter()
+    for entry in collection.find({}, {"question": 1, "timestamp": 1}):
+        if not entry.get("question") or not entry.get("timestamp"):
+            continue
+        by_date[entry["timestamp"].date().isoformat()].append(TextBlob(entry["question"]).sentiment.polarity)
+        terms.update(question_terms(entry["question"]))
+    return {date: (len(values), sum(values) / len(values)) for date, values in by_date.items()}, terms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic chat entries first")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic entries and rollups afterwards")
+    parser.add_argument("--budget-ms", type=float, default=50, help="Maximum time to read a 30-day range")
+    args = parser.parse_args()
+
+    from config.database import db_instance
+    from models.models import AnalyticsRollup
+    from services.admin_service import AdminService
+    from utils.analytics import update_rollups
+
+    if not db_instance.connect():
+        sys.exit(1)
+    collection = db_instance.db["chat_history"]
+    if args.seed:
+        seed(collection, args.seed, args.days)
+
+    violations = []
+    try:
+        started = time.perf_counter()
+        first = update_rollups(settle_seconds=0)
+        print(f"First run   {first} in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        second = update_rollups(settle_seconds=0)
+        print(f"Second run  {second} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        if second["scored"]:
+            violations.append(f"second run scored {second['scored']} entries again")
+
+        started = time.perf_counter()
+        expected, terms = recount(collection)
+        print(f"Recount     {len(expected)} days in {time.perf_counter() - started:.1f}s (the old per-request cost)")
+
+        service = AdminService()
+        result, _ = service.get_query_analytics()
+        actual = {row["date"]: (row["count"], row["avg_sentiment"]) for row in result["sentiment_analytics"]}
+        for date in sorted(set(expected) | set(actual)):
+            want, got = expected.get(date), actual.get(date)
+            if not want or not got or want[0] != got[0] or abs(want[1] - got[1]) > 1e-9:
+                violations.append(f"{date}: rollup {got}, recount {want}")
+        print(f"Trending    rollups {result['trending_topics']}")
+        print(f"            recount {terms.most_common(len(result['trending_topics']))}")
+
+        today = datetime.datetime.utcnow().date()
+        started = time.perf_counter()
+        result, status = service.get_query_analytics(today - datetime.timedelta(days=29), today)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"30-day read {len(result.get('sentiment_analytics', []))} days in {elapsed:.1f} ms")
+        if status != 200:
+            violations.append(f"30-day read: HTTP {status} {result.get('error')}")
+        elif elapsed > args.budget_ms:
+            violations.append(f"30-day read took {elapsed:.1f} ms, budget {args.budget_ms} ms")
+    finally:
+        if args.cleanup:
+            deleted = collection.delete_many({"seeded_by": "benchmark"}).deleted_count
+            AnalyticsRollup().reset()
+            print(f"Removed {deleted} synthetic entries and the rollups")
+
+    if violations:
+        print(f"\nFAIL: {len(violations)} violations")
+        for violation in violations[:20]:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
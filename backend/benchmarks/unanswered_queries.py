@@ -0,0 +1,122 @@
+"""
+Round trips and latency of the unanswered-queries API.
+
+Calls AdminService.get_unanswered_queries in both sort modes and counts the
+MongoDB commands each call sends. Exits non-zero if a call exceeds its
+round-trip budget, needs a getMore, or if the planner would answer the page
+query with a collection scan. This guards against debug scans creeping back
+into the admin page.
+
+Use a scratch database: --seed inserts synthetic unanswered queries, which
+--cleanup removes again.
+
+Usage (from the backend directory):
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.unanswered_queries [--seed 50000] [--cleanup] [--limit 20]
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+# Maximum commands per call: recent = page find + indexed count; frequent = one aggregation
+BUDGETS = {"recent": 2, "frequent": 1}
+
+QUESTIONS = [
+    "When is the last date to pay the hostel fee?",
+    "How many credits are needed to graduate?",
+    "Can I change my elective after registration closes?",
+    "Where do I collect my ID card?",
+    "Is there a supplementary exam for lab courses?",
+]
+
+def seed(collection, count):
+    now = datetime.datetime.utcnow()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "question": random.choice(QUESTIONS) + ("" if i % 3 else f" ({i})"),
+            "answered": i % 5 == 0,
+            "user_id": None,
+            "timestamp": now - datetime.timedelta(minutes=i),
+            "seeded_by": "benchmark"
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    print(f"Seeded {count} queries")
+
+def measure(counter, call):
+    counter.reset()
+    started = time.perf_counter()
+    result, status = call()
+    elapsed = (time.perf_counter() - started) * 1000
+    return result, status, elapsed, list(counter.commands)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic queries first")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic queries afterwards")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    from config.database import db_instance
+    from config.indexes import explain_hot_queries, migrate
+    from services.admin_service import AdminService
+    from utils.db_commands import CommandCounter
+
+    counter = CommandCounter()
+    if not db_instance.connect(create_indexes=False, event_listeners=[counter]):
+        sys.exit(1)
+    collection = db_instance.db["queries"]
+    migrate(db_instance.db)
+    if args.seed:
+        seed(collection, args.seed)
+
+    service = AdminService()
+    violations = []
+    try:
+        for sort, budget in BUDGETS.items():
+            result, status, elapsed, commands = measure(
+                counter, lambda: service.get_unanswered_queries(args.limit, sort=sort)
+            )
+            if status != 200:
+                violations.append(f"{sort}: HTTP {status} {result.get('error')}")
+                continue
+            names = [name for name, _ in commands]
+            print(f"{sort:<9} {len(result['queries'])} of {result['total']} in {elapsed:.1f} ms, "
+                  f"{len(commands)} commands: {', '.join(names)}")
+            if len(commands) > budget:
+                violations.append(f"{sort}: {len(commands)} round trips, budget {budget}")
+            if "getMore" in names:
+                violations.append(f"{sort}: needed a getMore for one page")
+
+            # The next page costs the same as the first
+            if sort == "recent" and result.get("next_cursor"):
+                _, _, elapsed, commands = measure(
+                    counter, lambda: service.get_unanswered_queries(args.limit, cursor=result["next_cursor"])
+                )
+                print(f"{'  page 2':<9} {elapsed:.1f} ms, {len(commands)} commands")
+                if len(commands) > budget:
+                    violations.append(f"recent page 2: {len(commands)} round trips, budget {budget}")
+
+        for description, stages, uses_index in explain_hot_queries(db_instance.db):
+            if description.startswith("unanswered") and not uses_index:
+                violations.append(f"{description}: plan {' <- '.join(stages)}")
+    finally:
+        if args.cleanup:
+            deleted = collection.delete_many({"seeded_by": "benchmark"}).deleted_count
+            print(f"Removed {deleted} synthetic queries")
+
+    if violations:
+        print(f"\nFAIL: {len(violations)} violations")
+        for violation in violations:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
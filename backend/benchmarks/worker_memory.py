@@ -0,0 +1,115 @@
+"""
+Memory per gunicorn worker, with and without preloading.
+
+Starts gunicorn with gunicorn.conf.py, waits for every worker to report
+ready, and sums the proportional set size (Pss) of the master and its
+workers. Pss splits shared pages between the processes that map them, so
+the total is the real footprint and total / workers is the cost of one
+worker. Runs once with PRELOAD_APP=true and once with false so the
+copy-on-write saving is visible. Needs Linux (/proc/<pid>/smaps_rollup).
+
+To measure a deployment that is already running instead, pass the master
+PID with --pid.
+
+Usage (from the backend directory):
+    python -m benchmarks.worker_memory [--workers 4] [--port 8099] [--warmup-timeout 300]
+    python -m benchmarks.worker_memory --pid MASTER_PID
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+def measure(master_pid):
+    """Pss/Rss of the master and each worker, in MB"""
+    from utils.memory import child_pids, process_memory
+
+    master = process_memory(master_pid)
+    workers = [process_memory(pid) for pid in child_pids(master_pid)]
+    return master, workers
+
+def wait_until_ready(port, workers, timeout):
+    """Poll /debug/memory until enough distinct workers report ready (connections land on random workers)"""
+    deadline = time.time() + timeout
+    ready_pids = set()
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/debug/memory", timeout=5) as response:
+                status = json.load(response)
+            if status.get("ready"):
+                ready_pids.add(status.get("pid"))
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        if len(ready_pids) >= workers:
+            return True
+        time.sleep(1)
+    return False
+
+def run_mode(preload, args):
+    env = dict(os.environ)
+    env.update({
+        "PRELOAD_APP": "true" if preload else "false",
+        "WEB_CONCURRENCY": str(args.workers),
+        "PORT": str(args.port),
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_ready(args.port, args.workers, args.warmup_timeout):
+            print(f"preload={preload}: workers were not ready after {args.warmup_timeout}s, measuring anyway")
+        # The first queries touch lazily created state; let it settle
+        time.sleep(2)
+        return measure(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def report(label, master, workers):
+    if "error" in master:
+        print(f"{label}: {master['error']}")
+        return None
+    total_pss = master.get("pss", 0.0) + sum(w.get("pss", 0.0) for w in workers)
+    print(f"\n{label}")
+    print(f"{'process':<10}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'shared MB':>11}{'private MB':>12}")
+    for name, memory in [("master", master)] + [(f"worker {i + 1}", w) for i, w in enumerate(workers)]:
+        shared = memory.get("shared_clean", 0.0) + memory.get("shared_dirty", 0.0)
+        private = memory.get("private_clean", 0.0) + memory.get("private_dirty", 0.0)
+        print(f"{name:<10}{memory['pid']:>8}{memory.get('rss', 0.0):>10.1f}{memory.get('pss', 0.0):>10.1f}"
+              f"{shared:>11.1f}{private:>12.1f}")
+    per_worker = total_pss / len(workers) if workers else total_pss
+    print(f"total Pss {total_pss:.1f} MB for {len(workers)} workers = {per_worker:.1f} MB per worker")
+    return total_pss
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, help="Measure a running gunicorn master instead of starting one")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--warmup-timeout", type=int, default=300, help="Seconds to wait for the workers to be ready")
+    args = parser.parse_args()
+
+    if args.pid:
+        master, workers = measure(args.pid)
+        if report(f"gunicorn master {args.pid}", master, workers) is None:
+            sys.exit(1)
+        return
+
+    preloaded = report("preload_app=True", *run_mode(True, args))
+    separate = report("preload_app=False", *run_mode(False, args))
+    if preloaded and separate:
+        print(f"\nPreloading saves {separate - preloaded:.1f} MB ({1 - preloaded / separate:.0%}) "
+              f"across {args.workers} workers")
+
+if __name__ == "__main__":
+    main()
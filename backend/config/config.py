@@ -28,11 +28,107 @@ class Config:
     PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "student-chatbot")
     
+    # Chunking configuration (sizes are in approximate tokens)
+    CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "200"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
+    
+    # Embedding backend: 'torch' (sentence-transformers) or 'onnx' (int8-quantized export)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx-int8")
+    ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets onnxruntime decide
+    
+    # Persistent embedding cache keyed by (model, normalized chunk text)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+    EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+    
+    # Local content-addressed cache of Cloudinary PDFs
+    PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+    PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "data/pdf_cache")
+    PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "512"))
+    
+    # PDF text extractor: 'pypdf2' (default), 'pypdfium2' or 'pdfminer'
+    PDF_EXTRACTOR = os.getenv("PDF_EXTRACTOR", "pypdf2")
+    
+    # Extracted page texts cached per PDF content hash and extractor version
+    TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true"
+    TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", "data/text_cache")
+    
+    # Near-duplicate chunk removal (MinHash/LSH)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))   # Jaccard similarity on word 5-gram shingles
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+    
+    # Ingestion batching
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))      # Chunks encoded per CPU batch
+    UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))   # Vectors per Pinecone upsert request
+    UPSERT_WORKERS = int(os.getenv("UPSERT_WORKERS", "4"))           # Parallel upsert requests
+    UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+    
+    # Background indexing of uploaded PDFs
+    INDEX_ON_UPLOAD = os.getenv("INDEX_ON_UPLOAD", "true").lower() == "true"
+    INDEXING_WORKERS = int(os.getenv("INDEXING_WORKERS", "1"))
+    INDEXING_RECOVERY_INTERVAL = int(os.getenv("INDEXING_RECOVERY_INTERVAL", "300"))      # Seconds; 0 disables recovery
+    INDEXING_JOB_STALE_SECONDS = int(os.getenv("INDEXING_JOB_STALE_SECONDS", "900"))    # Untouched this long = owner exited
+    INDEXING_MAX_ATTEMPTS = int(os.getenv("INDEXING_MAX_ATTEMPTS", "3"))                # Take-overs before a job is failed
+    
+    # Admin answers appended to extra.pdf: one read-modify-upload at a time across workers
+    EXTRA_PDF_LEASE_TTL = int(os.getenv("EXTRA_PDF_LEASE_TTL", "120"))    # Seconds; outlives a crashed holder this long
+    EXTRA_PDF_LEASE_WAIT = int(os.getenv("EXTRA_PDF_LEASE_WAIT", "60"))   # Seconds an append waits for the lease
+    
+    # Vector maintenance
+    DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))             # IDs per Pinecone delete request
+    ORPHAN_SWEEP_INTERVAL = int(os.getenv("ORPHAN_SWEEP_INTERVAL", "21600"))     # Seconds; 0 disables the sweeper
+    
+    # Dashboard counters: maintained on write, recounted periodically to correct drift
+    COUNTER_RECONCILE_INTERVAL = int(os.getenv("COUNTER_RECONCILE_INTERVAL", "3600"))  # Seconds; 0 disables reconciliation
+    DASHBOARD_STATS_FALLBACK = os.getenv("DASHBOARD_STATS_FALLBACK", "estimated")     # "estimated" or "exact" before the first reconcile
+    
+    # Usernames copied onto chat entries: recently renamed users are re-propagated periodically
+    USERNAME_RECONCILE_INTERVAL = int(os.getenv("USERNAME_RECONCILE_INTERVAL", "900"))  # Seconds; 0 disables the job
+    
+    # Query analytics rollups (utils/analytics.py)
+    ANALYTICS_ROLLUP_INTERVAL = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "300"))  # Seconds; 0 disables the rollup job
+    ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))           # Chat entries read per round trip
+    ANALYTICS_SETTLE_SECONDS = int(os.getenv("ANALYTICS_SETTLE_SECONDS", "60"))    # Entries younger than this wait for the next run
+    ANALYTICS_TOP_TERMS = int(os.getenv("ANALYTICS_TOP_TERMS", "50"))              # Terms kept per day
+    
+    # Startup: dependencies are initialized in the background after the app is built
+    WARMUP_RETRY_INTERVAL = int(os.getenv("WARMUP_RETRY_INTERVAL", "15"))  # Seconds between retries of failed steps
+    MIGRATION_RETRY_INTERVAL = int(os.getenv("MIGRATION_RETRY_INTERVAL", "600"))  # Seconds between retries of failed migrations; 0 disables
+    BUILD_INDEX_ON_START = os.getenv("BUILD_INDEX_ON_START", "true").lower() == "true"  # Build embeddings if the index is empty
+    # Set by gunicorn.conf.py: the app is imported once in the master and forked into workers
+    PRELOAD_APP = os.getenv("PRELOAD_APP", "false").lower() == "true"
+    
+    # Blue/green namespaces: rebuilds write to a fresh namespace and switch the pointer
+    VECTOR_NAMESPACE_PREFIX = os.getenv("VECTOR_NAMESPACE_PREFIX", "course_materials")
+    NAMESPACE_POINTER_TTL = float(os.getenv("NAMESPACE_POINTER_TTL", "5"))     # Seconds the active pointer is cached
+    NAMESPACE_VALIDATE_TIMEOUT = int(os.getenv("NAMESPACE_VALIDATE_TIMEOUT", "120"))
+    NAMESPACE_GC_DELAY = int(os.getenv("NAMESPACE_GC_DELAY", "60"))            # Grace period before the old namespace is dropped
+    
+    # Retrieval configuration
+    HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+    KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", "data/keyword_index.json")
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "10"))
+    RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))  # Candidates per retriever before fusion
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    
     # Cloudinary configuration
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
     CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
     PDF_FOLDER = os.getenv("CLOUDINARY_PDF_FOLDER", "student_chatbot/pdfs")
+    PDF_LISTING_TTL = int(os.getenv("PDF_LISTING_TTL", "300"))   # Seconds the folder listing is cached
+    
+    # Upload limits and streaming
+    MAX_PDF_UPLOAD_MB = float(os.getenv("MAX_PDF_UPLOAD_MB", "50"))
+    MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "2000"))
+    MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "20"))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(6 * 1024 * 1024)))  # Cloudinary needs parts of at least 5 MB
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+    # Flask rejects larger request bodies with 413 before they are parsed
+    MAX_CONTENT_LENGTH = int(float(os.getenv("MAX_REQUEST_MB", "200")) * 1024 * 1024)
     
     # Mail configuration
     MAIL_SERVER = 'smtp.gmail.com'
@@ -56,6 +152,11 @@ class Config:
     LANGCHAIN_PROJECT = "Faculty Chatbot"
     LANGCHAIN_ENDPOINT = "https://api.smith.langchain.com"
     
+    # Chat history pagination
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+    HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+    HISTORY_COUNT_LIMIT = int(os.getenv("HISTORY_COUNT_LIMIT", "10000"))  # Totals above this are reported as estimates
+    
     # Session management
     SESSION_CLEANUP_INTERVAL = 3600  # Cleanup every hour
     SESSION_TIMEOUT = 7200  # Session timeout after 2 hours
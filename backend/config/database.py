@@ -2,6 +2,22 @@ import os
 from pymongo import MongoClient
 from config.config import Config
 
+class CollectionHandle:
+    """Collection looked up on the current client at every use
+
+    Models keep these for their lifetime, so a worker that reconnects after
+    fork transparently uses its own client instead of the master's.
+    """
+    
+    def __init__(self, database, name):
+        self._database = database
+        self._name = name
+    
+    def __getattr__(self, attr):
+        if self._database.db is None:
+            raise Exception("Database not connected")
+        return getattr(self._database.db[self._name], attr)
+
 class Database:
     """Database connection and management"""
     
@@ -9,27 +25,47 @@ class Database:
         self.client = None
         self.db = None
         
-    def connect(self):
-        """Initialize database connection"""
+    def connect(self, create_indexes=True, event_listeners=None):
+        """Initialize database connection
+
+        MongoClient connects lazily, so with create_indexes=False this returns
+        without a network round trip; call ping() to check the server.
+        event_listeners are pymongo monitoring listeners, e.g.
+        utils.db_commands.CommandCounter.
+        """
         try:
-            self.client = MongoClient(Config.MONGODB_URI)
+            self.client = MongoClient(Config.MONGODB_URI, event_listeners=event_listeners or [])
             self.db = self.client["chatbot"]
-            self._create_indexes()
+            if create_indexes:
+                self._create_indexes()
             print("Database connected successfully")
             return True
         except Exception as e:
             print(f"Database connection failed: {str(e)}")
             return False
-    
+
+    def ping(self):
+        """Round trip to the server; raises if it cannot be reached"""
+        if self.client is None:
+            raise Exception("Database not connected")
+        self.client.admin.command("ping")
+
+    def ensure_indexes(self):
+        """Create indexes once the server is reachable"""
+        self.ping()
+        self._create_indexes()
+
+    def run_migrations(self):
+        """Apply pending data migrations (config/migrations.py)"""
+        from config.migrations import run_pending
+        self.ping()
+        return run_pending(self.db)
+
     def _create_indexes(self):
-        """Create necessary indexes for better performance"""
+        """Bring indexes in line with the registry in config/indexes.py"""
+        from config.indexes import migrate, print_migration_report
         try:
-            # Create chat_history collection with indexes if it doesn't exist
-            if "chat_history" not in self.db.list_collection_names():
-                chat_history_collection = self.db.create_collection("chat_history")
-                chat_history_collection.create_index([("user_id", 1)])
-                chat_history_collection.create_index([("timestamp", -1)])
-            
+            print_migration_report(migrate(self.db))
             print("Database indexes created successfully")
         except Exception as e:
             print(f"Error creating indexes: {str(e)}")
@@ -38,13 +74,57 @@ class Database:
         """Get a specific collection"""
         if self.db is None:
             raise Exception("Database not connected")
-        return self.db[collection_name]
+        return CollectionHandle(self, collection_name)
     
     def close_connection(self):
         """Close database connection"""
         if self.client:
             self.client.close()
+            self.client = None
+            self.db = None
             print("Database connection closed")
+    
+    def reconnect_after_fork(self):
+        """Give a forked worker its own client; MongoClient is not fork-safe
+
+        The inherited client is dropped without closing it, since its sockets
+        and monitor threads belong to the parent.
+        """
+        self.client = None
+        self.db = None
+        return self.connect(create_indexes=False)
+
+class AsyncDatabase:
+    """Motor (asyncio) connection for the ASGI serving mode (asgi.py)
+
+    Motor binds the client to the event loop it is first used on, so the
+    client is created on first use inside the loop rather than at import.
+    """
+    
+    def __init__(self):
+        self.client = None
+        self._db = None
+    
+    @property
+    def db(self):
+        if self._db is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self.client = AsyncIOMotorClient(Config.MONGODB_URI)
+            self._db = self.client["chatbot"]
+        return self._db
+    
+    def get_collection(self, collection_name):
+        """Get a specific collection; connects on first use"""
+        return CollectionHandle(self, collection_name)
+    
+    def close_connection(self):
+        """Close the client; the next use opens a new one"""
+        if self.client:
+            self.client.close()
+            self.client = None
+            self._db = None
+            print("Async database connection closed")
 
-# Global database instance
+# Global database instances
 db_instance = Database()
+async_db_instance = AsyncDatabase()
@@ -0,0 +1,220 @@
+"""
+Declarative MongoDB indexes.
+
+INDEXES lists every index the models rely on. migrate() brings a database
+in line with it and is safe to run on every start. It creates what is
+missing, accepts an existing index with the same keys under another name,
+and drops indexes listed in OBSOLETE_INDEXES. HOT_QUERIES are the filters
+and sorts the request path issues; explain_hot_queries() reports which of
+them would still scan a whole collection.
+
+Usage (from the backend directory):
+    python -m config.indexes migrate
+    python -m config.indexes report     # $indexStats usage per index
+    python -m config.indexes explain    # exits 1 if a hot query does a COLLSCAN
+"""
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+def _normalize(keys):
+    # Servers may report directions as floats (1.0)
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in keys]
+
+class IndexSpec:
+    """One index: key pattern plus creation options"""
+
+    def __init__(self, keys, unique=False, name=None):
+        self.keys = list(keys)
+        self.unique = unique
+        # Same default name pymongo would give, so indexes created before the registry match
+        self.name = name or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def matches(self, info):
+        """Whether an existing index (from index_information) is this one"""
+        return _normalize(info["key"]) == _normalize(self.keys) and bool(info.get("unique")) == self.unique
+
+INDEXES = {
+    "users": [
+        # Signup and login look users up by these on every request
+        IndexSpec([("email", ASCENDING)], unique=True),
+        IndexSpec([("username", ASCENDING)], unique=True),
+        # Recently renamed users, for the username reconcile job
+        IndexSpec([("username_changed_at", ASCENDING)]),
+    ],
+    "queries": [
+        # Unanswered list pages (newest first) and the dashboard count
+        IndexSpec([("answered", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexSpec([("timestamp", DESCENDING)]),
+    ],
+    "chat_history": [
+        # History pages are read in (timestamp, _id) order (utils.pagination.KEYSET_SORT)
+        # A user's history, newest first
+        IndexSpec([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        # Admin listing by time
+        IndexSpec([("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "indexing_jobs": [
+        # Recovery of jobs whose worker exited
+        IndexSpec([("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+}
+
+# Indexes superseded by an entry above
+OBSOLETE_INDEXES = {
+    # Prefixes of the keyset pagination indexes
+    "chat_history": ["user_id_1", "user_id_1_timestamp_-1", "timestamp_-1"],
+    "queries": ["answered_1_timestamp_-1"],
+}
+
+# (description, collection, filter, sort) for the queries the models issue
+HOT_QUERIES = [
+    ("login by username", "users", {"username": "student"}, None),
+    ("signup email check", "users", {"email": "student@example.com"}, None),
+    ("unanswered queries page", "queries", {"answered": False}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("user chat history page", "chat_history", {"user_id": None}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("admin chat history page", "chat_history", {}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("analytics rollup scan", "chat_history", {}, [("timestamp", ASCENDING), ("_id", ASCENDING)]),
+]
+
+def migrate(db):
+    """Create missing indexes and drop obsolete ones; idempotent
+
+    A failure on one index (e.g. duplicates blocking a unique index) is
+    reported and does not stop the others.
+
+    Returns:
+        dict: collection -> {"created", "existing", "dropped", "failed"}
+    """
+    report = {}
+    for collection_name in sorted(set(INDEXES) | set(OBSOLETE_INDEXES)):
+        collection = db[collection_name]
+        result = {"created": [], "existing": [], "dropped": [], "failed": {}}
+        existing = collection.index_information()
+
+        for spec in INDEXES.get(collection_name, []):
+            if any(spec.matches(info) for info in existing.values()):
+                result["existing"].append(spec.name)
+                continue
+            try:
+                options = {"unique": True} if spec.unique else {}
+                collection.create_index(spec.keys, name=spec.name, **options)
+                result["created"].append(spec.name)
+            except OperationFailure as e:
+                result["failed"][spec.name] = _failure_reason(collection, spec, e)
+
+        for name in OBSOLETE_INDEXES.get(collection_name, []):
+            # Only drop once the replacement exists, so queries are never left unindexed
+            if name in existing and not result["failed"]:
+                collection.drop_index(name)
+                result["dropped"].append(name)
+
+        report[collection_name] = result
+    return report
+
+def _failure_reason(collection, spec, error):
+    if spec.unique and error.code == 11000:
+        field = spec.keys[0][0]
+        duplicates = list(collection.aggregate([
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": 5}
+        ]))
+        values = ", ".join(repr(d["_id"]) for d in duplicates)
+        return f"duplicate {field} values block the unique index: {values}"
+    return str(error)
+
+def print_migration_report(report):
+    for collection_name, result in report.items():
+        for name in result["created"]:
+            print(f"Created index {collection_name}.{name}")
+        for name in result["dropped"]:
+            print(f"Dropped obsolete index {collection_name}.{name}")
+        for name, reason in result["failed"].items():
+            print(f"WARNING: Could not create index {collection_name}.{name}: {reason}")
+
+def index_usage(db):
+    """$indexStats for every registered collection
+
+    Counters reset when the server restarts; "since" says from when they count.
+
+    Returns:
+        dict: collection -> list of {"name", "ops", "since", "registered"}
+    """
+    usage = {}
+    for collection_name, specs in INDEXES.items():
+        registered = {spec.name for spec in specs} | {"_id_"}
+        usage[collection_name] = sorted((
+            {
+                "name": stats["name"],
+                "ops": stats["accesses"]["ops"],
+                "since": stats["accesses"]["since"],
+                "registered": stats["name"] in registered
+            }
+            for stats in db[collection_name].aggregate([{"$indexStats": {}}])
+        ), key=lambda entry: entry["name"])
+    return usage
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+def explain_hot_queries(db):
+    """Winning plan stages of each HOT_QUERIES entry
+
+    Returns:
+        list: (description, stages, uses_index) tuples
+    """
+    from bson import ObjectId
+    results = []
+    for description, collection_name, query_filter, sort in HOT_QUERIES:
+        # Placeholder values only need the right type for the planner
+        query_filter = {key: ObjectId() if value is None else value for key, value in query_filter.items()}
+        cursor = db[collection_name].find(query_filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = [stage for stage in _plan_stages(plan) if stage]
+        results.append((description, stages, "COLLSCAN" not in stages))
+    return results
+
+def main():
+    import argparse
+    import sys
+    from config.database import db_instance
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["migrate", "report", "explain"])
+    args = parser.parse_args()
+
+    if not db_instance.connect(create_indexes=False):
+        sys.exit(1)
+    db = db_instance.db
+
+    if args.command == "migrate":
+        report = migrate(db)
+        print_migration_report(report)
+        if any(result["failed"] for result in report.values()):
+            sys.exit(1)
+    elif args.command == "report":
+        for collection_name, entries in index_usage(db).items():
+            print(f"\n{collection_name}")
+            for entry in entries:
+                note = "" if entry["registered"] else "  (not in registry)"
+                unused = "  UNUSED" if entry["ops"] == 0 else ""
+                print(f"  {entry['name']:<32}{entry['ops']:>10} ops since {entry['since']:%Y-%m-%d %H:%M}{unused}{note}")
+    else:
+        failed = False
+        for description, stages, uses_index in explain_hot_queries(db):
+            print(f"{'OK  ' if uses_index else 'FAIL'} {description:<24}{' <- '.join(stages)}")
+            failed = failed or not uses_index
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+One-off data migrations.
+
+MIGRATIONS run once per database, in order, and are recorded in the
+schema_migrations collection. Each one takes a lease in job_leases first,
+so workers that start together do not run the same migration at the same
+time. Migrations are written to be safe to rerun anyway. The warm-up runs
+pending migrations on start, and the "migrations" periodic job retries any
+that failed.
+
+Usage (from the backend directory):
+    python -m config.migrations             # apply pending migrations
+    python -m config.migrations --rerun NAME
+"""
+
+import datetime
+import os
+import socket
+import time
+
+LEASE_TTL = 3600  # Seconds before a migration left running by a dead worker can be retried
+
+def backfill_chat_usernames(db):
+    """Copy each user's username onto their chat_history entries
+
+    Updates go user by user over the (user_id, ...) index. The
+    "username-reconcile" job runs the same update for recently renamed users.
+    """
+    from models.models import ChatHistory
+    return ChatHistory().reconcile_usernames()
+
+def seed_dashboard_counters(db):
+    """Initialize the dashboard counters from full counts"""
+    from models.models import Counter
+    return Counter().reconcile()
+
+MIGRATIONS = [
+    ("chat_history_usernames", backfill_chat_usernames),
+    ("dashboard_counters", seed_dashboard_counters),
+]
+
+def run_migration(db, name, func):
+    """Run one migration under its lease and record it
+
+    The lease is released when the migration returns or raises, so a failed
+    migration can be retried at once rather than after LEASE_TTL.
+
+    Returns:
+        bool: False when another worker holds the lease
+    """
+    from models.models import JobLease
+    lease = JobLease()
+    lease_name = f"migration:{name}"
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    if not lease.acquire(lease_name, owner, ttl=LEASE_TTL):
+        print(f"Migration '{name}' is running in another worker, skipping")
+        return False
+    try:
+        print(f"Running migration '{name}'")
+        started = time.time()
+        result = func(db)
+        elapsed = time.time() - started
+        db["schema_migrations"].update_one(
+            {"_id": name},
+            {"$set": {"applied_at": datetime.datetime.utcnow(), "seconds": round(elapsed, 1), "result": result}},
+            upsert=True
+        )
+        print(f"Migration '{name}' done in {elapsed:.1f}s: {result}")
+        return True
+    finally:
+        lease.release(lease_name, owner)
+
+def run_pending(db):
+    """Apply every migration not yet recorded in schema_migrations
+
+    Migrations run in order, so the first one that raises stops the run;
+    the warm-up reports the error and the "migrations" job retries it.
+
+    Returns:
+        list: Names of the migrations applied by this call
+    """
+    applied = {doc["_id"] for doc in db["schema_migrations"].find({}, {"_id": 1})}
+    return [
+        name for name, func in MIGRATIONS
+        if name not in applied and run_migration(db, name, func)
+    ]
+
+def main():
+    import argparse
+    import sys
+    from config.database import db_instance
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rerun", choices=[name for name, _ in MIGRATIONS], help="Run a migration again")
+    args = parser.parse_args()
+
+    if not db_instance.connect(create_indexes=False):
+        sys.exit(1)
+    if args.rerun:
+        run_migration(db_instance.db, args.rerun, dict(MIGRATIONS)[args.rerun])
+    elif not run_pending(db_instance.db):
+        print("No pending migrations")
+
+if __name__ == "__main__":
+    main()
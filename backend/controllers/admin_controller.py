@@ -1,5 +1,7 @@
+import datetime
 from flask import request, jsonify
 from services.admin_service import AdminService
+from utils.pagination import parse_page_params
 
 class AdminController:
     """Controller for handling admin endpoints"""
@@ -16,17 +18,21 @@ class AdminController:
             return jsonify({"error": f"Failed to fetch stats: {str(e)}"}), 500
     
     def get_unanswered_queries(self):
-        """Get all unanswered queries"""
+        """Get a page of unanswered queries: ?sort=recent (with cursor) or ?sort=frequent (with offset)"""
         try:
-           
-            # Call service and get result
-            result, status_code = self.admin_service.get_unanswered_queries()
+            sort = request.args.get("sort") or "recent"
+            if sort not in ("recent", "frequent"):
+                return jsonify({"error": "sort must be 'recent' or 'frequent'"}), 400
+            try:
+                params = parse_page_params(request.args)
+                offset = max(0, int(request.args.get("offset") or 0))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
             
+            result, status_code = self.admin_service.get_unanswered_queries(sort=sort, offset=offset, **params)
             return jsonify(result), status_code
         except Exception as e:
             print(f"Controller error: {str(e)}")
-            import traceback
-            traceback.print_exc()
             return jsonify({"error": f"Failed to fetch queries: {str(e)}"}), 500
     
     def delete_query(self, query_id):
@@ -38,17 +44,32 @@ class AdminController:
             return jsonify({"error": f"Failed to delete query: {str(e)}"}), 500
     
     def get_chat_history(self):
-        """Get all chat history for admin"""
+        """Get a page of chat history for admin, filtered by ?user=<username>, from and to"""
         try:
-            result, status_code = self.admin_service.get_all_chat_history()
+            try:
+                params = parse_page_params(request.args)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            result, status_code = self.admin_service.get_all_chat_history(
+                username=request.args.get("user") or None, **params
+            )
             return jsonify(result), status_code
         except Exception as e:
             return jsonify({"error": f"Failed to fetch chat history: {str(e)}"}), 500
     
     def get_query_analytics(self):
-        """Get query analytics"""
+        """Get query analytics for the days ?from= to ?to= (YYYY-MM-DD, inclusive)"""
         try:
-            result, status_code = self.admin_service.get_query_analytics()
+            try:
+                start, end = (
+                    datetime.date.fromisoformat(request.args[name]) if request.args.get(name) else None
+                    for name in ("from", "to")
+                )
+            except ValueError:
+                return jsonify({"error": "from and to must be dates (YYYY-MM-DD)"}), 400
+            
+            result, status_code = self.admin_service.get_query_analytics(start, end)
             return jsonify(result), status_code
         except Exception as e:
             return jsonify({"error": f"Failed to generate analytics: {str(e)}"}), 500
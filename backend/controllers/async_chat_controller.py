@@ -0,0 +1,82 @@
+import asyncio
+from starlette.responses import JSONResponse
+from services.async_chat_service import AsyncChatService
+from models.models import AsyncChatHistory
+from utils.helpers import format_response_data
+from utils.auth import decode_token
+from utils.pagination import parse_page_params
+
+class AsyncChatController:
+    """Async counterparts of the ChatController query and chat history endpoints"""
+
+    def __init__(self, vectorstore):
+        self.chat_service = AsyncChatService(vectorstore)
+        self.chat_history_model = AsyncChatHistory()
+
+    async def query(self, request):
+        """Handle user query"""
+        try:
+            data = await request.json()
+            question = data.get("question")
+            session_id = data.get("session_id")
+            user_token = request.headers.get('Authorization')
+
+            if not question:
+                return JSONResponse({"error": "Question not provided"}, status_code=400)
+
+            # Extract user_id from token if available
+            user_id = None
+            username = None
+            if user_token:
+                payload = decode_token(user_token)
+                if payload:
+                    user_id = payload.get('user_id')
+                    username = payload.get('username')
+
+            result, status_code = await self.chat_service.process_query(question, session_id, user_id, username)
+            return JSONResponse(result, status_code=status_code)
+
+        except Exception as e:
+            error_msg = str(e)
+            # Check if this is a timeout error from the embedding service
+            if "504 Deadline Exceeded" in error_msg or "Error embedding content" in error_msg:
+                return JSONResponse({
+                    "error": "The AI service is currently experiencing high demand. Please try again in a few moments.",
+                    "user_friendly_error": True
+                }, status_code=503)  # Service Unavailable
+            return JSONResponse({"error": f"Query processing failed: {error_msg}"}, status_code=500)
+
+    async def get_chat_history(self, request):
+        """Get user's chat history"""
+        try:
+            user_token = request.headers.get('Authorization')
+            if not user_token:
+                return JSONResponse({"error": "Authentication required"}, status_code=401)
+
+            payload = decode_token(user_token)
+            if not payload:
+                return JSONResponse({"error": "Invalid token"}, status_code=401)
+
+            user_id = payload.get('user_id')
+
+            try:
+                params = parse_page_params(request.query_params)
+            except ValueError as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+
+            # The page and the total are independent reads
+            (history, next_cursor), (total, total_is_estimate) = await asyncio.gather(
+                self.chat_history_model.get_user_history_page(user_id, **params),
+                self.chat_history_model.count_history(user_id, start=params["start"], end=params["end"])
+            )
+            formatted_history = format_response_data(history)
+
+            return JSONResponse({
+                "history": formatted_history,
+                "next_cursor": next_cursor,
+                "total": total,
+                "total_is_estimate": total_is_estimate
+            }, status_code=200)
+
+        except Exception as e:
+            return JSONResponse({"error": f"Failed to fetch chat history: {str(e)}"}, status_code=500)
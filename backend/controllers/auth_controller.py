@@ -40,6 +40,21 @@ class AuthController:
         except Exception as e:
             return jsonify({"error": f"Login failed: {str(e)}"}), 500
     
+    def change_username(self, current_user_id):
+        """Handle username change for the logged-in user"""
+        try:
+            data = request.json
+            username = (data.get("username") or "").strip()
+            
+            if not username:
+                return jsonify({"error": "Username is required"}), 400
+            
+            result, status_code = self.auth_service.change_username(current_user_id, username)
+            return jsonify(result), status_code
+            
+        except Exception as e:
+            return jsonify({"error": f"Failed to change username: {str(e)}"}), 500
+    
     def admin_login(self):
         """Handle admin login"""
         try:
@@ -3,6 +3,7 @@ from services.chat_service import ChatService
 from models.models import ChatHistory
 from utils.helpers import format_response_data
 from utils.auth import decode_token
+from utils.pagination import parse_page_params
 
 class ChatController:
     """Controller for handling chat endpoints"""
@@ -24,6 +25,7 @@ class ChatController:
             
             # Extract user_id from token if available
             user_id = None
+            username = None
             if user_token:
                 # Remove 'Bearer ' prefix if present
                 if user_token.startswith('Bearer '):
@@ -31,8 +33,9 @@ class ChatController:
                 payload = decode_token(user_token)
                 if payload:
                     user_id = payload.get('user_id')
+                    username = payload.get('username')
             
-            result, status_code = self.chat_service.process_query(question, session_id, user_id)
+            result, status_code = self.chat_service.process_query(question, session_id, user_id, username)
             return jsonify(result), status_code
             
         except Exception as e:
@@ -62,11 +65,24 @@ class ChatController:
             
             user_id = payload.get('user_id')
             
-            # Fetch chat history for the user
-            history = self.chat_history_model.get_user_history(user_id)
+            try:
+                params = parse_page_params(request.args)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            # Fetch one page of chat history for the user
+            history, next_cursor = self.chat_history_model.get_user_history_page(user_id, **params)
+            total, total_is_estimate = self.chat_history_model.count_history(
+                user_id, start=params["start"], end=params["end"]
+            )
             formatted_history = format_response_data(history)
             
-            return jsonify({"history": formatted_history}), 200
+            return jsonify({
+                "history": formatted_history,
+                "next_cursor": next_cursor,
+                "total": total,
+                "total_is_estimate": total_is_estimate
+            }), 200
             
         except Exception as e:
             return jsonify({"error": f"Failed to fetch chat history: {str(e)}"}), 500
@@ -1,4 +1,4 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, send_file
 from werkzeug.utils import secure_filename
 from models.models import PDF
 from services.cloudinary_service import CloudinaryService
@@ -34,31 +34,71 @@ class PDFController:
             # Upload file to Cloudinary
             upload_result = self.cloudinary_service.upload_pdf(file)
             
-            # Create PDF object
-            pdf = PDF(
-                public_id=upload_result['public_id'],
-                original_filename=upload_result['original_filename'],
-                url=upload_result['url'],
-                created_at=upload_result.get('created_at'),
-                resource_type=upload_result.get('resource_type'),
-                bytes=upload_result.get('bytes')
-            )
-            
-            # Return success response
             return jsonify({
                 'message': 'PDF uploaded successfully',
-                'pdf': pdf.to_dict()
+                **self._uploaded_pdf(upload_result)
             }), 201
             
+        except ValueError as e:
+            # Not a PDF, or over the size or page limits
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             current_app.logger.error(f"Error uploading PDF: {str(e)}")
             return jsonify({'error': f'Error uploading PDF: {str(e)}'}), 500
     
+    def _uploaded_pdf(self, upload_result):
+        """Response body for one uploaded PDF with its indexing status handle"""
+        pdf = PDF(
+            public_id=upload_result['public_id'],
+            original_filename=upload_result['original_filename'],
+            url=upload_result['url'],
+            created_at=upload_result.get('created_at'),
+            resource_type=upload_result.get('resource_type'),
+            bytes=upload_result.get('bytes')
+        )
+        indexing = upload_result.get('hooks', {}).get('indexing')
+        if indexing:
+            indexing['status_url'] = f"/api/pdfs/indexing/{indexing['job_id']}"
+        return {'pdf': pdf.to_dict(), 'indexing': indexing}
+    
+    def upload_pdfs(self):
+        """Upload several PDF files to Cloudinary in parallel"""
+        try:
+            files = [f for f in request.files.getlist('files') if f.filename]
+            if not files:
+                return jsonify({'error': 'No files selected'}), 400
+            if len(files) > current_app.config.get('MAX_BATCH_FILES'):
+                return jsonify({'error': f"At most {current_app.config.get('MAX_BATCH_FILES')} files per batch"}), 400
+            
+            rejected = [f.filename for f in files if not self.allowed_file(f.filename)]
+            if rejected:
+                return jsonify({'error': 'Only PDF files are allowed', 'files': rejected}), 400
+            
+            results = []
+            for outcome in self.cloudinary_service.upload_pdfs(files):
+                if 'result' in outcome:
+                    results.append({'filename': outcome['filename'], 'status': 'uploaded',
+                                    **self._uploaded_pdf(outcome['result'])})
+                else:
+                    results.append({'filename': outcome['filename'], 'status': 'failed',
+                                    'error': outcome['error']})
+            
+            uploaded = sum(1 for result in results if result['status'] == 'uploaded')
+            return jsonify({
+                'message': f'Uploaded {uploaded} of {len(results)} PDFs',
+                'results': results
+            }), 201 if uploaded == len(results) else 207
+            
+        except Exception as e:
+            current_app.logger.error(f"Error uploading PDFs: {str(e)}")
+            return jsonify({'error': f'Error uploading PDFs: {str(e)}'}), 500
+    
     def list_pdfs(self):
         """List all PDFs stored in Cloudinary"""
         try:
-            # Get all PDFs from Cloudinary
-            pdf_resources = self.cloudinary_service.list_pdfs()
+            # Get all PDFs from Cloudinary (cached unless ?refresh=true)
+            refresh = request.args.get('refresh', 'false').lower() == 'true'
+            pdf_resources = self.cloudinary_service.list_pdfs(refresh=refresh)
             
             # Print for debugging
             print(f"Found {len(pdf_resources)} PDF resources")
@@ -77,6 +117,44 @@ class PDFController:
             current_app.logger.error(f"Error listing PDFs: {str(e)}")
             return jsonify({'error': f'Error listing PDFs: {str(e)}'}), 500
     
+    def get_indexing_status(self, job_id):
+        """Get the status of a background indexing job"""
+        try:
+            from services.indexing_service import get_indexing_service
+            job = get_indexing_service().get_status(job_id)
+            if not job:
+                return jsonify({'error': 'Indexing job not found'}), 404
+            return jsonify(job), 200
+            
+        except Exception as e:
+            current_app.logger.error(f"Error fetching indexing status: {str(e)}")
+            return jsonify({'error': f'Error fetching indexing status: {str(e)}'}), 500
+    
+    def preview_pdf(self, public_id):
+        """Serve a PDF for preview from the local PDF cache"""
+        try:
+            resource = {
+                'public_id': public_id,
+                'url': self.cloudinary_service.get_pdf_url(public_id)
+            }
+            if current_app.config.get('PDF_CACHE_ENABLED'):
+                # Revalidated with a conditional request, so unchanged files are not re-sent
+                from utils.pdf_cache import get_pdf_cache
+                pdf_path = get_pdf_cache().fetch(resource)
+                return send_file(pdf_path, mimetype='application/pdf',
+                                 download_name=os.path.basename(public_id) + '.pdf')
+            
+            import io
+            import requests
+            response = requests.get(resource['url'], timeout=60)
+            response.raise_for_status()
+            return send_file(io.BytesIO(response.content), mimetype='application/pdf',
+                             download_name=os.path.basename(public_id) + '.pdf')
+            
+        except Exception as e:
+            current_app.logger.error(f"Error previewing PDF: {str(e)}")
+            return jsonify({'error': f'Error previewing PDF: {str(e)}'}), 500
+    
     def delete_pdf(self, public_id):
         """Delete a PDF from Cloudinary"""
         try:
@@ -84,6 +162,15 @@ class PDFController:
             result = self.cloudinary_service.delete_pdf(public_id)
             
             if result.get('result') == 'ok':
+                # Remove exactly this document's vectors so it stops being retrieved
+                try:
+                    from utils.vector_maintenance import delete_source_vectors
+                    delete_source_vectors(public_id)
+                except Exception as vector_error:
+                    current_app.logger.error(f"Error deleting vectors for {public_id}: {str(vector_error)}")
+                if current_app.config.get('PDF_CACHE_ENABLED'):
+                    from utils.pdf_cache import get_pdf_cache
+                    get_pdf_cache().invalidate(public_id)
                 return jsonify({'message': 'PDF deleted successfully'}), 200
             else:
                 return jsonify({'error': 'Failed to delete PDF'}), 400
@@ -97,12 +184,27 @@ class PDFController:
         try:
             # Import here to avoid circular imports
             from utils.pdf_utils import create_embeddings
+            from utils.vector_namespaces import get_active_namespace
             
-            # Rebuild embeddings
+            # Rebuild into a fresh namespace and switch queries over to it
             vectorstore = create_embeddings()
             
-            return jsonify({'message': 'Embeddings rebuilt successfully'}), 200
+            return jsonify({
+                'message': 'Embeddings rebuilt successfully',
+                'namespace': get_active_namespace()
+            }), 200
             
         except Exception as e:
             current_app.logger.error(f"Error rebuilding embeddings: {str(e)}")
             return jsonify({'error': f'Error rebuilding embeddings: {str(e)}'}), 500
+    
+    def sweep_orphan_vectors(self):
+        """Delete vectors whose PDF no longer exists in Cloudinary"""
+        try:
+            from utils.vector_maintenance import sweep_orphan_vectors
+            report = sweep_orphan_vectors()
+            return jsonify({'message': 'Orphan vectors swept successfully', 'report': report}), 200
+            
+        except Exception as e:
+            current_app.logger.error(f"Error sweeping orphan vectors: {str(e)}")
+            return jsonify({'error': f'Error sweeping orphan vectors: {str(e)}'}), 500
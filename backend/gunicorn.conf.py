@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for multi-worker deployments.
+
+The app is imported once in the master (preload_app), which loads the
+embedding model weights and the active keyword index before forking, so
+workers share those pages copy-on-write instead of each loading its own
+copy. Threads and network clients do not survive fork: every worker
+reconnects to MongoDB, drops inherited HTTP clients and starts its own
+warm-up and periodic jobs in post_fork.
+
+Each worker serves requests from several threads (gthread). A query spends
+most of its time waiting on the LLM and Pinecone, so threads multiply
+throughput without another copy of the model; the chat path serializes only
+the turns of the same session.
+
+Usage (from the backend directory):
+    gunicorn --config gunicorn.conf.py app:app
+"""
+
+import gc
+import os
+
+# Read by config.Config before the app module is imported
+os.environ.setdefault("PRELOAD_APP", "true")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = os.environ["PRELOAD_APP"].lower() == "true"
+
+# Recycle workers now and then so slow leaks cannot grow without bound
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = "-"
+errorlog = "-"
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach; otherwise the
+    # first collection in each worker writes to every object header and turns
+    # the shared pages private
+    if preload_app:
+        gc.freeze()
+        server.log.info("Froze %d preloaded objects for copy-on-write sharing", gc.get_freeze_count())
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from app import app, init_worker
+    init_worker(app)
+    server.log.info("Worker %s initialized", worker.pid)
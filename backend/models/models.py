@@ -1,6 +1,8 @@
 import datetime
 from bson import ObjectId
-from config.database import db_instance
+from config.config import Config
+from config.database import async_db_instance, db_instance
+from utils.pagination import KEYSET_SORT, after_cursor, page_result, range_filter
 
 class User:
     """User model for handling user-related database operations"""
@@ -17,6 +19,7 @@ class User:
             "created_at": datetime.datetime.utcnow()
         }
         result = self.collection.insert_one(user_data)
+        Counter().increment(users=1)
         return result.inserted_id
     
     def find_by_email(self, email):
@@ -31,8 +34,20 @@ class User:
         """Find user by ID"""
         return self.collection.find_one({"_id": ObjectId(user_id)})
     
-    def get_total_users(self):
-        """Get total number of users"""
+    def update_username(self, user_id, username):
+        """Rename a user; chat history copies are updated by ChatHistory.set_username
+        
+        username_changed_at lets the username reconcile job find recent renames.
+        """
+        return self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"username": username, "username_changed_at": datetime.datetime.utcnow()}}
+        )
+    
+    def get_total_users(self, estimated=False):
+        """Get total number of users, from collection metadata if estimated"""
+        if estimated:
+            return self.collection.estimated_document_count()
         return self.collection.count_documents({})
 
 class Query:
@@ -41,116 +56,644 @@ class Query:
     def __init__(self):
         self.collection = db_instance.get_collection("queries")
     
-    def create_query(self, question, user_id=None, answered=False):
-        """Create a new query"""
-        query_data = {
+    @staticmethod
+    def new_query(question, user_id=None, answered=False):
+        """Build a query document"""
+        return {
             "question": question,
             "answered": answered,
             "user_id": ObjectId(user_id) if user_id else None,
             "timestamp": datetime.datetime.utcnow()
         }
+    
+    def create_query(self, question, user_id=None, answered=False):
+        """Create a new query"""
+        query_data = self.new_query(question, user_id, answered)
         print(query_data)
         result = self.collection.insert_one(query_data)
         # print(result.inserted_id)
+        if not answered:
+            Counter().increment(unanswered_queries=1)
         return result.inserted_id
     
-    def get_unanswered_queries(self):
-        """Get all unanswered queries"""
-        try:
-            unanswered = list(self.collection.find({"answered": False}))
-            
-            # Also check for queries without the answered field
-            no_answered_field = list(self.collection.find({"answered": {"$exists": False}}))
-            
-            # Check total queries
-            total = self.collection.count_documents({})
-            
-            if total > 0:
-                sample = self.collection.find_one({})
-            
-            return unanswered
-        except Exception as e:
-            print(f"=== QUERY MODEL ERROR: {str(e)} ===")
-            return []
+    UNANSWERED_PROJECTION = {"_id": 1, "question": 1, "timestamp": 1, "user_id": 1}
+    
+    @staticmethod
+    def unanswered_query(cursor=None, start=None, end=None):
+        """Filter for unanswered queries, optionally after a cursor (utils.pagination)"""
+        query = range_filter({"answered": False}, start, end)
+        if cursor:
+            query.update(after_cursor(cursor))
+        return query
+    
+    def get_unanswered_page(self, limit, cursor=None, start=None, end=None):
+        """One page of unanswered queries, newest first
+        
+        A single range scan on the (answered, timestamp, _id) index.
+        
+        Returns:
+            tuple: (queries, cursor of the next page or None)
+        """
+        documents = list(self.collection.find(
+            self.unanswered_query(cursor, start, end),
+            self.UNANSWERED_PROJECTION
+        ).sort(KEYSET_SORT).limit(limit + 1))
+        return page_result(documents, limit)
+    
+    def get_unanswered_groups(self, limit, offset=0, start=None, end=None):
+        """Unanswered questions grouped by text, most asked first
+        
+        Questions are grouped case- and whitespace-insensitively. Each group
+        carries its newest query's _id and question, how often it was asked
+        and the ids of all its queries. One aggregation returns the page and
+        the number of groups.
+        
+        Returns:
+            tuple: (groups, total number of groups)
+        """
+        pipeline = [
+            {"$match": self.unanswered_query(start=start, end=end)},
+            {"$sort": dict(KEYSET_SORT)},
+            {
+                "$group": {
+                    "_id": {"$toLower": {"$trim": {"input": "$question"}}},
+                    "query_id": {"$first": "$_id"},
+                    "question": {"$first": "$question"},
+                    "timestamp": {"$first": "$timestamp"},
+                    "count": {"$sum": 1},
+                    "query_ids": {"$push": "$_id"}
+                }
+            },
+            {
+                "$facet": {
+                    "groups": [
+                        {"$sort": {"count": -1, "timestamp": -1, "_id": 1}},
+                        {"$skip": offset},
+                        {"$limit": limit},
+                        {"$project": {"_id": "$query_id", "question": 1, "timestamp": 1, "count": 1, "query_ids": 1}}
+                    ],
+                    "total": [{"$count": "groups"}]
+                }
+            }
+        ]
+        result = next(self.collection.aggregate(pipeline), {"groups": [], "total": []})
+        total = result["total"][0]["groups"] if result["total"] else 0
+        return result["groups"], total
     
     def update_query(self, query_id, answer):
-        """Update query with answer"""
-        return self.collection.update_one(
-            {"_id": ObjectId(query_id)},
-            {"$set": {"answer": answer, "answered": True}}
-        )
+        """Update query with answer
+        
+        Only the update that flips answered from False decrements the
+        unanswered counter, so concurrent answers count once.
+        """
+        update = {"$set": {"answer": answer, "answered": True}}
+        result = self.collection.update_one({"_id": ObjectId(query_id), "answered": False}, update)
+        if result.modified_count:
+            Counter().increment(unanswered_queries=-1)
+            return result
+        # Already answered: replace the answer
+        return self.collection.update_one({"_id": ObjectId(query_id)}, update)
     
     def delete_query(self, query_id):
-        """Delete a query"""
+        """Delete a query, keeping the unanswered counter in step"""
+        result = self.collection.delete_one({"_id": ObjectId(query_id), "answered": False})
+        if result.deleted_count:
+            Counter().increment(unanswered_queries=-1)
+            return result
         return self.collection.delete_one({"_id": ObjectId(query_id)})
     
     def find_by_id(self, query_id):
         """Find query by ID"""
         return self.collection.find_one({"_id": ObjectId(query_id)})
     
-    def get_unanswered_count(self):
-        """Get count of unanswered queries"""
-        return self.collection.count_documents({"answered": False})
+    def get_unanswered_count(self, start=None, end=None):
+        """Get count of unanswered queries, optionally within a date range"""
+        return self.collection.count_documents(self.unanswered_query(start=start, end=end))
 
 class ChatHistory:
     """Chat history model for handling chat-related database operations"""
     
+    HISTORY_PROJECTION = {"_id": 1, "question": 1, "answer": 1, "timestamp": 1}
+    # The admin listing reads the username stored on each entry instead of joining users
+    ADMIN_PROJECTION = {"_id": 1, "question": 1, "answer": 1, "timestamp": 1, "username": 1}
+    
     def __init__(self):
         self.collection = db_instance.get_collection("chat_history")
+        self.users = db_instance.get_collection("users")
     
-    def create_chat(self, user_id, question, answer):
-        """Create a new chat entry"""
-        chat_data = {
+    @staticmethod
+    def new_chat(user_id, question, answer, username=None):
+        """Build a chat entry document"""
+        return {
             "user_id": ObjectId(user_id),
+            "username": username,
             "question": question,
             "answer": answer,
             "timestamp": datetime.datetime.utcnow()
         }
-        result = self.collection.insert_one(chat_data)
+    
+    def create_chat(self, user_id, question, answer, username=None):
+        """Create a new chat entry, copying the user's username onto it
+        
+        Pass the username from the caller's token when it has one; otherwise
+        it is looked up. A copy written around a rename is repaired by the
+        username reconcile job.
+        """
+        if username is None:
+            user = self.users.find_one({"_id": ObjectId(user_id)}, {"username": 1})
+            username = user.get("username") if user else None
+        result = self.collection.insert_one(self.new_chat(user_id, question, answer, username))
+        Counter().increment(chats=1)
         return result.inserted_id
     
-    def get_user_history(self, user_id):
-        """Get chat history for a specific user"""
-        return list(self.collection.find(
-            {"user_id": ObjectId(user_id)},
-            {"_id": 1, "question": 1, "answer": 1, "timestamp": 1}
-        ).sort("timestamp", -1))
+    def set_username(self, user_id, username):
+        """Propagate a username change to the user's chat entries
+        
+        Returns:
+            int: Number of entries updated
+        """
+        result = self.collection.update_many(
+            {"user_id": ObjectId(user_id), "username": {"$ne": username}},
+            {"$set": {"username": username}}
+        )
+        return result.modified_count
+    
+    def reconcile_usernames(self, since=None):
+        """Copy each user's current username onto their chat entries
+        
+        Entries already holding the current name are skipped, so this
+        repairs entries written with an old name during or after a rename
+        (an old token still carries it). With since, only users renamed
+        after that time are checked.
+        
+        Returns:
+            dict: Users checked and entries updated
+        """
+        query = {"username_changed_at": {"$gte": since}} if since else {}
+        checked = updated = 0
+        for user in self.users.find(query, {"username": 1}):
+            checked += 1
+            updated += self.set_username(user["_id"], user.get("username"))
+        if updated:
+            print(f"Reconciled chat usernames: {updated} entries of {checked} users")
+        return {"users": checked, "updated": updated}
+    
+    @staticmethod
+    def page_query(user_id=None, cursor=None, start=None, end=None):
+        """Filter for history entries, optionally after a cursor (utils.pagination)"""
+        query = {"user_id": ObjectId(user_id)} if user_id else {}
+        range_filter(query, start, end)
+        if cursor:
+            query.update(after_cursor(cursor))
+        return query
+    
+    def get_user_history_page(self, user_id, limit, cursor=None, start=None, end=None):
+        """One page of a user's chat history, newest first
+        
+        Returns:
+            tuple: (entries, cursor of the next page or None)
+        """
+        documents = list(self.collection.find(
+            self.page_query(user_id, cursor, start, end),
+            self.HISTORY_PROJECTION
+        ).sort(KEYSET_SORT).limit(limit + 1))
+        return page_result(documents, limit)
+    
+    def get_history_page(self, limit, cursor=None, user_id=None, start=None, end=None):
+        """One page of all chat history with usernames, newest first, for admin
+        
+        A single range scan on the (timestamp, _id) index; entries written
+        before usernames were stored get them from the backfill migration.
+        
+        Returns:
+            tuple: (entries, cursor of the next page or None)
+        """
+        documents = list(self.collection.find(
+            self.page_query(user_id, cursor, start, end),
+            self.ADMIN_PROJECTION
+        ).sort(KEYSET_SORT).limit(limit + 1))
+        return page_result(documents, limit)
+    
+    def count_history(self, user_id=None, start=None, end=None):
+        """Number of entries matching the filters
+        
+        Without filters this is the collection metadata count. Filtered
+        counts stop at HISTORY_COUNT_LIMIT.
+        
+        Returns:
+            tuple: (count, whether the count is an estimate)
+        """
+        query = self.page_query(user_id, start=start, end=end)
+        if not query:
+            return self.collection.estimated_document_count(), True
+        count = self.collection.count_documents(query, limit=Config.HISTORY_COUNT_LIMIT)
+        return count, count >= Config.HISTORY_COUNT_LIMIT
+    
+    def get_total_chats(self, estimated=False):
+        """Get total number of chats, from collection metadata if estimated"""
+        if estimated:
+            return self.collection.estimated_document_count()
+        return self.collection.count_documents({})
+    
+    ANALYTICS_PROJECTION = {"_id": 1, "question": 1, "timestamp": 1, "analytics": 1}
+    
+    def get_entries_after(self, watermark, before, limit):
+        """Chat entries after a (timestamp, _id) watermark, oldest first
+        
+        Only entries older than before are returned, so writes still in
+        flight with an earlier timestamp are not skipped past.
+        """
+        query = {"timestamp": {"$lt": before}}
+        if watermark:
+            timestamp, object_id = watermark
+            query["$or"] = [
+                {"timestamp": {"$gt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$gt": object_id}}
+            ]
+        return list(self.collection.find(query, self.ANALYTICS_PROJECTION).sort(
+            [("timestamp", 1), ("_id", 1)]
+        ).limit(limit))
     
-    def get_all_history_with_users(self):
-        """Get all chat history with user details for admin"""
+    def set_analytics(self, analytics_by_id):
+        """Store each entry's sentiment and terms on it, in one bulk write"""
+        from pymongo import UpdateOne
+        if not analytics_by_id:
+            return
+        self.collection.bulk_write([
+            UpdateOne({"_id": entry_id}, {"$set": {"analytics": analytics}})
+            for entry_id, analytics in analytics_by_id.items()
+        ], ordered=False)
+    
+    def summarize_day(self, day, top_terms):
+        """Aggregate the stored analytics of one UTC day's entries
+        
+        Returns:
+            tuple: (count, sum of sentiment, [[term, count], ...] most frequent first)
+        """
+        start = datetime.datetime.combine(day, datetime.time())
         pipeline = [
+            {"$match": {
+                "timestamp": {"$gte": start, "$lt": start + datetime.timedelta(days=1)},
+                "analytics.sentiment": {"$type": "number"}
+            }},
             {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user"
+                "$facet": {
+                    "summary": [{"$group": {"_id": None, "count": {"$sum": 1}, "sentiment_sum": {"$sum": "$analytics.sentiment"}}}],
+                    "terms": [
+                        {"$unwind": "$analytics.terms"},
+                        {"$group": {"_id": "$analytics.terms", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1, "_id": 1}},
+                        {"$limit": top_terms}
+                    ]
                 }
-            },
+            }
+        ]
+        result = next(self.collection.aggregate(pipeline), {"summary": [], "terms": []})
+        summary = result["summary"][0] if result["summary"] else {"count": 0, "sentiment_sum": 0}
+        terms = [[term["_id"], term["count"]] for term in result["terms"]]
+        return summary["count"], summary["sentiment_sum"], terms
+
+
+class Counter:
+    """Materialized dashboard counts, maintained with $inc as documents are written
+    
+    One document holds users, chats and unanswered_queries. Writes that
+    bypass the models drift it; reconcile() resets it from real counts.
+    """
+    
+    COLLECTION = "counters"
+    STATS_ID = "dashboard"
+    FIELDS = ("users", "chats", "unanswered_queries")
+    
+    def __init__(self):
+        self.collection = db_instance.get_collection(self.COLLECTION)
+    
+    @classmethod
+    def increment_update(cls, **deltas):
+        """Filter and update document for update_one(..., upsert=True)"""
+        return {"_id": cls.STATS_ID}, {"$inc": deltas}
+    
+    def increment(self, **deltas):
+        """Atomically add deltas to the counts, e.g. increment(chats=1)"""
+        return self.collection.update_one(*self.increment_update(**deltas), upsert=True)
+    
+    def get(self):
+        """Get the counts document, or None before the first reconcile"""
+        return self.collection.find_one({"_id": self.STATS_ID})
+    
+    def reconcile(self):
+        """Recount the collections and overwrite the stored counts
+        
+        Increments landing between the count and the write are lost until
+        the next run; the drift this corrects is far larger.
+        
+        Returns:
+            dict: The counts written
+        """
+        counts = {
+            "users": db_instance.get_collection("users").count_documents({}),
+            "chats": db_instance.get_collection("chat_history").count_documents({}),
+            "unanswered_queries": db_instance.get_collection("queries").count_documents({"answered": False})
+        }
+        stored = self.get() or {}
+        drift = {field: counts[field] - stored.get(field, 0) for field in self.FIELDS if stored.get(field, 0) != counts[field]}
+        self.collection.update_one(
+            {"_id": self.STATS_ID},
+            {"$set": dict(counts, reconciled_at=datetime.datetime.utcnow())},
+            upsert=True
+        )
+        if drift:
+            print(f"Reconciled dashboard counters, drift: {drift}")
+        return counts
+
+
+class AsyncQuery:
+    """Query operations on the asyncio (motor) client, for the ASGI query path"""
+    
+    def __init__(self):
+        self.collection = async_db_instance.get_collection("queries")
+    
+    async def create_query(self, question, user_id=None, answered=False):
+        """Create a new query"""
+        result = await self.collection.insert_one(Query.new_query(question, user_id, answered))
+        if not answered:
+            await async_db_instance.get_collection(Counter.COLLECTION).update_one(
+                *Counter.increment_update(unanswered_queries=1), upsert=True
+            )
+        return result.inserted_id
+
+
+class AsyncChatHistory:
+    """Chat history operations on the asyncio (motor) client, for the ASGI query path"""
+    
+    def __init__(self):
+        self.collection = async_db_instance.get_collection("chat_history")
+        self.users = async_db_instance.get_collection("users")
+    
+    async def create_chat(self, user_id, question, answer, username=None):
+        """Create a new chat entry; see ChatHistory.create_chat"""
+        if username is None:
+            user = await self.users.find_one({"_id": ObjectId(user_id)}, {"username": 1})
+            username = user.get("username") if user else None
+        result = await self.collection.insert_one(ChatHistory.new_chat(user_id, question, answer, username))
+        await async_db_instance.get_collection(Counter.COLLECTION).update_one(
+            *Counter.increment_update(chats=1), upsert=True
+        )
+        return result.inserted_id
+    
+    async def get_user_history_page(self, user_id, limit, cursor=None, start=None, end=None):
+        """One page of a user's chat history, newest first"""
+        results = self.collection.find(
+            ChatHistory.page_query(user_id, cursor, start, end),
+            ChatHistory.HISTORY_PROJECTION
+        ).sort(KEYSET_SORT).limit(limit + 1)
+        return page_result(await results.to_list(length=limit + 1), limit)
+    
+    async def count_history(self, user_id=None, start=None, end=None):
+        """Number of entries matching the filters; see ChatHistory.count_history"""
+        query = ChatHistory.page_query(user_id, start=start, end=end)
+        if not query:
+            return await self.collection.estimated_document_count(), True
+        count = await self.collection.count_documents(query, limit=Config.HISTORY_COUNT_LIMIT)
+        return count, count >= Config.HISTORY_COUNT_LIMIT
+
+
+class AnalyticsRollup:
+    """Daily query analytics aggregates and the watermark of the job that builds them"""
+    
+    WATERMARK_ID = "query_analytics"
+    
+    def __init__(self):
+        self.collection = db_instance.get_collection("analytics_rollups")
+        self.watermarks = db_instance.get_collection("analytics_watermarks")
+    
+    def get_watermark(self):
+        """(timestamp, _id) of the last chat entry rolled up, or None"""
+        state = self.watermarks.find_one({"_id": self.WATERMARK_ID})
+        return (state["timestamp"], state["last_id"]) if state else None
+    
+    def set_watermark(self, timestamp, last_id):
+        """Record the last chat entry rolled up"""
+        return self.watermarks.update_one(
+            {"_id": self.WATERMARK_ID},
+            {"$set": {"timestamp": timestamp, "last_id": last_id, "updated_at": datetime.datetime.utcnow()}},
+            upsert=True
+        )
+    
+    def save_day(self, day, count, sentiment_sum, top_terms):
+        """Replace the rollup of one day (a datetime.date)"""
+        return self.collection.replace_one(
+            {"_id": day.isoformat()},
             {
-                "$unwind": "$user"
+                "count": count,
+                "sentiment_sum": sentiment_sum,
+                "top_terms": top_terms,
+                "updated_at": datetime.datetime.utcnow()
             },
+            upsert=True
+        )
+    
+    def get_range(self, start=None, end=None):
+        """Rollups of the days from start to end inclusive (datetime.date), oldest first"""
+        query = {}
+        if start or end:
+            query["_id"] = {}
+            if start:
+                query["_id"]["$gte"] = start.isoformat()
+            if end:
+                query["_id"]["$lte"] = end.isoformat()
+        return list(self.collection.find(query).sort("_id", 1))
+    
+    def reset(self):
+        """Forget the watermark and every rollup"""
+        self.watermarks.delete_one({"_id": self.WATERMARK_ID})
+        self.collection.delete_many({})
+
+
+class IndexingJob:
+    """Indexing job model for tracking background PDF indexing"""
+    
+    def __init__(self):
+        self.collection = db_instance.get_collection("indexing_jobs")
+    
+    def create_job(self, public_id, owner=None):
+        """Create a queued indexing job owned by the process that will run it"""
+        now = datetime.datetime.utcnow()
+        job_data = {
+            "public_id": public_id,
+            "status": "queued",
+            "owner": owner,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        result = self.collection.insert_one(job_data)
+        return result.inserted_id
+    
+    def claim(self, job_id, owner):
+        """Mark a queued job as indexing, unless another process took it over
+        
+        Returns:
+            bool: True when owner still holds the job
+        """
+        result = self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": "queued", "owner": owner},
+            {"$set": {"status": "indexing", "updated_at": datetime.datetime.utcnow()}}
+        )
+        return result.modified_count == 1
+    
+    def take_over_stale(self, owner, stale_after):
+        """Atomically take over one job not updated for stale_after seconds
+        
+        Such jobs were queued or running in a process that has since
+        exited, so nothing will finish them.
+        
+        Returns:
+            dict: The job after the take-over, or None when none is stale
+        """
+        from pymongo import ReturnDocument
+        now = datetime.datetime.utcnow()
+        return self.collection.find_one_and_update(
             {
-                "$project": {
-                    "question": 1,
-                    "answer": 1,
-                    "timestamp": 1,
-                    "username": "$user.username"
-                }
+                "status": {"$in": ["queued", "indexing"]},
+                "updated_at": {"$lt": now - datetime.timedelta(seconds=stale_after)}
             },
+            {"$set": {"status": "queued", "owner": owner, "updated_at": now}, "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    def update_status(self, job_id, status, **fields):
+        """Update job status and any extra fields"""
+        fields.update({"status": status, "updated_at": datetime.datetime.utcnow()})
+        return self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+    
+    def find_by_id(self, job_id):
+        """Find job by ID"""
+        return self.collection.find_one({"_id": ObjectId(job_id)})
+
+
+class VectorNamespace:
+    """Pointer to the Pinecone namespace that serves queries"""
+    
+    POINTER_ID = "active"
+    
+    def __init__(self):
+        self.collection = db_instance.get_collection("vector_namespaces")
+    
+    def get_pointer(self):
+        """Get the pointer document, or None before the first switch"""
+        return self.collection.find_one({"_id": self.POINTER_ID})
+    
+    def set_building(self, namespace, stale_after=3600):
+        """Record the namespace a rebuild is writing to
+        
+        Returns:
+            bool: False when another rebuild started less than stale_after seconds ago
+        """
+        from pymongo.errors import DuplicateKeyError
+        now = datetime.datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {
+                    "_id": self.POINTER_ID,
+                    "$or": [
+                        {"building": {"$exists": False}},
+                        {"building_started_at": {"$lt": now - datetime.timedelta(seconds=stale_after)}}
+                    ]
+                },
+                {"$set": {"building": namespace, "building_started_at": now}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The pointer exists and names a rebuild that is still running
+            return False
+    
+    def clear_building(self, namespace):
+        """Forget the building namespace if it is still the given one"""
+        return self.collection.update_one(
+            {"_id": self.POINTER_ID, "building": namespace},
+            {"$unset": {"building": "", "building_started_at": ""}}
+        )
+    
+    def switch(self, namespace, vector_count):
+        """Atomically make namespace the active one
+        
+        Returns:
+            dict: The pointer document before the switch
+        """
+        from pymongo import ReturnDocument
+        previous = self.collection.find_one_and_update(
+            {"_id": self.POINTER_ID},
             {
-                "$sort": {"timestamp": -1}
-            }
-        ]
-        return list(self.collection.aggregate(pipeline))
+                "$set": {
+                    "namespace": namespace,
+                    "vector_count": vector_count,
+                    "switched_at": datetime.datetime.utcnow()
+                },
+                "$unset": {"building": "", "building_started_at": ""}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return previous or {}
+
+
+class JobLease:
+    """Time-limited lease so only one worker runs a periodic job per interval"""
     
-    def get_total_chats(self):
-        """Get total number of chats"""
-        return self.collection.count_documents({})
+    def __init__(self):
+        self.collection = db_instance.get_collection("job_leases")
     
-    def get_all_questions_with_timestamps(self):
-        """Get all questions with timestamps for analytics"""
-        return list(self.collection.find({}, {"question": 1, "timestamp": 1}))
+    def acquire(self, name, owner, ttl):
+        """Take or renew the lease on a job
+        
+        Returns:
+            bool: False while another owner holds an unexpired lease
+        """
+        from pymongo.errors import DuplicateKeyError
+        now = datetime.datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {"_id": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "acquired_at": now, "expires_at": now + datetime.timedelta(seconds=ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The lease document exists and belongs to someone else
+            return False
+    
+    def release(self, name, owner):
+        """Give up a lease early so the next owner does not wait for it to expire"""
+        self.collection.delete_one({"_id": name, "owner": owner})
+
+
+class CacheVersion:
+    """Version stamps that tell workers their in-process cache of shared data is stale"""
+    
+    def __init__(self):
+        self.collection = db_instance.get_collection("cache_versions")
+    
+    def get(self, name):
+        """Current version of a cache, 0 before the first bump"""
+        doc = self.collection.find_one({"_id": name}, {"version": 1})
+        return doc.get("version", 0) if doc else 0
+    
+    def bump(self, name):
+        """Invalidate a cache in every worker
+        
+        Returns:
+            int: The new version
+        """
+        from pymongo import ReturnDocument
+        doc = self.collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
 
 
 class PDF:
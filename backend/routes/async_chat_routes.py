@@ -0,0 +1,11 @@
+from starlette.routing import Route
+from controllers.async_chat_controller import AsyncChatController
+
+def create_async_chat_routes(vectorstore):
+    """Create the chat routes served natively by the ASGI app (asgi.py)"""
+    chat_controller = AsyncChatController(vectorstore)
+
+    return [
+        Route('/api/query', chat_controller.query, methods=['POST']),
+        Route('/api/chat-history', chat_controller.get_chat_history, methods=['GET']),
+    ]
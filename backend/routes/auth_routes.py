@@ -1,5 +1,6 @@
 from flask import Blueprint
 from controllers.auth_controller import AuthController
+from utils.auth import token_required
 
 def create_auth_routes(app):
     """Create authentication routes"""
@@ -9,6 +10,7 @@ def create_auth_routes(app):
     # User authentication routes
     auth_bp.add_url_rule('/signup', 'signup', auth_controller.signup, methods=['POST'])
     auth_bp.add_url_rule('/login', 'login', auth_controller.login, methods=['POST'])
+    auth_bp.add_url_rule('/username', 'change_username', token_required(auth_controller.change_username), methods=['PUT'])
     
     # Admin authentication routes
     auth_bp.add_url_rule('/admin/login', 'admin_login', auth_controller.admin_login, methods=['POST'])
@@ -19,6 +19,24 @@ def create_pdf_routes():
         """Upload a PDF file to Cloudinary"""
         return pdf_controller.upload_pdf()
     
+    @pdf_bp.route('/upload-batch', methods=['POST'])
+    @admin_required
+    def upload_pdfs():
+        """Upload several PDF files to Cloudinary in parallel"""
+        return pdf_controller.upload_pdfs()
+    
+    @pdf_bp.route('/indexing/<job_id>', methods=['GET'])
+    @admin_required
+    def get_indexing_status(job_id):
+        """Get the status of a background indexing job"""
+        return pdf_controller.get_indexing_status(job_id)
+    
+    @pdf_bp.route('/preview/<path:public_id>', methods=['GET'])
+    @admin_required
+    def preview_pdf(public_id):
+        """Serve a PDF for preview from the local cache"""
+        return pdf_controller.preview_pdf(public_id)
+    
     @pdf_bp.route('/<path:public_id>', methods=['DELETE'])
     @admin_required
     def delete_pdf(public_id):
@@ -31,4 +49,10 @@ def create_pdf_routes():
         """Rebuild embeddings from PDFs stored in Cloudinary"""
         return pdf_controller.rebuild_embeddings()
     
+    @pdf_bp.route('/sweep-orphans', methods=['POST'])
+    @admin_required
+    def sweep_orphan_vectors():
+        """Delete vectors whose PDF no longer exists in Cloudinary"""
+        return pdf_controller.sweep_orphan_vectors()
+    
     return pdf_bp
@@ -1,5 +1,7 @@
-from models.models import User, Query, ChatHistory
-from utils.helpers import analyze_sentiment_and_topics, format_response_data
+from config.config import Config
+from models.models import User, Query, ChatHistory, Counter, AnalyticsRollup
+from utils.analytics import combine_rollups
+from utils.helpers import format_response_data
 
 class AdminService:
     """Service for handling admin operations"""
@@ -8,43 +10,65 @@ class AdminService:
         self.user_model = User()
         self.query_model = Query()
         self.chat_history_model = ChatHistory()
+        self.counter_model = Counter()
+        self.rollup_model = AnalyticsRollup()
         self.email_service = email_service
     
     def get_dashboard_stats(self):
-        """Get dashboard statistics"""
+        """Get dashboard statistics
+        
+        Reads the materialized counters in one lookup. Until they are first
+        reconciled, the totals come from collection metadata or, with
+        DASHBOARD_STATS_FALLBACK=exact, from full counts.
+        """
         try:
+            counts = self.counter_model.get()
+            if counts:
+                return {
+                    "total_users": counts.get("users", 0),
+                    "total_chats": counts.get("chats", 0),
+                    "unanswered_queries": counts.get("unanswered_queries", 0),
+                    "source": "counters"
+                }, 200
             
+            estimated = Config.DASHBOARD_STATS_FALLBACK != "exact"
             stats = {
-                "total_users": self.user_model.get_total_users(),
-                "total_chats": self.chat_history_model.get_total_chats(),
-                "unanswered_queries": self.query_model.get_unanswered_count()
+                "total_users": self.user_model.get_total_users(estimated=estimated),
+                "total_chats": self.chat_history_model.get_total_chats(estimated=estimated),
+                "unanswered_queries": self.query_model.get_unanswered_count(),
+                "source": "estimated" if estimated else "exact"
             }
             return stats, 200
         except Exception as e:
             return {"error": f"Failed to fetch stats: {str(e)}"}, 500
     
-    def get_unanswered_queries(self):
-        """Get all unanswered queries"""
+    def get_unanswered_queries(self, limit, cursor=None, start=None, end=None, sort="recent", offset=0):
+        """Get a page of unanswered queries
+        
+        sort="recent" pages queries newest first with a cursor; sort="frequent"
+        groups identical questions, most asked first, and pages by offset.
+        """
         try:
-            # print("=== ADMIN SERVICE: get_unanswered_queries called ===")
-            unanswered = self.query_model.get_unanswered_queries()
-            # print(f"=== ADMIN SERVICE: Found {len(unanswered)} unanswered queries ===")
+            if sort == "frequent":
+                groups, total = self.query_model.get_unanswered_groups(limit, offset=offset, start=start, end=end)
+                for group in groups:
+                    group["query_ids"] = [str(query_id) for query_id in group["query_ids"]]
+                return {
+                    "queries": format_response_data(groups),
+                    "sort": sort,
+                    "next_offset": offset + limit if offset + limit < total else None,
+                    "total": total
+                }, 200
             
-            # Debug: Check if there are any queries at all
-            total_queries = list(self.query_model.collection.find({}))
-            # print(f"=== ADMIN SERVICE: Total queries in DB: {len(total_queries)} ===")
-            
-            # if len(total_queries) > 0:
-            #     print(f"=== ADMIN SERVICE: Sample query: {total_queries[0]} ===")
-            
-            formatted_queries = format_response_data(unanswered)
-            result = {"queries": formatted_queries}
-            # print(f"=== ADMIN SERVICE: Returning result: {result} ===")
-            return result, 200
+            queries, next_cursor = self.query_model.get_unanswered_page(limit, cursor=cursor, start=start, end=end)
+            return {
+                "queries": format_response_data(queries),
+                "sort": sort,
+                "next_cursor": next_cursor,
+                "total": self.query_model.get_unanswered_count(start=start, end=end)
+            }, 200
         except Exception as e:
-            print(f"=== ADMIN SERVICE ERROR: {str(e)} ===")
-            import traceback
-            traceback.print_exc()
+            print(f"Error fetching unanswered queries: {str(e)}")
             return {"error": f"Failed to fetch queries: {str(e)}"}, 500
     
     def delete_query(self, query_id):
@@ -57,23 +81,39 @@ class AdminService:
         except Exception as e:
             return {"error": f"Failed to delete query: {str(e)}"}, 500
     
-    def get_all_chat_history(self):
-        """Get all chat history with user details"""
+    def get_all_chat_history(self, limit, cursor=None, start=None, end=None, username=None):
+        """Get one page of chat history with user details, optionally for one user"""
         try:
-            history = self.chat_history_model.get_all_history_with_users()
+            user_id = None
+            if username:
+                user = self.user_model.find_by_username(username)
+                if not user:
+                    return {"history": [], "next_cursor": None, "total": 0, "total_is_estimate": False}, 200
+                user_id = user["_id"]
+            
+            history, next_cursor = self.chat_history_model.get_history_page(
+                limit, cursor=cursor, user_id=user_id, start=start, end=end
+            )
+            total, total_is_estimate = self.chat_history_model.count_history(user_id, start=start, end=end)
             formatted_history = format_response_data(history)
-            return {"history": formatted_history}, 200
+            return {
+                "history": formatted_history,
+                "next_cursor": next_cursor,
+                "total": total,
+                "total_is_estimate": total_is_estimate
+            }, 200
         except Exception as e:
             return {"error": f"Failed to fetch chat history: {str(e)}"}, 500
     
-    def get_query_analytics(self):
-        """Get query analytics including sentiment and trending topics"""
+    def get_query_analytics(self, start=None, end=None):
+        """Get query analytics including sentiment and trending topics
+        
+        Reads the daily rollups from start to end (datetime.date, inclusive);
+        the rollup job (utils.analytics) keeps them current.
+        """
         try:
-            # Get all questions with timestamps for analytics
-            queries = self.chat_history_model.get_all_questions_with_timestamps()
-            
-            # Analyze sentiment and topics
-            sentiment_analytics, trending_topics = analyze_sentiment_and_topics(queries)
+            rollups = self.rollup_model.get_range(start, end)
+            sentiment_analytics, trending_topics = combine_rollups(rollups)
             
             return {
                 "sentiment_analytics": sentiment_analytics,
@@ -94,13 +134,12 @@ class AdminService:
             # Update database
             result = self.query_model.update_query(query_id, response)
             
-            # Append to Cloudinary PDF (without creating embeddings automatically)
+            # Append to Cloudinary PDF (re-indexes only that PDF's vectors)
             from utils.pdf_utils import append_to_pdf
             success = append_to_pdf(query_doc["question"], response)
             
             if success:
                 print(f"Added Q&A to Cloudinary PDF: {query_doc['question']} -> {response}")
-                print(f"Note: Embeddings are not created automatically. Use 'Rebuild Embeddings' in admin dashboard.")
             else:
                 print(f"Failed to add Q&A to Cloudinary PDF")
                 # Return successful anyway since the database was updated
@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+from models.models import AsyncQuery, AsyncChatHistory
+from services.chat_service import ChatService, retry_with_exponential_backoff, sessions
+
+# Writes that are not awaited by the request; kept referenced until done so
+# they are not garbage collected mid-flight, and drained on shutdown
+_background_writes = set()
+
+def fire_and_forget(coro, description):
+    """Run a coroutine without awaiting it, logging a failure instead of raising it"""
+    task = asyncio.create_task(coro)
+    _background_writes.add(task)
+
+    def done(task):
+        _background_writes.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"Error in background write ({description}): {str(task.exception())}")
+
+    task.add_done_callback(done)
+    return task
+
+async def drain_background_writes(timeout=10):
+    """Wait for pending background writes, e.g. before the server shuts down"""
+    if _background_writes:
+        await asyncio.wait(list(_background_writes), timeout=timeout)
+
+class AsyncChatService(ChatService):
+    """ChatService for the event loop (asgi.py)
+
+    The conversation chain is awaited, so the Groq and Pinecone calls of one
+    student no longer occupy a worker thread, and hybrid retrieval runs its
+    dense and keyword searches concurrently. MongoDB writes go through motor
+    and are not awaited by the request. Sessions, prompts and responses are
+    shared with the sync service.
+    """
+
+    def __init__(self, vectorstore):
+        super().__init__(vectorstore)
+        self.query_model = AsyncQuery()
+        self.chat_history_model = AsyncChatHistory()
+
+    async def process_query(self, question, session_id, user_id=None, username=None):
+        """Process a user query and return response
+
+        Turns of the same session run one at a time; other sessions proceed
+        concurrently.
+        """
+        # Cleanup expired sessions
+        self.cleanup_expired_sessions()
+
+        # Generate session ID if not provided
+        if not session_id:
+            session_id = str(datetime.datetime.now().timestamp())
+
+        async with sessions.ahold(session_id):
+            return await self._aprocess_query(question, session_id, user_id, username)
+
+    async def _aprocess_query(self, question, session_id, user_id, username=None):
+        try:
+            self._log_question(question, session_id)
+
+            # Check if it's general chat
+            general_response = self._general_chat_response(question, session_id)
+            if general_response:
+                return general_response
+
+            # The vector store is still warming up after a cold start
+            if self.vectorstore is None:
+                return self._not_ready_response(session_id)
+
+            # Building the chain can block: it may load the keyword index JSON from disk,
+            # import and construct the chat model, or refresh the namespace pointer
+            chat_chain = await asyncio.to_thread(self.get_conversation_chain, session_id)
+
+            @retry_with_exponential_backoff(max_retries=3, base_delay=2)
+            async def call_ai_chain():
+                return await chat_chain.ainvoke({"question": question})
+
+            try:
+                result = await call_ai_chain()
+                answer = result["answer"].strip()
+
+            except TimeoutError:
+                print("AI processing timed out")
+                return self._timeout_response(session_id)
+            except Exception as ai_error:
+                error_response = self._ai_error_response(ai_error, session_id)
+                if error_response:
+                    return error_response
+                raise ai_error
+
+            return self._answer_response(question, answer, session_id, user_id, username)
+
+        except Exception as e:
+            return self._error_response(e, session_id)
+
+    def _store_unanswered_query(self, question, user_id):
+        fire_and_forget(self.query_model.create_query(question, user_id, answered=False), "unanswered query")
+
+    def _store_chat(self, user_id, question, answer, username=None):
+        fire_and_forget(self.chat_history_model.create_chat(user_id, question, answer, username=username), "chat history")
@@ -1,5 +1,6 @@
 from flask_bcrypt import Bcrypt
-from models.models import User
+from pymongo.errors import DuplicateKeyError
+from models.models import User, ChatHistory
 from utils.auth import generate_user_token
 from config.config import Config
 
@@ -9,6 +10,7 @@ class AuthService:
     def __init__(self, app):
         self.bcrypt = Bcrypt(app)
         self.user_model = User()
+        self.chat_history_model = ChatHistory()
     
     def register_user(self, username, email, password):
         """Register a new user"""
@@ -16,12 +18,17 @@ class AuthService:
             # Check if user already exists
             if self.user_model.find_by_email(email):
                 return {"error": "User already exists"}, 409
+            if self.user_model.find_by_username(username):
+                return {"error": "Username already taken"}, 409
             
             # Hash password
             hashed_password = self.bcrypt.generate_password_hash(password).decode("utf-8")
             
-            # Create user
-            user_id = self.user_model.create_user(username, email, hashed_password)
+            # Create user; the unique indexes catch a concurrent signup with the same details
+            try:
+                user_id = self.user_model.create_user(username, email, hashed_password)
+            except DuplicateKeyError:
+                return {"error": "User already exists"}, 409
 
             # Send email notification if user exists
             if user_id:
@@ -41,13 +48,45 @@ class AuthService:
         except Exception as e:
             return {"error": f"Registration failed: {str(e)}"}, 500
     
+    def change_username(self, user_id, username):
+        """Rename a user and update the username stored on their chat history"""
+        try:
+            existing = self.user_model.find_by_username(username)
+            if existing:
+                if str(existing["_id"]) == str(user_id):
+                    return {"message": "Username unchanged", "username": username}, 200
+                return {"error": "Username already taken"}, 409
+            
+            try:
+                result = self.user_model.update_username(user_id, username)
+            except DuplicateKeyError:
+                return {"error": "Username already taken"}, 409
+            if result.matched_count == 0:
+                return {"error": "User not found"}, 404
+            
+            # Chat entries carry a copy of the username for the admin listing.
+            # Entries written with the old name after this (an old token, or a
+            # chat that looked the name up just before the rename) are repaired
+            # by the username reconcile job.
+            updated = self.chat_history_model.set_username(user_id, username)
+            return {
+                "message": "Username updated",
+                "username": username,
+                "chats_updated": updated,
+                # Carries the new name; the old token keeps working until it expires
+                "token": generate_user_token(user_id, username)
+            }, 200
+            
+        except Exception as e:
+            return {"error": f"Failed to change username: {str(e)}"}, 500
+    
     def login_user(self, username, password):
         """Authenticate user login"""
         try:
             user = self.user_model.find_by_username(username)
             
             if user and self.bcrypt.check_password_hash(user["password"], password):
-                token = generate_user_token(user["_id"])
+                token = generate_user_token(user["_id"], user.get("username"))
                 return {"token": token, "user_id": str(user["_id"])}, 200
             
             return {"error": "Invalid credentials"}, 401
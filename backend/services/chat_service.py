@@ -1,15 +1,14 @@
+import asyncio
 import datetime
 import signal
 import time
-from langchain_classic.chains import ConversationalRetrievalChain
-from langchain_groq import ChatGroq
-from langchain_community.chat_models import ChatHuggingFace
-from langchain_classic.memory import ConversationBufferMemory
-from langchain_core.prompts.chat import ChatPromptTemplate
 from config.config import Config
 from models.models import Query, ChatHistory
 from utils.helpers import is_general_chat
-from utils.pdf_utils import update_vectorstore
+from utils.keyword_index import get_keyword_index
+from utils.llm import build_conversation_chain, get_chat_model, new_conversation_memory
+from utils.sessions import SessionStore
+from utils.vector_namespaces import get_active_namespace
 import re
 import warnings
 import random
@@ -18,32 +17,59 @@ from functools import wraps
 # Suppress LangChain deprecation warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="langchain")
 
+def _retry_delay(error, attempt, max_retries, base_delay):
+    """Backoff delay before the next attempt, or None when the error should be raised"""
+    error_str = str(error).lower()
+    # Check if it's a retryable error
+    if any(keyword in error_str for keyword in ['timeout', '504', '503', '502', 'deadline', 'rate limit']):
+        if attempt < max_retries - 1:
+            # Exponential backoff with jitter
+            return base_delay * (2 ** attempt) + random.uniform(0, 1)
+    return None
+
 def retry_with_exponential_backoff(max_retries=3, base_delay=1):
-    """Decorator for retrying function calls with exponential backoff"""
+    """Decorator for retrying function calls with exponential backoff
+
+    Coroutine functions are retried with asyncio.sleep, so waiting does not
+    block the event loop.
+    """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_retries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        delay = _retry_delay(e, attempt, max_retries, base_delay)
+                        if delay is None:
+                            raise e
+                        print(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
+                        await asyncio.sleep(delay)
+                return await func(*args, **kwargs)
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    error_str = str(e).lower()
-                    # Check if it's a retryable error
-                    if any(keyword in error_str for keyword in ['timeout', '504', '503', '502', 'deadline', 'rate limit']):
-                        if attempt < max_retries - 1:
-                            # Exponential backoff with jitter
-                            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                            print(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
-                            time.sleep(delay)
-                            continue
-                    raise e
+                    delay = _retry_delay(e, attempt, max_retries, base_delay)
+                    if delay is None:
+                        raise e
+                    print(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
+                    time.sleep(delay)
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
-# Global variables for session management
-conversation_memories = {}  # Store conversation memories by session
-session_timestamps = {}    # Track last activity time for each session
+# Conversation memories by session, shared by every request thread
+sessions = SessionStore(
+    new_conversation_memory,
+    timeout=Config.SESSION_TIMEOUT,
+    cleanup_interval=Config.SESSION_CLEANUP_INTERVAL
+)
 
 # Template for AI responses
 template = """
@@ -67,22 +93,44 @@ class ChatService:
     """Service for handling chat operations"""
     
     def __init__(self, vectorstore):
-        self.vectorstore = vectorstore
+        """
+        Args:
+            vectorstore: Vector store, or a callable returning it (None while it is still loading)
+        """
+        self._vectorstore_provider = vectorstore if callable(vectorstore) else (lambda: vectorstore)
         self.query_model = Query()
         self.chat_history_model = ChatHistory()
     
     def _get_llm(self):
         """Get LLM instance based on configured provider"""
-        if not Config.GROQ_API_KEY:
-            raise ValueError("No AI provider configured. Please set GROQ_API_KEY.")
-        print(f"Using Groq AI with model: {Config.GROQ_MODEL}")
-        return ChatGroq(
-            groq_api_key=Config.GROQ_API_KEY,
-            model_name=Config.GROQ_MODEL,
-            temperature=0.3,
-            max_tokens=2048,
-            timeout=Config.GROQ_TIMEOUT,
-            max_retries=3
+        return get_chat_model()
+    
+    @property
+    def vectorstore(self):
+        return self._vectorstore_provider()
+    
+    def _get_retriever(self):
+        """Get the retriever used by the conversation chain
+        
+        The active namespace is resolved on every call, so a rebuild that
+        switches namespaces takes effect without restarting the service.
+        """
+        vectorstore = self.vectorstore
+        namespace = get_active_namespace()
+        if Config.HYBRID_RETRIEVAL:
+            # Fuse dense results with BM25 keyword matches for codes and form names
+            from utils.hybrid_retriever import HybridRetriever
+            return HybridRetriever(
+                vectorstore=vectorstore,
+                keyword_index=get_keyword_index(namespace),
+                namespace=namespace,
+                k=Config.RETRIEVAL_K,
+                fetch_k=Config.RETRIEVAL_FETCH_K,
+                rrf_k=Config.RRF_K
+            )
+        return vectorstore.as_retriever(
+            search_type="similarity",
+            search_kwargs={"k": Config.RETRIEVAL_K, "namespace": namespace}
         )
     
     def format_response(self, text):
@@ -160,92 +208,59 @@ class ChatService:
 
     def cleanup_expired_sessions(self):
         """Clean up expired sessions if needed"""
-        current_time = time.time()
-        expired_sessions = [
-            sid for sid, last_active in session_timestamps.items()
-            if current_time - last_active > Config.SESSION_TIMEOUT
-        ]
-        
-        for sid in expired_sessions:
-            if sid in conversation_memories:
-                del conversation_memories[sid]
-            if sid in session_timestamps:
-                del session_timestamps[sid]
-        
-        if expired_sessions:
-            print(f"Cleaned up {len(expired_sessions)} expired sessions")
+        removed = sessions.cleanup_expired()
+        if removed:
+            print(f"Cleaned up {removed} expired sessions")
     
     def update_session_timestamp(self, session_id):
         """Update last activity time for a session"""
-        session_timestamps[session_id] = time.time()
+        sessions.touch(session_id)
     
     def get_conversation_chain(self, session_id):
-        """Create or retrieve a conversation chain for a session"""
-        self.update_session_timestamp(session_id)
+        """Create a conversation chain over the session's memory
         
-        if session_id not in conversation_memories:
-            # Suppress the deprecation warning for memory
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                memory = ConversationBufferMemory(
-                    memory_key='chat_history',
-                    return_messages=True
-                )
-            conversation_memories[session_id] = memory
-        else:
-            memory = conversation_memories[session_id]
+        Callers must hold the session (sessions.hold) while the chain runs.
+        """
+        memory = sessions.get_memory(session_id, create=True)
 
         # Initialize LLM based on configured provider
         llm = self._get_llm()
 
         # Configure the retriever with optimized search parameters
-        retriever = self.vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 10}  # Reduced from 15 to 10 for faster processing
-        )
+        retriever = self._get_retriever()
 
-        conversation_chain = ConversationalRetrievalChain.from_llm(
-            llm=llm,
-            retriever=retriever,
-            memory=memory,
-            combine_docs_chain_kwargs={"prompt": ChatPromptTemplate.from_template(template)}
-        )
-        return conversation_chain
+        return build_conversation_chain(llm, retriever, memory, template)
     
-    def process_query(self, question, session_id, user_id=None):
-        """Process a user query and return response"""
+    def process_query(self, question, session_id, user_id=None, username=None):
+        """Process a user query and return response
+        
+        Turns of the same session run one at a time; other sessions proceed
+        concurrently. username, when the token carries it, is stored on the
+        chat entry without looking the user up.
+        """
+        # Cleanup expired sessions
+        self.cleanup_expired_sessions()
+        
+        # Generate session ID if not provided
+        if not session_id:
+            session_id = str(datetime.datetime.now().timestamp())
+        
+        with sessions.hold(session_id):
+            return self._process_query(question, session_id, user_id, username)
+    
+    def _process_query(self, question, session_id, user_id, username=None):
         try:
-            # Cleanup expired sessions
-            self.cleanup_expired_sessions()
-            
-            # Generate session ID if not provided
-            if not session_id:
-                session_id = str(datetime.datetime.now().timestamp())
-            
-            print("\n" + "="*50)
-            print(f"Session: {session_id}")
-            print("Question received:", question)
-            print("="*50)
+            self._log_question(question, session_id)
 
             # Check if it's general chat
-            general_response = is_general_chat(question)
+            general_response = self._general_chat_response(question, session_id)
             if general_response:
-                # Get chat history for this session
-                memory = conversation_memories.get(session_id)
-                chat_history = []
-                if memory:
-                    memory.chat_memory.add_user_message(question)
-                    memory.chat_memory.add_ai_message(general_response)
-                    chat_history = [str(msg) for msg in memory.chat_memory.messages]
-                
-                return {
-                    "answer": self.format_response(general_response),
-                    "raw_answer": general_response,
-                    "chat_history": chat_history,
-                    "status": "answered",
-                    "session_id": session_id
-                }, 200
+                return general_response
 
+            # The vector store is still warming up after a cold start
+            if self.vectorstore is None:
+                return self._not_ready_response(session_id)
+            
             # Get conversation chain for this session
             chat_chain = self.get_conversation_chain(session_id)
             
@@ -265,104 +280,159 @@ class ChatService:
                 
             except TimeoutError:
                 print("AI processing timed out")
-                return {
-                    "error": "The AI service is taking longer than expected. Please try again with a shorter question.",
-                    "user_friendly_error": True,
-                    "session_id": session_id
-                }, 408  # Request Timeout
+                return self._timeout_response(session_id)
             except Exception as ai_error:
-                print(f"AI processing error: {str(ai_error)}")
-                error_str = str(ai_error).lower()
-                
-                if "quota" in error_str or "rate limit" in error_str:
-                    return {
-                        "error": "AI service is currently at capacity. Please try again in a few moments.",
-                        "user_friendly_error": True,
-                        "session_id": session_id
-                    }, 429  # Too Many Requests
-                elif "504" in error_str or "deadline exceeded" in error_str or "timeout" in error_str:
-                    return {
-                        "error": "The AI service is taking longer than expected to process your query. Please try again with a simpler question or wait a moment and retry.",
-                        "user_friendly_error": True,
-                        "session_id": session_id
-                    }, 408  # Request Timeout
-                elif "embedding" in error_str:
-                    return {
-                        "error": "There was an issue processing your query for search. Please try rephrasing your question or try again later.",
-                        "user_friendly_error": True,
-                        "session_id": session_id
-                    }, 503  # Service Unavailable
+                error_response = self._ai_error_response(ai_error, session_id)
+                if error_response:
+                    return error_response
                 raise ai_error
             
-            print("\nGenerated answer:", answer)
-            print("="*50 + "\n")
+            return self._answer_response(question, answer, session_id, user_id, username)
             
-            # Check for various forms of "no answer" responses
-            no_answer_phrases = [
-                "i do not know",
-                "i don't know",
-                "cannot find",
-                "no information",
-                "insufficient information",
-                "the document does not contain",
-                "no relevant information",
-                "cannot answer",
-                "unable to answer"
-            ]
-            
-            if any(phrase in answer.lower() for phrase in no_answer_phrases):
-                print("No answer found - adding to unanswered queries")
-                
-                # Store unanswered query
-                self.query_model.create_query(question, user_id, answered=False)
-                
-                return {
-                    "answer": "I apologize, but I don't have enough information to answer this question accurately. Your query has been logged for manual review.",
-                    "status": "unanswered",
-                    "session_id": session_id
-                }, 404
-            
-            # Store chat history if user is logged in and query was answered
-            if user_id and "i do not know" not in answer.lower():
-                try:
-                    self.chat_history_model.create_chat(user_id, question, answer)
-                except Exception as e:
-                    print(f"Error storing chat history: {str(e)}")
-            
-            # Get chat history for this session
-            memory = conversation_memories.get(session_id)
-            chat_history = []
-            if memory:
-                chat_history = [str(msg) for msg in memory.chat_memory.messages]
+        except Exception as e:
+            return self._error_response(e, session_id)
+    
+    def _log_question(self, question, session_id):
+        print("\n" + "="*50)
+        print(f"Session: {session_id}")
+        print("Question received:", question)
+        print("="*50)
+    
+    def _general_chat_response(self, question, session_id):
+        """Canned reply for greetings and small talk, or None for a real question"""
+        general_response = is_general_chat(question)
+        if not general_response:
+            return None
+        
+        # Get chat history for this session
+        memory = sessions.get_memory(session_id)
+        chat_history = []
+        if memory:
+            memory.chat_memory.add_user_message(question)
+            memory.chat_memory.add_ai_message(general_response)
+            chat_history = sessions.messages(session_id)
+        
+        return {
+            "answer": self.format_response(general_response),
+            "raw_answer": general_response,
+            "chat_history": chat_history,
+            "status": "answered",
+            "session_id": session_id
+        }, 200
+    
+    def _not_ready_response(self, session_id):
+        return {
+            "error": "The assistant is still starting up. Please try again in a few moments.",
+            "user_friendly_error": True,
+            "session_id": session_id
+        }, 503  # Service Unavailable
+    
+    def _timeout_response(self, session_id):
+        return {
+            "error": "The AI service is taking longer than expected. Please try again with a shorter question.",
+            "user_friendly_error": True,
+            "session_id": session_id
+        }, 408  # Request Timeout
+    
+    def _ai_error_response(self, ai_error, session_id):
+        """User-facing response for a known AI service failure, or None to re-raise it"""
+        print(f"AI processing error: {str(ai_error)}")
+        error_str = str(ai_error).lower()
+        
+        if "quota" in error_str or "rate limit" in error_str:
+            return {
+                "error": "AI service is currently at capacity. Please try again in a few moments.",
+                "user_friendly_error": True,
+                "session_id": session_id
+            }, 429  # Too Many Requests
+        elif "504" in error_str or "deadline exceeded" in error_str or "timeout" in error_str:
+            return {
+                "error": "The AI service is taking longer than expected to process your query. Please try again with a simpler question or wait a moment and retry.",
+                "user_friendly_error": True,
+                "session_id": session_id
+            }, 408  # Request Timeout
+        elif "embedding" in error_str:
+            return {
+                "error": "There was an issue processing your query for search. Please try rephrasing your question or try again later.",
+                "user_friendly_error": True,
+                "session_id": session_id
+            }, 503  # Service Unavailable
+        return None
+    
+    def _answer_response(self, question, answer, session_id, user_id, username=None):
+        """Record the outcome of an answered chain call and build the response"""
+        print("\nGenerated answer:", answer)
+        print("="*50 + "\n")
+        
+        # Check for various forms of "no answer" responses
+        no_answer_phrases = [
+            "i do not know",
+            "i don't know",
+            "cannot find",
+            "no information",
+            "insufficient information",
+            "the document does not contain",
+            "no relevant information",
+            "cannot answer",
+            "unable to answer"
+        ]
+        
+        if any(phrase in answer.lower() for phrase in no_answer_phrases):
+            print("No answer found - adding to unanswered queries")
             
-            # Format the response
-            formatted_answer = self.format_response(answer)
+            # Store unanswered query
+            self._store_unanswered_query(question, user_id)
             
             return {
-                "answer": formatted_answer,
-                "raw_answer": answer,
-                "chat_history": chat_history,
-                "status": "answered",
+                "answer": "I apologize, but I don't have enough information to answer this question accurately. Your query has been logged for manual review.",
+                "status": "unanswered",
                 "session_id": session_id
-            }, 200
-            
+            }, 404
+        
+        # Store chat history if user is logged in and query was answered
+        if user_id and "i do not know" not in answer.lower():
+            self._store_chat(user_id, question, answer, username)
+        
+        # Get chat history for this session
+        chat_history = sessions.messages(session_id)
+        
+        # Format the response
+        formatted_answer = self.format_response(answer)
+        
+        return {
+            "answer": formatted_answer,
+            "raw_answer": answer,
+            "chat_history": chat_history,
+            "status": "answered",
+            "session_id": session_id
+        }, 200
+    
+    def _store_unanswered_query(self, question, user_id):
+        self.query_model.create_query(question, user_id, answered=False)
+    
+    def _store_chat(self, user_id, question, answer, username=None):
+        try:
+            self.chat_history_model.create_chat(user_id, question, answer, username=username)
         except Exception as e:
-            error_msg = f"Error processing query: {str(e)}"
-            print("\nError:", error_msg)
-            print("="*50 + "\n")
-            
-            # Check if this is a timeout error from the embedding service
-            if "504 Deadline Exceeded" in str(e) or "Error embedding content" in str(e):
-                return {
-                    "error": "The AI service is currently experiencing high demand. Please try again in a few moments.",
-                    "user_friendly_error": True,
-                    "session_id": session_id
-                }, 503  # Service Unavailable
-            
+            print(f"Error storing chat history: {str(e)}")
+    
+    def _error_response(self, e, session_id):
+        error_msg = f"Error processing query: {str(e)}"
+        print("\nError:", error_msg)
+        print("="*50 + "\n")
+        
+        # Check if this is a timeout error from the embedding service
+        if "504 Deadline Exceeded" in str(e) or "Error embedding content" in str(e):
             return {
-                "error": error_msg,
+                "error": "The AI service is currently experiencing high demand. Please try again in a few moments.",
+                "user_friendly_error": True,
                 "session_id": session_id
-            }, 500
+            }, 503  # Service Unavailable
+        
+        return {
+            "error": error_msg,
+            "session_id": session_id
+        }, 500
     
     def add_response_to_query(self, query_id, response):
         """Add admin response to unanswered query"""
@@ -379,14 +449,7 @@ class ChatService:
             from utils.pdf_utils import append_to_pdf
             success = append_to_pdf(query_doc["question"], response)
             
-            # Intentionally skip vectorstore update after admin answers
-            # The vectorstore should be updated only manually through the admin dashboard
-            # if success:
-            #     try:
-            #         # Call update_vectorstore with correct parameters - question and answer only
-            #         update_vectorstore(question=query_doc["question"], answer=response)
-            #     except Exception as e:
-            #         print(f"Error updating vectorstore: {str(e)}")
+            # append_to_pdf re-indexes only the Q&A PDF, so no full rebuild is needed here
             
             # Send email notification if user exists
             user_id = query_doc.get("user_id")
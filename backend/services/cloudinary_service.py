@@ -1,82 +1,143 @@
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+import bisect
+import threading
+import time
 import os
-import tempfile
-import uuid
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-import os
-import tempfile
 import uuid
 from config.config import Config
 
+_configured = False
+_configure_lock = threading.Lock()
+
+def get_cloudinary():
+    """Import and configure the Cloudinary SDK on first use"""
+    global _configured
+    import cloudinary
+    import cloudinary.api
+    import cloudinary.uploader
+    import cloudinary.utils
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                cloudinary.config(
+                    cloud_name=Config.CLOUDINARY_CLOUD_NAME,
+                    api_key=Config.CLOUDINARY_API_KEY,
+                    api_secret=Config.CLOUDINARY_API_SECRET
+                )
+                print(f"Cloudinary initialized with cloud name: {Config.CLOUDINARY_CLOUD_NAME}")
+                _configured = True
+    return cloudinary
+
 class CloudinaryService:
     """Service for managing PDFs in Cloudinary"""
     
-    def __init__(self):
-        """Initialize Cloudinary configuration"""
-        cloudinary.config(
-            cloud_name=Config.CLOUDINARY_CLOUD_NAME,
-            api_key=Config.CLOUDINARY_API_KEY,
-            api_secret=Config.CLOUDINARY_API_SECRET
-        )
-        print(f"Cloudinary initialized with cloud name: {Config.CLOUDINARY_CLOUD_NAME}")
-        
+    # Callables run after every successful upload, keyed by name
+    upload_hooks = {}
+    
+    # Folder listing shared by all instances: resources, sorted public_ids, fetch time
+    # and the shared listing version it was fetched at
+    _listing = {"resources": None, "public_ids": [], "by_id": {}, "fetched_at": 0.0, "version": None}
+    _listing_lock = threading.Lock()
+    # Bumped by invalidate_listing, so a fetch that overlapped it is not cached
+    _listing_generation = 0
+    LISTING_VERSION = "pdf_listing"
+    
+    @classmethod
+    def register_upload_hook(cls, name, hook):
+        """Register a hook called as hook(upload_result, pdf_stream) after each upload"""
+        cls.upload_hooks[name] = hook
+    
     def upload_pdf(self, pdf_file):
         """Upload a PDF file to Cloudinary
         
+        The upload streams straight from the request's file stream (which
+        werkzeug has already spooled) in UPLOAD_CHUNK_SIZE parts, validating
+        the PDF header, size and page count as the bytes pass through.
+        
         Args:
             pdf_file: The file object from request.files
             
         Returns:
             dict: The response from Cloudinary with file details
-        """
-        try:
-            # Create a temporary file to handle the upload
-            temp_file = tempfile.NamedTemporaryFile(delete=False)
-            pdf_file.save(temp_file.name)
-            temp_file.close()
-            
-            # Get the original filename and sanitize it
-            filename = pdf_file.filename
-            
-            # Make sure the filename ends with .pdf
-            if not filename.lower().endswith('.pdf'):
-                filename = filename + '.pdf'
-                
-            # Sanitize filename for use in public_id (remove spaces and special chars)
-            import re
-            sanitized_name = re.sub(r'[^a-zA-Z0-9_]', '_', os.path.splitext(filename)[0])
-            
-            # Generate a unique ID that includes the original filename
-            unique_id = f"{sanitized_name}_{str(uuid.uuid4())[:8]}"
             
-            print(f"Uploading PDF to Cloudinary: {filename} with ID: {unique_id}")
-            
-            # Upload to Cloudinary - similar to the test script that worked
-            # Adding access_mode=public to make the file publicly accessible
-            result = cloudinary.uploader.upload(
-                temp_file.name,
-                resource_type="raw",
-                public_id=unique_id,
-                folder=Config.PDF_FOLDER,
-                overwrite=True,
-                access_mode="public"
-            )
-            
-            # Add original filename to the result
-            result['original_filename'] = filename
+        Raises:
+            PdfValidationError: If the file is not a PDF or exceeds the limits
+        """
+        from utils.upload_stream import ValidatedPdfStream, PdfValidationError
+        
+        # Get the original filename and sanitize it
+        filename = pdf_file.filename
+        
+        # Make sure the filename ends with .pdf
+        if not filename.lower().endswith('.pdf'):
+            filename = filename + '.pdf'
             
-            # Clean up the temporary file
-            os.unlink(temp_file.name)
+        # Sanitize filename for use in public_id (remove spaces and special chars)
+        import re
+        sanitized_name = re.sub(r'[^a-zA-Z0-9_]', '_', os.path.splitext(filename)[0])
+        
+        # Generate a unique ID that includes the original filename
+        unique_id = f"{sanitized_name}_{str(uuid.uuid4())[:8]}"
+        
+        stream = ValidatedPdfStream(
+            pdf_file.stream,
+            name=filename,
+            max_bytes=int(Config.MAX_PDF_UPLOAD_MB * 1024 * 1024),
+            max_pages=Config.MAX_PDF_PAGES
+        )
+        # Reject oversized files before any bytes are sent
+        if stream.total_bytes > stream.max_bytes:
+            raise PdfValidationError(f"{filename} exceeds the {Config.MAX_PDF_UPLOAD_MB:g} MB upload limit")
+        
+        print(f"Uploading PDF to Cloudinary: {filename} with ID: {unique_id} ({stream.total_bytes} bytes)")
+        
+        # Adding access_mode=public to make the file publicly accessible
+        result = get_cloudinary().uploader.upload_large(
+            stream,
+            filename=filename,
+            chunk_size=Config.UPLOAD_CHUNK_SIZE,
+            resource_type="raw",
+            public_id=unique_id,
+            folder=Config.PDF_FOLDER,
+            overwrite=True,
+            access_mode="public"
+        )
+        
+        # Add original filename to the result
+        result['original_filename'] = filename
+        result['pages'] = stream.pages
+        self.invalidate_listing()
+        
+        # Run upload hooks on the spooled upload; each gets a rewound stream
+        result['hooks'] = {}
+        for name, hook in self.upload_hooks.items():
+            try:
+                pdf_file.stream.seek(0)
+                result['hooks'][name] = hook(result, pdf_file.stream)
+            except Exception as hook_error:
+                print(f"Upload hook '{name}' failed: {str(hook_error)}")
+        
+        return result
+    
+    def upload_pdfs(self, pdf_files):
+        """Upload several PDFs with parallel transfers
+        
+        Args:
+            pdf_files: File objects from request.files
             
-            return result
-        except Exception as e:
-            if 'temp_file' in locals() and os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
-            raise e
+        Returns:
+            list: One dict per file with 'filename' and either 'result' or 'error'
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def upload_one(pdf_file):
+            try:
+                return {'filename': pdf_file.filename, 'result': self.upload_pdf(pdf_file)}
+            except Exception as e:
+                print(f"Error uploading {pdf_file.filename}: {str(e)}")
+                return {'filename': pdf_file.filename, 'error': str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(Config.UPLOAD_WORKERS, len(pdf_files)))) as executor:
+            return list(executor.map(upload_one, pdf_files))
     
     def delete_pdf(self, public_id):
         """Delete a PDF from Cloudinary
@@ -88,34 +149,133 @@ class CloudinaryService:
             dict: The response from Cloudinary
         """
         try:
-            result = cloudinary.uploader.destroy(public_id, resource_type="raw")
+            result = get_cloudinary().uploader.destroy(public_id, resource_type="raw")
+            self.invalidate_listing()
             return result
         except Exception as e:
             raise e
     
-    def list_pdfs(self):
+    @classmethod
+    def invalidate_listing(cls):
+        """Forget the cached folder listing after an upload or delete
+        
+        Bumps the shared listing version too, so the other workers refetch
+        on their next listing instead of serving theirs until it expires.
+        """
+        with cls._listing_lock:
+            cls._listing = {"resources": None, "public_ids": [], "by_id": {}, "fetched_at": 0.0, "version": None}
+            cls._listing_generation += 1
+        try:
+            from models.models import CacheVersion
+            CacheVersion().bump(cls.LISTING_VERSION)
+        except Exception as e:
+            print(f"Error bumping the PDF listing version: {str(e)}")
+    
+    @classmethod
+    def _listing_version(cls):
+        """Shared listing version, or None when MongoDB cannot be read"""
+        try:
+            from models.models import CacheVersion
+            return CacheVersion().get(cls.LISTING_VERSION)
+        except Exception as e:
+            print(f"Error reading the PDF listing version: {str(e)}")
+            return None
+    
+    def _fetch_resources(self, prefix):
+        """Fetch every raw resource under prefix, following next_cursor"""
+        resources = []
+        next_cursor = None
+        while True:
+            params = {
+                "resource_type": "raw",
+                "type": "upload",
+                "prefix": prefix,
+                "max_results": 500
+            }
+            if next_cursor:
+                params["next_cursor"] = next_cursor
+            result = get_cloudinary().api.resources(**params)
+            resources.extend(result.get("resources", []))
+            next_cursor = result.get("next_cursor")
+            if not next_cursor:
+                return resources
+    
+    def _cached_listing(self, version=None):
+        """Listing from the cache, or None when it is missing, older than
+        PDF_LISTING_TTL or fetched before another worker's upload or delete"""
+        listing = self._listing
+        if listing["resources"] is None:
+            return None
+        if time.monotonic() - listing["fetched_at"] > Config.PDF_LISTING_TTL:
+            return None
+        if version is not None and listing["version"] != version:
+            return None
+        return listing
+    
+    def list_pdfs(self, refresh=False):
         """List all PDFs stored in Cloudinary
         
+        The listing follows pagination cursors and is cached for
+        PDF_LISTING_TTL seconds; uploads and deletes invalidate it.
+        
+        Args:
+            refresh: Bypass the cache and fetch a fresh listing
+            
         Returns:
             list: List of PDF files with their details
         """
         try:
-            # Using the same approach as the test script
-            folder = Config.PDF_FOLDER
-            result = cloudinary.api.resources(
-                resource_type="raw",
-                type="upload",
-                prefix=folder,
-                max_results=500
-            )
+            # Read before fetching, so a change during the fetch invalidates the result
+            version = self._listing_version()
+            with self._listing_lock:
+                listing = None if refresh else self._cached_listing(version)
+                generation = self._listing_generation
+            if listing is not None:
+                return list(listing["resources"])
             
-            # Return the resources directly
-            return result.get("resources", [])
+            # Fetched without the lock; concurrent misses may fetch twice, but
+            # cached readers never wait on the paginated API calls
+            started = time.monotonic()
+            resources = self._fetch_resources(Config.PDF_FOLDER)
+            by_id = {resource.get("public_id", ""): resource for resource in resources}
+            print(f"Listed {len(resources)} PDFs from Cloudinary")
+            with self._listing_lock:
+                # Keep a newer listing, and skip caching one an upload or delete overtook
+                if generation == self._listing_generation and self._listing["fetched_at"] <= started:
+                    CloudinaryService._listing = {
+                        "resources": resources,
+                        "public_ids": sorted(by_id),
+                        "by_id": by_id,
+                        "fetched_at": started,
+                        "version": version
+                    }
+            return list(resources)
             
         except Exception as e:
             print(f"Error listing PDFs: {str(e)}")
             raise e
     
+    def find_by_prefix(self, prefix):
+        """Find PDFs whose public_id starts with prefix
+        
+        Uses a binary search over the cached listing, or a prefix-filtered
+        API call when no listing is cached, instead of scanning every PDF.
+        
+        Returns:
+            list: Matching PDF resources
+        """
+        version = self._listing_version()
+        with self._listing_lock:
+            listing = self._cached_listing(version)
+            if listing is not None:
+                public_ids = listing["public_ids"]
+                start = bisect.bisect_left(public_ids, prefix)
+                end = start
+                while end < len(public_ids) and public_ids[end].startswith(prefix):
+                    end += 1
+                return [listing["by_id"][public_id] for public_id in public_ids[start:end]]
+        return self._fetch_resources(prefix)
+    
     def get_pdf_url(self, public_id):
         """Get the URL for a PDF
         
@@ -126,7 +286,7 @@ class CloudinaryService:
             str: The URL of the PDF
         """
         # Return the secure URL when possible
-        url, options = cloudinary.utils.cloudinary_url(
+        url, options = get_cloudinary().utils.cloudinary_url(
             public_id,
             resource_type="raw"
         )
@@ -0,0 +1,175 @@
+import io
+import os
+import queue
+import socket
+import threading
+import time
+from bson import ObjectId
+from config.config import Config
+from models.models import IndexingJob
+
+class IndexingService:
+    """Service for indexing individual PDFs in the background
+
+    Uploads hand over the bytes they already hold, so a worker can extract,
+    chunk, embed and upsert just that document without downloading it again
+    or rebuilding the whole index.
+
+    The queue lives in memory, so jobs of a process that exits (worker
+    recycle, deploy, crash) are lost with it. recover_stale_jobs() takes
+    over such jobs from their indexing_jobs documents and re-fetches the
+    PDF, or marks them failed after INDEXING_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or Config.INDEXING_WORKERS
+        self.job_model = IndexingJob()
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self):
+        """Start worker threads on first use"""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"pdf-indexer-{len(self._threads)}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, public_id, pdf_bytes):
+        """Queue a PDF for indexing
+
+        Args:
+            public_id: Cloudinary public_id of the PDF
+            pdf_bytes: The PDF content
+
+        Returns:
+            dict: Indexing status handle with job_id and status
+        """
+        job_id = str(self.job_model.create_job(public_id, owner=self._owner()))
+        self._ensure_workers()
+        self._queue.put((job_id, public_id, pdf_bytes))
+        print(f"Queued {public_id} for indexing (job {job_id})")
+        return {"job_id": job_id, "status": "queued"}
+
+    @staticmethod
+    def _owner():
+        # Evaluated per call: workers forked from the master have their own pid
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def recover_stale_jobs(self):
+        """Requeue jobs left queued or running by a process that exited
+
+        Returns:
+            dict: Numbers of jobs requeued and failed
+        """
+        owner = self._owner()
+        requeued = failed = 0
+        while True:
+            job = self.job_model.take_over_stale(owner, Config.INDEXING_JOB_STALE_SECONDS)
+            if not job:
+                break
+            job_id = str(job["_id"])
+            if job["attempts"] > Config.INDEXING_MAX_ATTEMPTS:
+                self.job_model.update_status(
+                    job_id, "failed",
+                    error=f"Indexing was interrupted {job['attempts']} times, giving up"
+                )
+                failed += 1
+                continue
+            self._ensure_workers()
+            # No bytes: the worker fetches the PDF from Cloudinary
+            self._queue.put((job_id, job["public_id"], None))
+            requeued += 1
+        if requeued or failed:
+            print(f"Recovered interrupted indexing jobs: {requeued} requeued, {failed} failed")
+        return {"requeued": requeued, "failed": failed}
+
+    @staticmethod
+    def _fetch_pdf(public_id):
+        """Local path of a PDF, for jobs whose uploaded bytes were lost"""
+        from services.cloudinary_service import CloudinaryService
+        from utils.pdf_cache import get_pdf_cache
+        resource = next(
+            (r for r in CloudinaryService().find_by_prefix(public_id) if r.get("public_id") == public_id),
+            None
+        )
+        if resource is None:
+            raise Exception(f"{public_id} is no longer in Cloudinary")
+        return get_pdf_cache().fetch(resource)
+
+    def get_status(self, job_id):
+        """Get the status of an indexing job
+
+        Returns:
+            dict: Job status, or None when the job does not exist
+        """
+        if not ObjectId.is_valid(job_id):
+            return None
+        job = self.job_model.find_by_id(job_id)
+        if not job:
+            return None
+        job["job_id"] = str(job.pop("_id"))
+        for field in ("created_at", "updated_at"):
+            if hasattr(job.get(field), "isoformat"):
+                job[field] = job[field].isoformat()
+        return job
+
+    def _work(self):
+        from utils.pdf_utils import index_pdf
+
+        while True:
+            job_id, public_id, pdf_bytes = self._queue.get()
+            start = time.perf_counter()
+            try:
+                if not self.job_model.claim(job_id, self._owner()):
+                    print(f"Indexing job {job_id} was taken over by another worker, skipping")
+                    continue
+                pdf_file = io.BytesIO(pdf_bytes) if pdf_bytes is not None else self._fetch_pdf(public_id)
+                stats = index_pdf(public_id, pdf_file)
+                self.job_model.update_status(
+                    job_id, "indexed",
+                    vectors=stats.get("vectors", 0),
+                    seconds=round(time.perf_counter() - start, 2)
+                )
+                print(f"Indexed {public_id} in {time.perf_counter() - start:.2f}s (job {job_id})")
+            except Exception as e:
+                print(f"Error indexing {public_id} (job {job_id}): {str(e)}")
+                try:
+                    self.job_model.update_status(job_id, "failed", error=str(e))
+                except Exception as status_error:
+                    print(f"Error updating indexing job {job_id}: {str(status_error)}")
+            finally:
+                del pdf_bytes
+                self._queue.task_done()
+
+_indexing_service = None
+_indexing_service_lock = threading.Lock()
+
+def get_indexing_service():
+    """Get the process-wide indexing service"""
+    global _indexing_service
+    if _indexing_service is None:
+        with _indexing_service_lock:
+            if _indexing_service is None:
+                _indexing_service = IndexingService()
+    return _indexing_service
+
+def queue_pdf_indexing(upload_result, pdf_file):
+    """Upload hook: queue the just-uploaded file for indexing from local bytes
+
+    Args:
+        upload_result: Cloudinary upload response
+        pdf_file: Local path or rewound binary stream of the uploaded PDF
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, 'rb') as f:
+            pdf_bytes = f.read()
+    else:
+        pdf_bytes = pdf_file.read()
+    return get_indexing_service().enqueue(upload_result['public_id'], pdf_bytes)
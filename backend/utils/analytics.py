@@ -0,0 +1,127 @@
+"""
+Incremental query analytics rollups.
+
+update_rollups() reads the chat entries written since the last run (the
+watermark) and scores each question once. It stores the sentiment and terms
+on the entry, then rebuilds the daily rollup of every day it touched from
+those stored values. A rollup holds the number of questions, their sentiment
+sum and the day's most frequent terms. The query-analytics endpoint only
+reads rollups.
+
+A run that dies before advancing the watermark is simply repeated: entries
+already scored are not scored again, and day rollups are replaced, not
+incremented.
+
+Usage (from the backend directory):
+    python -m utils.analytics             # roll up new chat entries
+    python -m utils.analytics --rebuild   # drop all rollups and roll up everything again
+"""
+
+import datetime
+import time
+from collections import Counter
+from config.config import Config
+
+# A simple stopwords list – extend it as needed.
+STOPWORDS = {"the", "is", "at", "on", "and", "a", "an", "to", "of", "in", "i", "you", "it"}
+
+TRENDING_TOPICS = 5
+
+def question_terms(question):
+    """Lowercased alphanumeric words of a question, without stopwords"""
+    terms = []
+    for word in question.lower().split():
+        # Remove non-alphanumeric characters
+        word = ''.join([ch for ch in word if ch.isalnum()])
+        if word and word not in STOPWORDS:
+            terms.append(word)
+    return terms
+
+def analyze_question(question):
+    """Sentiment polarity and terms of one question, as stored on its chat entry"""
+    if not question:
+        # Kept so the entry is not picked up again; summaries skip it
+        return {"sentiment": None, "terms": []}
+    # TextBlob pulls in nltk; only the rollup job needs it
+    from textblob import TextBlob
+    return {"sentiment": TextBlob(question).sentiment.polarity, "terms": question_terms(question)}
+
+def update_rollups(batch_size=None, settle_seconds=None):
+    """Roll up the chat entries written since the watermark
+
+    Returns:
+        dict: Entries read, entries scored and days rebuilt by this run
+    """
+    from models.models import AnalyticsRollup, ChatHistory
+    batch_size = batch_size or Config.ANALYTICS_BATCH_SIZE
+    settle_seconds = Config.ANALYTICS_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+    chat_history = ChatHistory()
+    rollups = AnalyticsRollup()
+
+    started = time.time()
+    before = datetime.datetime.utcnow() - datetime.timedelta(seconds=settle_seconds)
+    watermark = rollups.get_watermark()
+    days = set()
+    read = scored = 0
+    while True:
+        entries = chat_history.get_entries_after(watermark, before, batch_size)
+        if not entries:
+            break
+        pending = {entry["_id"]: analyze_question(entry.get("question")) for entry in entries if "analytics" not in entry}
+        chat_history.set_analytics(pending)
+        days.update(entry["timestamp"].date() for entry in entries)
+        read += len(entries)
+        scored += len(pending)
+        watermark = (entries[-1]["timestamp"], entries[-1]["_id"])
+
+    for day in sorted(days):
+        rollups.save_day(day, *chat_history.summarize_day(day, Config.ANALYTICS_TOP_TERMS))
+    # Advanced last, so an interrupted run is repeated rather than lost
+    if read:
+        rollups.set_watermark(*watermark)
+
+    result = {"read": read, "scored": scored, "days": len(days)}
+    if read:
+        print(f"Rolled up query analytics in {time.time() - started:.1f}s: {result}")
+    return result
+
+def combine_rollups(rollups):
+    """Endpoint payload from day rollups
+
+    Trending topics are summed from each day's top ANALYTICS_TOP_TERMS terms.
+
+    Returns:
+        tuple: (sentiment analytics per date, top TRENDING_TOPICS (term, count) pairs)
+    """
+    sentiment_analytics = []
+    term_counter = Counter()
+    for rollup in rollups:
+        if not rollup.get("count"):
+            continue
+        sentiment_analytics.append({
+            "date": rollup["_id"],
+            "avg_sentiment": rollup["sentiment_sum"] / rollup["count"],
+            "count": rollup["count"]
+        })
+        for term, count in rollup.get("top_terms", []):
+            term_counter[term] += count
+    return sentiment_analytics, term_counter.most_common(TRENDING_TOPICS)
+
+def main():
+    import argparse
+    import sys
+    from config.database import db_instance
+    from models.models import AnalyticsRollup
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="Drop the rollups and watermark first")
+    args = parser.parse_args()
+
+    if not db_instance.connect(create_indexes=False):
+        sys.exit(1)
+    if args.rebuild:
+        AnalyticsRollup().reset()
+    print(update_rollups())
+
+if __name__ == "__main__":
+    main()
@@ -51,12 +51,20 @@ def admin_required(f):
     
     return decorated
 
-def generate_user_token(user_id):
-    """Generate JWT token for user"""
+USER_TOKEN_HOURS = 24
+
+def generate_user_token(user_id, username=None):
+    """Generate JWT token for user
+    
+    The username, if given, is stored on the user's chat entries without a
+    lookup; it goes stale on a rename until the client takes the new token.
+    """
     payload = {
         'user_id': str(user_id),
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=USER_TOKEN_HOURS)
     }
+    if username:
+        payload['username'] = username
     return jwt.encode(payload, Config.SECRET_KEY, algorithm='HS256')
 
 def generate_admin_token():
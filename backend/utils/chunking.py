@@ -0,0 +1,218 @@
+import re
+
+# Approximate tokenizer: words and standalone punctuation. This tracks the
+# MiniLM wordpiece count closely enough for sizing chunks without loading
+# the model tokenizer.
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?:;])\s+(?=["\'(\[]?[A-Z0-9])')
+
+NUMBERED_HEADING = re.compile(r'^(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+[A-Z][^.!?]{0,100}$')
+KEYWORD_HEADING = re.compile(
+    r'^(?:chapter|section|unit|part|module|annexure|appendix|schedule)\b[^.!?]{0,100}$',
+    re.IGNORECASE
+)
+CAPS_HEADING = re.compile(r'^[A-Z][A-Z0-9 ,&/\-:()\']{2,100}$')
+
+MAX_HEADING_METADATA_LENGTH = 100
+
+def count_tokens(text):
+    """Count approximate tokens in text"""
+    return len(TOKEN_PATTERN.findall(text))
+
+def is_heading(line):
+    """Detect whether a single line looks like a section heading"""
+    line = line.strip()
+    if not line or len(line) > 120:
+        return False
+    if NUMBERED_HEADING.match(line) or KEYWORD_HEADING.match(line):
+        return True
+    # All-caps lines with at least two letters, e.g. "EXAMINATION RULES"
+    return bool(CAPS_HEADING.match(line)) and sum(ch.isalpha() for ch in line) >= 2
+
+def split_sentences(paragraph):
+    """Split a paragraph into sentences"""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(paragraph) if s.strip()]
+
+def split_blocks(page_text):
+    """Split page text into heading and paragraph blocks
+
+    Returns:
+        list: (kind, text) tuples where kind is 'heading' or 'paragraph'
+    """
+    blocks = []
+    paragraph_lines = []
+
+    def flush_paragraph():
+        if paragraph_lines:
+            blocks.append(("paragraph", " ".join(paragraph_lines)))
+            paragraph_lines.clear()
+
+    for raw_line in page_text.split("\n"):
+        line = raw_line.strip()
+        if not line:
+            flush_paragraph()
+        elif is_heading(line):
+            flush_paragraph()
+            blocks.append(("heading", line))
+        else:
+            paragraph_lines.append(line)
+
+    flush_paragraph()
+    return blocks
+
+def _split_oversized(text, chunk_size, chunk_overlap):
+    """Split a unit with no usable sentence boundaries (e.g. a table) by words"""
+    words = text.split()
+    pieces = []
+    step = max(chunk_size - chunk_overlap, 1)
+    start = 0
+    while start < len(words):
+        window = []
+        tokens = 0
+        for word in words[start:]:
+            word_tokens = count_tokens(word)
+            if window and tokens + word_tokens > chunk_size:
+                break
+            window.append(word)
+            tokens += word_tokens
+        pieces.append(" ".join(window))
+        if start + len(window) >= len(words):
+            break
+        # Step forward by roughly (size - overlap) tokens worth of words
+        advance = 0
+        consumed = 0
+        for word in window:
+            if consumed >= step:
+                break
+            consumed += count_tokens(word)
+            advance += 1
+        start += max(advance, 1)
+    return pieces
+
+def _document_units(pages, chunk_size, chunk_overlap):
+    """Yield sentence-level units with their page, heading and paragraph index
+
+    Sentence units also carry the token count of their whole paragraph, so
+    the chunker can tell whether the paragraph still fits.
+    """
+    heading = ""
+    paragraph_index = 0
+    for page in pages:
+        for kind, text in split_blocks(page["text"]):
+            if kind == "heading":
+                heading = text
+                yield {"kind": "heading", "text": text, "page": page["page"],
+                       "heading": heading, "paragraph": paragraph_index,
+                       "tokens": count_tokens(text)}
+                continue
+
+            paragraph_index += 1
+            parts = []
+            for sentence in split_sentences(text):
+                tokens = count_tokens(sentence)
+                if tokens <= chunk_size:
+                    parts.append((sentence, tokens))
+                else:
+                    parts.extend((piece, count_tokens(piece))
+                                 for piece in _split_oversized(sentence, chunk_size, chunk_overlap))
+            paragraph_tokens = sum(part_tokens for _, part_tokens in parts)
+            for part, part_tokens in parts:
+                yield {"kind": "sentence", "text": part, "page": page["page"],
+                       "heading": heading, "paragraph": paragraph_index,
+                       "tokens": part_tokens, "paragraph_tokens": paragraph_tokens}
+
+def chunk_document(pages, source, chunk_size=200, chunk_overlap=40):
+    """Chunk one document's pages along heading, paragraph and sentence boundaries
+
+    Headings always start a chunk. A paragraph that does not fit into the
+    rest of a chunk that is at least half full starts the next chunk;
+    otherwise chunks are filled sentence by sentence, with overlap.
+
+    Args:
+        pages: List of dicts with 'page' (1-based number) and 'text'
+        source: Identifier of the source document (Cloudinary public_id)
+        chunk_size: Maximum chunk size in approximate tokens
+        chunk_overlap: Tokens of trailing sentences repeated in the next chunk
+
+    Returns:
+        list: Dicts with 'text' and 'metadata' (source, page, heading, chunk_id)
+    """
+    chunk_overlap = min(chunk_overlap, chunk_size // 2)
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def emit():
+        if not any(unit["kind"] == "sentence" for unit in current):
+            return
+        first = current[0]
+        chunks.append({
+            "text": " ".join(unit["text"] for unit in current),
+            "metadata": {
+                "source": source,
+                "page": first["page"],
+                "heading": first["heading"][:MAX_HEADING_METADATA_LENGTH],
+                "chunk_id": str(len(chunks))
+            }
+        })
+
+    def overlap_tail():
+        # Carry trailing sentences of the same section into the next chunk
+        tail = []
+        tokens = 0
+        for unit in reversed(current):
+            if unit["kind"] != "sentence" or tokens + unit["tokens"] > chunk_overlap:
+                break
+            tail.insert(0, unit)
+            tokens += unit["tokens"]
+        return tail, tokens
+
+    for unit in _document_units(pages, chunk_size, chunk_overlap):
+        if unit["kind"] == "heading":
+            # A new section always starts a new chunk
+            emit()
+            current = [unit]
+            current_tokens = unit["tokens"]
+            continue
+
+        starts_paragraph = bool(current) and current[-1]["paragraph"] != unit["paragraph"]
+        if (starts_paragraph and current_tokens >= chunk_size // 2
+                and current_tokens + unit["paragraph_tokens"] > chunk_size):
+            # Break at the paragraph boundary rather than mid-paragraph
+            emit()
+            current, current_tokens = [], 0
+        elif current and current_tokens + unit["tokens"] > chunk_size:
+            emit()
+            current, current_tokens = overlap_tail()
+            if current_tokens + unit["tokens"] > chunk_size:
+                current, current_tokens = [], 0
+
+        current.append(unit)
+        current_tokens += unit["tokens"]
+
+    emit()
+    return chunks
+
+def chunk_pages(pages, chunk_size=200, chunk_overlap=40):
+    """Chunk pages from one or more documents
+
+    Args:
+        pages: List of dicts with 'source', 'page' and 'text', ordered by source and page
+
+    Returns:
+        tuple: (texts, metadatas) lists aligned by index
+    """
+    texts = []
+    metadatas = []
+
+    documents = {}
+    for page in pages:
+        documents.setdefault(page["source"], []).append(page)
+
+    for source, document_pages in documents.items():
+        for chunk in chunk_document(document_pages, source, chunk_size, chunk_overlap):
+            texts.append(chunk["text"])
+            metadatas.append(chunk["metadata"])
+
+    return texts, metadatas
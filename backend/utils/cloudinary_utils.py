@@ -1,4 +1,5 @@
 import tempfile
+import time
 import requests
 import os
 from urllib.parse import urlparse
@@ -48,8 +49,12 @@ def download_pdf(url, temp_dir):
         print(f"Error downloading PDF: {str(e)}")
         raise
 
-def clean_text(text):
-    """Clean and normalize text to remove problematic characters"""
+def clean_text(text, keep_newlines=False):
+    """Clean and normalize text to remove problematic characters
+
+    With keep_newlines, line and paragraph breaks are preserved so that
+    structure-aware chunking can see headings and paragraphs.
+    """
     import re
     import unicodedata
     
@@ -67,13 +72,18 @@ def clean_text(text):
     text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # Replace non-ASCII with space
     
     # Clean up whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    if keep_newlines:
+        text = re.sub(r'[^\S\n]+', ' ', text)           # Collapse spaces and tabs
+        text = re.sub(r' ?\n ?', '\n', text)
+        text = re.sub(r'\n{3,}', '\n\n', text).strip()  # At most one blank line
+    else:
+        text = re.sub(r'\s+', ' ', text).strip()
     
     return text
 
 def get_pdf_text_from_urls(pdf_urls):
     """Extract text from PDF documents available at URLs"""
-    from PyPDF2 import PdfReader
+    from utils.extractors import get_extractor
     
     text = ""
     success_count = 0
@@ -99,22 +109,13 @@ def get_pdf_text_from_urls(pdf_urls):
                     continue
                 
                 # Extract text
-                with open(pdf_path, 'rb') as f:
-                    print(f"Opening PDF file: {pdf_path}")
-                    pdf_reader = PdfReader(f)
-                    num_pages = len(pdf_reader.pages)
-                    print(f"PDF has {num_pages} pages")
-                    
-                    for p, page in enumerate(pdf_reader.pages):
-                        print(f"Extracting text from page {p+1}/{num_pages}")
-                        try:
-                            page_text = page.extract_text() or ""
-                            # Clean the text to handle encoding issues
-                            cleaned_text = clean_text(page_text)
-                            text += cleaned_text + "\n"
-                            print(f"Extracted {len(cleaned_text)} characters")
-                        except Exception as page_error:
-                            print(f"Error extracting text from page {p+1}: {str(page_error)}")
+                print(f"Opening PDF file: {pdf_path}")
+                raw_pages = get_extractor().extract_pages(pdf_path)
+                print(f"PDF has {len(raw_pages)} pages")
+                
+                for raw_text in raw_pages:
+                    # Clean the text to handle encoding issues
+                    text += clean_text(raw_text) + "\n"
                 
                 success_count += 1
                 print(f"Successfully processed PDF {i+1}/{len(pdf_urls)}")
@@ -130,3 +131,111 @@ def get_pdf_text_from_urls(pdf_urls):
     print(f"Total text after cleaning: {len(clean_full_text)} characters")
     
     return clean_full_text
+
+# Bump when cleaning changes so cached page texts are not reused
+CLEANER_VERSION = "clean-2"
+
+def extract_pdf_pages(pdf_file, source):
+    """Extract cleaned per-page text from a local PDF
+    
+    Text comes from the configured extractor (PDF_EXTRACTOR). Page texts are
+    cached by PDF content hash and the extractor and cleaner versions, so an
+    unchanged PDF skips extraction entirely.
+    
+    Args:
+        pdf_file: Path or binary file object of the PDF
+        source: Identifier recorded on each page (Cloudinary public_id)
+        
+    Returns:
+        list: Dicts with 'source', 'page' (1-based) and 'text' for non-empty pages
+    """
+    from config.config import Config
+    from utils.extractors import get_extractor
+    
+    extractor = get_extractor()
+    extractor_version = f"{extractor.version}/{CLEANER_VERSION}"
+    text_cache = None
+    if Config.TEXT_CACHE_ENABLED:
+        from utils.text_cache import content_hash, get_text_cache
+        text_cache = get_text_cache()
+        digest = content_hash(pdf_file)
+        cached = text_cache.get(digest, extractor_version)
+        if cached is not None:
+            print(f"Using cached text for {source} ({len(cached)} pages)")
+            return [{"source": source, "page": page, "text": text} for page, text in cached]
+    
+    start = time.perf_counter()
+    pages = []
+    raw_pages = extractor.extract_pages(pdf_file)
+    print(f"PDF has {len(raw_pages)} pages ({extractor.name})")
+    
+    for p, raw_text in enumerate(raw_pages):
+        page_text = clean_text(raw_text, keep_newlines=True)
+        if page_text:
+            pages.append({"source": source, "page": p + 1, "text": page_text})
+    
+    if text_cache is not None:
+        try:
+            text_cache.put(digest, extractor_version,
+                           [(page["page"], page["text"]) for page in pages],
+                           time.perf_counter() - start)
+        except Exception as e:
+            print(f"Error caching extracted text for {source}: {str(e)}")
+    return pages
+
+def get_pdf_pages_from_resources(pdf_resources):
+    """Extract per-page text from Cloudinary PDF resources
+
+    PDFs are read through the local PDF cache when it is enabled, so
+    unchanged files are not downloaded again.
+
+    Args:
+        pdf_resources: Cloudinary resource dicts (public_id, secure_url/url, version)
+
+    Returns:
+        list: Dicts with 'source' (public_id), 'page' (1-based) and 'text'
+    """
+    from config.config import Config
+    
+    pages = []
+    success_count = 0
+    pdf_cache = None
+    if Config.PDF_CACHE_ENABLED:
+        from utils.pdf_cache import get_pdf_cache
+        pdf_cache = get_pdf_cache()
+        pdf_cache.reset_stats()
+    text_cache = None
+    if Config.TEXT_CACHE_ENABLED:
+        from utils.text_cache import get_text_cache
+        text_cache = get_text_cache()
+        text_cache.reset_stats()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i, resource in enumerate(pdf_resources):
+            public_id = resource.get('public_id')
+            url = resource.get('secure_url', resource.get('url'))
+            if not url:
+                continue
+            try:
+                print(f"\nProcessing PDF {i+1}/{len(pdf_resources)}: {public_id}")
+                if pdf_cache:
+                    pdf_path = pdf_cache.fetch(resource)
+                else:
+                    pdf_path = download_pdf(url, temp_dir)
+                pages.extend(extract_pdf_pages(pdf_path, public_id))
+                success_count += 1
+            except Exception as e:
+                print(f"ERROR processing PDF {public_id}: {str(e)}")
+    
+    print(f"Successfully processed {success_count} out of {len(pdf_resources)} PDFs")
+    print(f"Extracted {len(pages)} non-empty pages")
+    if pdf_cache:
+        report = pdf_cache.report()
+        print(f"PDF cache: {report['hits']} hits, {report['revalidated']} revalidated, "
+              f"{report['downloads']} downloads ({report['bytes_downloaded']} bytes)")
+    if text_cache:
+        report = text_cache.report()
+        print(f"Extracted-text cache hit rate: {report['hit_rate']:.1%} "
+              f"({report['hits']} hits, {report['misses']} misses), "
+              f"saved {report['seconds_saved']}s of extraction, spent {report['seconds_spent']}s")
+    return pages
@@ -0,0 +1,38 @@
+import threading
+from pymongo import monitoring
+
+# Driver housekeeping that is not a round trip made by our code
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "endSessions", "ping", "buildInfo"}
+
+class CommandCounter(monitoring.CommandListener):
+    """Record the MongoDB commands a client sends, to count round trips
+
+    Pass it to Database.connect(event_listeners=[counter]); every command
+    sent after that is recorded as (command name, collection).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        with self._lock:
+            self.commands.append((event.command_name, target if isinstance(target, str) else None))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        with self._lock:
+            self.commands = []
+
+    def count(self, command_name=None):
+        """Number of recorded commands, optionally of one kind"""
+        with self._lock:
+            return sum(1 for name, _ in self.commands if command_name in (None, name))
@@ -0,0 +1,151 @@
+import hashlib
+import re
+import numpy as np
+from config.config import Config
+
+# Mersenne prime used for the MinHash permutations; shingle hashes are reduced
+# below it so a * x + b stays inside uint64
+MERSENNE_PRIME = (1 << 61) - 1
+HASH_MASK = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+# Bytes per stored vector (384 float32 values), used for the size estimate
+VECTOR_BYTES = 384 * 4
+
+def shingles(text, size=5):
+    """Set of hashed word n-grams; short texts fall back to their words"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        grams = set(words)
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") & HASH_MASK
+        for gram in grams
+    }
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def choose_bands(num_perm, threshold):
+    """Pick the LSH (bands, rows) split whose S-curve threshold is closest to threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        estimate = (1.0 / bands) ** (1.0 / rows)
+        # Aim a little below the threshold: candidates are verified exactly anyway,
+        # so extra candidates only cost comparisons while misses cost recall
+        distance = abs(estimate - threshold * 0.9)
+        if best is None or distance < best[0]:
+            best = (distance, bands, rows)
+    return best[1], best[2]
+
+class MinHashDeduplicator:
+    """Near-duplicate chunk detector using MinHash signatures and LSH banding
+
+    Candidate pairs come from LSH buckets and are confirmed with the exact
+    Jaccard similarity of their shingle sets, so the threshold is applied
+    precisely while the comparison count stays close to linear.
+    """
+
+    def __init__(self, threshold=None, num_perm=None, shingle_size=None, seed=1):
+        self.threshold = Config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.shingle_size = shingle_size or Config.DEDUP_SHINGLE_SIZE
+        self.bands, self.rows = choose_bands(self.num_perm, self.threshold)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, HASH_MASK, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, HASH_MASK, size=self.num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        """MinHash signature of a shingle set"""
+        if not shingle_set:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        hashed = (np.outer(values, self._a) + self._b) % MERSENNE_PRIME
+        return hashed.min(axis=0)
+
+    def find_duplicates(self, texts):
+        """Map the index of each near-duplicate text to the index of the text it repeats
+
+        The earliest text of each group is kept as the representative.
+        """
+        shingle_sets = [shingles(text, self.shingle_size) for text in texts]
+        buckets = {}
+        duplicates = {}
+        for i, shingle_set in enumerate(shingle_sets):
+            signature = self.signature(shingle_set)
+            candidates = set()
+            keys = []
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                keys.append(key)
+                candidates.update(buckets.get(key, ()))
+
+            for j in sorted(candidates):
+                if jaccard(shingle_set, shingle_sets[j]) >= self.threshold:
+                    duplicates[i] = j
+                    break
+            else:
+                # Only representatives go into buckets, so groups do not chain
+                for key in keys:
+                    buckets.setdefault(key, []).append(i)
+        return duplicates
+
+def deduplicate_chunks(texts, metadatas, threshold=None):
+    """Drop near-duplicate chunks within each source, keeping the first occurrence
+
+    Chunks are only merged with chunks of the same source PDF. Merging across
+    PDFs would leave the passage in one PDF's vectors only, and deleting that
+    PDF would remove it from search while other PDFs still contain it. The
+    kept chunk records how many copies were merged into it.
+
+    Returns:
+        tuple: (texts, metadatas, report)
+    """
+    deduplicator = MinHashDeduplicator(threshold=threshold)
+    by_source = {}
+    for i, metadata in enumerate(metadatas):
+        by_source.setdefault(metadata.get("source"), []).append(i)
+
+    duplicates = {}
+    for indices in by_source.values():
+        found = deduplicator.find_duplicates([texts[i] for i in indices])
+        duplicates.update({indices[duplicate]: indices[representative] for duplicate, representative in found.items()})
+
+    merged = {}
+    for duplicate, representative in duplicates.items():
+        merged.setdefault(representative, []).append(duplicate)
+
+    kept_texts = []
+    kept_metadatas = []
+    for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+        if i in duplicates:
+            continue
+        if i in merged:
+            metadata = dict(metadata)
+            metadata["duplicates"] = len(merged[i])
+        kept_texts.append(text)
+        kept_metadatas.append(metadata)
+
+    removed_text_bytes = sum(len(texts[i].encode("utf-8")) for i in duplicates)
+    total_text_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    removed_bytes = len(duplicates) * VECTOR_BYTES + removed_text_bytes
+    total_bytes = len(texts) * VECTOR_BYTES + total_text_bytes
+    report = {
+        "input_chunks": len(texts),
+        "kept_chunks": len(kept_texts),
+        "removed_chunks": len(duplicates),
+        "threshold": deduplicator.threshold,
+        "saved_bytes": removed_bytes,
+        "saved_percent": round(100.0 * removed_bytes / total_bytes, 1) if total_bytes else 0.0
+    }
+    print(f"Deduplication removed {report['removed_chunks']}/{report['input_chunks']} chunks "
+          f"(Jaccard >= {report['threshold']}), saving ~{removed_bytes / 1024:.1f} KB "
+          f"({report['saved_percent']}% of the index)")
+    return kept_texts, kept_metadatas, report
@@ -0,0 +1,246 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config.config import Config
+from utils.file_lock import file_lock
+
+DIGEST_BYTES = 16
+
+def normalize_text(text):
+    """Normalize chunk text so cosmetic whitespace changes still hit the cache"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def make_key(model_name, text):
+    """Cache key for a (model, normalized text) pair"""
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Persistent embedding cache shared by every worker through memory-mapped files
+
+    Vectors live in a fixed-capacity float32 memmap organized as a
+    set-associative cache: a key can only occupy one of WAYS slots of the
+    set its hash selects. Parallel arrays hold each slot's key digest and
+    last-use time, and the least recently used slot of a full set is
+    replaced. All state is in those files, so gunicorn workers see each
+    other's entries as soon as they are written. Lookups hold a shared file
+    lock and writes an exclusive one, so a vector and its digest always
+    change together.
+    """
+
+    WAYS = 8
+
+    def __init__(self, directory=None, dimension=384, max_mb=None):
+        self.directory = directory or Config.EMBEDDING_CACHE_DIR
+        self.dimension = dimension
+        max_mb = max_mb or Config.EMBEDDING_CACHE_MAX_MB
+        slots = max(int(max_mb * 1024 * 1024) // (dimension * 4), self.WAYS)
+        self.sets = slots // self.WAYS
+        self.capacity = self.sets * self.WAYS
+        self.layout_path = os.path.join(self.directory, "layout.json")
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self.reset_stats()
+        self._open()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def new_stats():
+        """Counters a caller passes to get_many/put_many to see only its own lookups"""
+        return {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, stats, name, amount=1):
+        # Called under self._lock
+        setattr(self, name, getattr(self, name) + amount)
+        if stats is not None:
+            stats[name] += amount
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        layout = {"capacity": self.capacity, "dimension": self.dimension, "ways": self.WAYS}
+        paths = {name: os.path.join(self.directory, name) for name in ("vectors.f32", "digests.bin", "ticks.u64")}
+        with file_lock(self.layout_path):
+            stored = None
+            if os.path.exists(self.layout_path):
+                try:
+                    with open(self.layout_path, "r", encoding="utf-8") as f:
+                        stored = json.load(f)
+                except Exception as e:
+                    print(f"Error reading embedding cache layout, starting empty: {str(e)}")
+            # A change of capacity, dimension or associativity invalidates the files
+            create = stored != layout or not all(os.path.exists(path) for path in paths.values())
+            if create:
+                # New files are renamed into place, so processes still mapping
+                # the old ones keep valid (if orphaned) mappings
+                for path, dtype, shape in (
+                    (paths["vectors.f32"], np.float32, (self.capacity, self.dimension)),
+                    (paths["digests.bin"], f"S{DIGEST_BYTES}", (self.capacity,)),
+                    (paths["ticks.u64"], np.uint64, (self.capacity,)),
+                ):
+                    np.memmap(path + ".tmp", dtype=dtype, mode="w+", shape=shape).flush()
+                    os.replace(path + ".tmp", path)
+                with open(self.layout_path, "w", encoding="utf-8") as f:
+                    json.dump(layout, f)
+                # Slot index of the earlier per-process layout
+                legacy_index = os.path.join(self.directory, "index.json")
+                if os.path.exists(legacy_index):
+                    os.remove(legacy_index)
+            self.vectors = np.memmap(paths["vectors.f32"], dtype=np.float32, mode="r+",
+                                     shape=(self.capacity, self.dimension))
+            self.digests = np.memmap(paths["digests.bin"], dtype=f"S{DIGEST_BYTES}", mode="r+",
+                                     shape=(self.capacity,))
+            self.ticks = np.memmap(paths["ticks.u64"], dtype=np.uint64, mode="r+",
+                                   shape=(self.capacity,))
+        print(f"Embedding cache: {self._entry_count()}/{self.capacity} entries in {self.directory}")
+
+    def _entry_count(self):
+        return int(np.count_nonzero(self.digests != b""))
+
+    @staticmethod
+    def _digest(key):
+        # Fixed-width numpy byte strings drop trailing NULs, so compare without them
+        return bytes.fromhex(key)[:DIGEST_BYTES].rstrip(b"\0")
+
+    def _set_range(self, key):
+        # Bytes after the stored digest pick the set
+        start = int(key[2 * DIGEST_BYTES:2 * DIGEST_BYTES + 16], 16) % self.sets * self.WAYS
+        return start, start + self.WAYS
+
+    def _find(self, key):
+        start, end = self._set_range(key)
+        matches = np.flatnonzero(self.digests[start:end] == self._digest(key))
+        return start + int(matches[0]) if len(matches) else None
+
+    def get_many(self, keys, stats=None):
+        """Look up vectors for keys
+
+        Args:
+            keys: Cache keys from make_key
+            stats: Optional dict from new_stats() that also counts these lookups
+
+        Returns:
+            dict: key -> vector (list of floats) for the keys that hit
+        """
+        found = {}
+        with self._lock, file_lock(self.layout_path, shared=True):
+            now = time.time_ns()
+            for key in keys:
+                slot = self._find(key)
+                if slot is not None:
+                    # Last-use times only steer eviction; a lost update is harmless
+                    self.ticks[slot] = now
+                    found[key] = self.vectors[slot].tolist()
+            self._count(stats, "hits", len(found))
+            self._count(stats, "misses", len(keys) - len(found))
+        return found
+
+    def put_many(self, items, stats=None):
+        """Store (key, vector) pairs, counting evictions in stats if given"""
+        with self._lock, file_lock(self.layout_path):
+            now = time.time_ns()
+            for key, vector in items:
+                if self._find(key) is not None:
+                    continue
+                start, end = self._set_range(key)
+                empty = np.flatnonzero(self.digests[start:end] == b"")
+                if len(empty):
+                    slot = start + int(empty[0])
+                else:
+                    slot = start + int(np.argmin(self.ticks[start:end]))
+                    self._count(stats, "evictions")
+                self.vectors[slot] = vector
+                self.digests[slot] = self._digest(key)
+                self.ticks[slot] = now
+                self._dirty += 1
+
+    def flush(self):
+        """Write changed pages to disk; other workers already see them"""
+        with self._lock, file_lock(self.layout_path):
+            if not self._dirty:
+                return
+            self.vectors.flush()
+            self.digests.flush()
+            self.ticks.flush()
+            self._dirty = 0
+
+    def report(self, stats=None):
+        """Hit-rate statistics of the given counters, or of this process since the last reset"""
+        if stats is None:
+            with self._lock:
+                stats = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            "evictions": stats["evictions"],
+            "entries": self._entry_count(),
+            "capacity": self.capacity
+        }
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that consults the persistent cache before the model"""
+
+    def __init__(self, embeddings, model_name, cache=None, flush_every=1000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or get_embedding_cache()
+        self.flush_every = flush_every
+
+    def embed_documents(self, texts: List[str], stats=None) -> List[List[float]]:
+        """Embed texts, counting cache hits in stats (see EmbeddingCache.new_stats) if given"""
+        keys = [make_key(self.model_name, text) for text in texts]
+        found = self.cache.get_many(keys, stats=stats)
+
+        # Encode each distinct missing key once
+        first_index = {}
+        for i, key in enumerate(keys):
+            if key not in found:
+                first_index.setdefault(key, i)
+        missing = list(first_index.values())
+        if missing:
+            vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            new_items = [(keys[i], vector) for i, vector in zip(missing, vectors)]
+            self.cache.put_many(new_items, stats=stats)
+            found.update(new_items)
+            if self.cache._dirty >= self.flush_every:
+                self.cache.flush()
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = make_key(self.model_name, text)
+        found = self.cache.get_many([key])
+        if key in found:
+            return found[key]
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many([(key, vector)])
+        # Batch the index writes; the rest is flushed at rebuild end or exit
+        if self.cache._dirty >= self.flush_every:
+            self.cache.flush()
+        return vector
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Get the process-wide embedding cache"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+                atexit.register(_embedding_cache.flush)
+    return _embedding_cache
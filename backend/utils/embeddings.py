@@ -0,0 +1,185 @@
+import os
+import threading
+from typing import List
+from langchain_core.embeddings import Embeddings
+from config.config import Config
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256  # Same truncation as the sentence-transformers model
+
+class OnnxEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 embeddings served by an int8-quantized ONNX model
+
+    Produces mean-pooled, L2-normalized vectors that match the PyTorch
+    sentence-transformers output, without importing torch at runtime.
+    """
+
+    def __init__(self, model_dir=None, batch_size=None, num_threads=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir or Config.ONNX_MODEL_DIR
+        self.batch_size = batch_size or Config.EMBED_BATCH_SIZE
+        model_path = os.path.join(self.model_dir, "model_quantized.onnx")
+        tokenizer_path = os.path.join(self.model_dir, "tokenizer.json")
+        if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+            raise FileNotFoundError(
+                f"ONNX model not found in {self.model_dir}. "
+                f"Run 'python -m utils.embeddings export' to create it."
+            )
+
+        options = onnxruntime.SessionOptions()
+        num_threads = num_threads if num_threads is not None else Config.ONNX_THREADS
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        print(f"Loaded quantized ONNX embeddings from {self.model_dir}")
+
+    def _encode(self, texts):
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+class SerializedEmbeddings(Embeddings):
+    """Run one encode at a time on a shared model
+
+    Fast tokenizers raise "Already borrowed" when one instance is used from
+    several threads at once, and the model already spreads each batch over
+    all cores, so concurrent requests queue here instead of racing.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            return self.embeddings.embed_query(text)
+
+_embeddings_model = None
+_embeddings_model_lock = threading.Lock()
+
+def get_embeddings_model():
+    """Get the process-wide embeddings model for the configured backend
+
+    The model (and torch, for the default backend) is loaded on first use
+    and shared by every caller afterwards.
+    """
+    global _embeddings_model
+    if _embeddings_model is None:
+        with _embeddings_model_lock:
+            if _embeddings_model is None:
+                _embeddings_model = _load_embeddings_model()
+    return _embeddings_model
+
+def _load_embeddings_model():
+    backend = Config.EMBEDDING_BACKEND.lower()
+
+    if backend == "onnx":
+        # Quantized ONNX export of the same MiniLM model, no torch at runtime
+        print("Using quantized ONNX MiniLM embeddings for vector storage")
+        embeddings = OnnxEmbeddings()
+    else:
+        # Default: PyTorch sentence-transformers model
+        from langchain_huggingface import HuggingFaceEmbeddings
+        print("Using HuggingFace embeddings (free) for vector storage")
+        embeddings = HuggingFaceEmbeddings(
+            model_name=MODEL_NAME,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True, 'batch_size': Config.EMBED_BATCH_SIZE}
+        )
+    embeddings = SerializedEmbeddings(embeddings)
+
+    if Config.EMBEDDING_CACHE_ENABLED:
+        # Unchanged chunks and repeated queries skip model inference
+        from utils.embedding_cache import CachedEmbeddings
+        return CachedEmbeddings(embeddings, model_name=f"{MODEL_NAME}:{backend}")
+    return embeddings
+
+def export_onnx_model(output_dir=None, model_name=MODEL_NAME):
+    """Export the sentence-transformers model to ONNX and quantize it to int8
+
+    Needs torch and transformers, so run it once at build time rather than
+    in the serving container.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir = output_dir or Config.ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    float_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            float_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    quantized_path = os.path.join(output_dir, "model_quantized.onnx")
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+
+    tokenizer.save_pretrained(output_dir)
+    print(f"Exported int8 ONNX model to {quantized_path}")
+    return quantized_path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embedding model utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export an int8-quantized ONNX model")
+    export_parser.add_argument("--output", default=None, help="Output directory (default: ONNX_MODEL_DIR)")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_model(args.output)
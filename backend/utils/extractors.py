@@ -0,0 +1,131 @@
+import io
+import os
+import threading
+from importlib import metadata
+from config.config import Config
+
+class PdfExtractor:
+    """Extract raw text from each page of a PDF
+
+    Subclasses set `name` and implement `extract_pages`. `version` is part of
+    the extracted-text cache key, so it changes whenever the underlying
+    library does.
+    """
+
+    name = None
+
+    @property
+    def version(self):
+        return self.name
+
+    def extract_pages(self, pdf_file):
+        """Raw text of every page, in order ('' for pages without text)
+
+        Args:
+            pdf_file: Path or binary file object of the PDF
+        """
+        raise NotImplementedError
+
+class PyPDF2Extractor(PdfExtractor):
+    """Pure-Python extraction with PyPDF2 (the default)"""
+
+    name = "pypdf2"
+
+    @property
+    def version(self):
+        import PyPDF2
+        return f"pypdf2-{PyPDF2.__version__}"
+
+    def extract_pages(self, pdf_file):
+        from PyPDF2 import PdfReader
+
+        pages = []
+        for number, page in enumerate(PdfReader(pdf_file).pages, start=1):
+            try:
+                pages.append(page.extract_text() or "")
+            except Exception as e:
+                print(f"Error extracting text from page {number}: {str(e)}")
+                pages.append("")
+        return pages
+
+class PdfiumExtractor(PdfExtractor):
+    """PDFium-based extraction via pypdfium2; much faster on large documents"""
+
+    name = "pypdfium2"
+
+    @property
+    def version(self):
+        import pypdfium2  # Fails early when the library is missing
+        return f"pypdfium2-{metadata.version('pypdfium2')}"
+
+    def extract_pages(self, pdf_file):
+        import pypdfium2
+
+        source = pdf_file if isinstance(pdf_file, (str, os.PathLike)) else pdf_file.read()
+        document = pypdfium2.PdfDocument(source)
+        pages = []
+        try:
+            for number in range(len(document)):
+                page = document[number]
+                try:
+                    textpage = page.get_textpage()
+                    pages.append(textpage.get_text_range() or "")
+                    textpage.close()
+                except Exception as e:
+                    print(f"Error extracting text from page {number + 1}: {str(e)}")
+                    pages.append("")
+                finally:
+                    page.close()
+        finally:
+            document.close()
+        return pages
+
+class PdfMinerExtractor(PdfExtractor):
+    """Layout-aware extraction with pdfminer.six; slower, but keeps reading order"""
+
+    name = "pdfminer"
+
+    @property
+    def version(self):
+        import pdfminer  # Fails early when the library is missing
+        return f"pdfminer-{metadata.version('pdfminer.six')}"
+
+    def extract_pages(self, pdf_file):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        if not isinstance(pdf_file, (str, os.PathLike)):
+            pdf_file = io.BytesIO(pdf_file.read())
+        pages = []
+        for layout in extract_pages(pdf_file):
+            pages.append("".join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            ))
+        return pages
+
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (PyPDF2Extractor, PdfiumExtractor, PdfMinerExtractor)
+}
+
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+def get_extractor(name=None):
+    """Get the configured extractor, falling back to PyPDF2 if its library is missing"""
+    name = (name or Config.PDF_EXTRACTOR).lower()
+    with _extractors_lock:
+        if name in _extractors:
+            return _extractors[name]
+        extractor_class = EXTRACTORS.get(name)
+        if extractor_class is None:
+            print(f"Unknown PDF extractor '{name}', using pypdf2")
+            extractor_class = PyPDF2Extractor
+        extractor = extractor_class()
+        try:
+            extractor.version
+        except ImportError as e:
+            print(f"PDF extractor '{name}' is not installed ({str(e)}), using pypdf2")
+            extractor = PyPDF2Extractor()
+        _extractors[name] = extractor
+        return extractor
@@ -0,0 +1,29 @@
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+@contextlib.contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on path + ".lock" across processes
+
+    Gunicorn workers and their background threads use it to serialize
+    read-modify-write cycles on files they share. Each call opens its own
+    descriptor, so the lock also excludes other threads of the same process.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = path + ".lock"
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(lock_path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -1,7 +1,4 @@
 from difflib import SequenceMatcher
-from textblob import TextBlob
-from collections import defaultdict, Counter
-import datetime
 import re
 
 def similar(a, b):
@@ -63,51 +60,6 @@ def is_general_chat(text):
     
     return None
 
-def analyze_sentiment_and_topics(queries):
-    """Analyze sentiment and extract trending topics from queries"""
-    sentiment_by_date = defaultdict(list)
-    word_counter = Counter()
-    # A simple stopwords list – extend it as needed.
-    stopwords = set(["the", "is", "at", "on", "and", "a", "an", "to", "of", "in", "i", "you", "it"])
-
-    for record in queries:
-        question = record.get("question")
-        ts = record.get("timestamp")
-        if not question or not ts:
-            continue
-
-        # Convert the timestamp to date string:
-        if isinstance(ts, datetime.datetime):
-            date_str = ts.date().isoformat()
-        else:
-            date_str = str(ts).split("T")[0]
-
-        # Analyze sentiment using TextBlob
-        polarity = TextBlob(question).sentiment.polarity
-        sentiment_by_date[date_str].append(polarity)
-
-        # Count words for trending topics (do a simple word count)
-        for word in question.lower().split():
-            # Remove non-alphanumeric characters
-            word = ''.join([ch for ch in word if ch.isalnum()])
-            if word and word not in stopwords:
-                word_counter[word] += 1
-
-    # Prepare sentiment analytics: average sentiment per date
-    sentiment_analytics = []
-    for date, polarities in sentiment_by_date.items():
-        avg_sentiment = sum(polarities) / len(polarities)
-        sentiment_analytics.append({
-            "date": date,
-            "avg_sentiment": avg_sentiment,
-            "count": len(polarities)
-        })
-
-    # Get trending topics – top 5 words
-    trending_topics = word_counter.most_common(5)
-
-    return sentiment_analytics, trending_topics
-
 def format_response_data(data, convert_object_ids=True):
     """Format response data for JSON serialization"""
     if isinstance(data, list):
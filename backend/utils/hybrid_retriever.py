@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.keyword_index import chunk_key
+
+class HybridRetriever(BaseRetriever):
+    """Retriever fusing dense vector search with BM25 keyword search
+
+    Both result lists are merged with reciprocal rank fusion, so exact
+    matches on course codes and form names can surface even when the
+    embedding similarity is weak.
+    """
+
+    vectorstore: Any = None
+    keyword_index: Any = None
+    namespace: Optional[str] = None
+    k: int = 10
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _dense_results(self, query):
+        if self.vectorstore is None:
+            return []
+        try:
+            return self.vectorstore.similarity_search(query, k=self.fetch_k, namespace=self.namespace)
+        except Exception as e:
+            print(f"Dense retrieval failed, using keyword results only: {str(e)}")
+            return []
+
+    async def _adense_results(self, query):
+        if self.vectorstore is None:
+            return []
+        try:
+            return await self.vectorstore.asimilarity_search(query, k=self.fetch_k, namespace=self.namespace)
+        except Exception as e:
+            print(f"Dense retrieval failed, using keyword results only: {str(e)}")
+            return []
+
+    def _keyword_results(self, query):
+        if self.keyword_index is None:
+            return []
+        try:
+            return [
+                Document(page_content=text, metadata=metadata)
+                for _, _, text, metadata in self.keyword_index.search(query, k=self.fetch_k)
+            ]
+        except Exception as e:
+            print(f"Keyword retrieval failed, using dense results only: {str(e)}")
+            return []
+
+    def fuse(self, *ranked_lists):
+        """Merge ranked document lists with reciprocal rank fusion"""
+        scores = {}
+        documents = {}
+        for ranked in ranked_lists:
+            for rank, doc in enumerate(ranked):
+                key = chunk_key(doc.metadata, doc.page_content)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                documents.setdefault(key, doc)
+        best = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        return [documents[key] for key in best]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.fuse(self._dense_results(query), self._keyword_results(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # The two searches are independent: BM25 runs in a thread while Pinecone is queried
+        dense, keyword = await asyncio.gather(
+            self._adense_results(query),
+            asyncio.to_thread(self._keyword_results, query)
+        )
+        return self.fuse(dense, keyword)
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from config.config import Config
+from utils.file_lock import file_lock
+
+# Keeps codes such as "cs-301", "16a" or "b.tech" together as one token
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = set([
+    "the", "is", "at", "on", "and", "a", "an", "to", "of", "in", "i", "you", "it",
+    "for", "be", "are", "was", "what", "how", "when", "where", "which", "who", "do",
+    "does", "can", "my", "me", "with", "by", "or", "as", "this", "that", "from"
+])
+
+def tokenize(text):
+    """Tokenize text for keyword search
+
+    Compound terms are indexed both whole and by their parts, so "CS-301"
+    matches queries for "CS-301", "cs 301" and "301".
+    """
+    terms = []
+    for term in TERM_PATTERN.findall(text.lower()):
+        parts = PART_PATTERN.findall(term)
+        if len(parts) > 1:
+            terms.append(term)
+            terms.append("".join(parts))
+        terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+def chunk_key(metadata, text=""):
+    """Build the stable chunk ID shared by the vector store and keyword index"""
+    metadata = metadata or {}
+    if metadata.get("source") and metadata.get("chunk_id") is not None:
+        return f"{metadata['source']}#{metadata['chunk_id']}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class _IndexState:
+    """Documents, postings and per-source doc ids of one version of the index
+
+    A published state is never changed. Writers call fork() and change the
+    copy, which copies each posting list or source set before its first
+    change, then publish it by swapping the reference. Searches can
+    therefore score a state without holding any lock.
+    """
+
+    def __init__(self):
+        self.documents = {}   # doc_id -> {"text", "metadata", "length"}
+        self.postings = {}    # term -> {doc_id: term frequency}
+        self.sources = {}     # source -> set of doc_ids
+        self.total_length = 0
+        self._owned_terms = None
+        self._owned_sources = None
+
+    def fork(self):
+        """Copy for a writer; nested containers are copied on first change"""
+        state = _IndexState()
+        state.documents = dict(self.documents)
+        state.postings = dict(self.postings)
+        state.sources = dict(self.sources)
+        state.total_length = self.total_length
+        state._owned_terms = set()
+        state._owned_sources = set()
+        return state
+
+    def _postings_for(self, term):
+        postings = self.postings.get(term)
+        if postings is None:
+            postings = self.postings[term] = {}
+        elif self._owned_terms is not None and term not in self._owned_terms:
+            postings = self.postings[term] = dict(postings)
+        if self._owned_terms is not None:
+            self._owned_terms.add(term)
+        return postings
+
+    def _source_ids(self, source):
+        doc_ids = self.sources.get(source)
+        if doc_ids is None:
+            doc_ids = self.sources[source] = set()
+        elif self._owned_sources is not None and source not in self._owned_sources:
+            doc_ids = self.sources[source] = set(doc_ids)
+        if self._owned_sources is not None:
+            self._owned_sources.add(source)
+        return doc_ids
+
+    def add(self, doc_id, text, metadata):
+        if doc_id in self.documents:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self.documents[doc_id] = {"text": text, "metadata": metadata, "length": length}
+        self.total_length += length
+        for term, tf in terms.items():
+            self._postings_for(term)[doc_id] = tf
+        source = metadata.get("source")
+        if source:
+            self._source_ids(source).add(doc_id)
+
+    def remove(self, doc_id):
+        doc = self.documents.pop(doc_id, None)
+        if not doc:
+            return
+        self.total_length -= doc["length"]
+        for term in set(tokenize(doc["text"])):
+            if term in self.postings:
+                postings = self._postings_for(term)
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        source = doc["metadata"].get("source")
+        if source in self.sources:
+            doc_ids = self._source_ids(source)
+            doc_ids.discard(doc_id)
+            if not doc_ids:
+                del self.sources[source]
+
+class KeywordIndex:
+    """BM25 inverted index over ingested chunks, persisted as JSON
+
+    Every change reloads the file, applies itself and saves under a file
+    lock, so gunicorn workers and indexing threads updating the same index
+    do not overwrite each other's changes. Changes build a new state and
+    swap it in, so searches only lock to check for a newer file.
+    """
+
+    def __init__(self, path=None, k1=1.5, b=0.75):
+        self.path = path or Config.KEYWORD_INDEX_PATH
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded_version = None
+        self._state = _IndexState()
+        self.load()
+
+    @property
+    def documents(self):
+        return self._state.documents
+
+    @property
+    def sources(self):
+        return self._state.sources
+
+    def __len__(self):
+        return len(self._state.documents)
+
+    def load(self):
+        """Load the index from disk if a saved copy exists"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                state = _IndexState()
+                for doc_id, doc in data.get("documents", {}).items():
+                    state.add(doc_id, doc["text"], doc["metadata"])
+                self._state = state
+                self._loaded_version = self._file_version()
+                print(f"Loaded keyword index with {len(state.documents)} chunks")
+            except Exception as e:
+                print(f"Error loading keyword index: {str(e)}")
+
+    def save(self):
+        """Persist the index atomically"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = self.path + ".tmp"
+            documents = {
+                doc_id: {"text": doc["text"], "metadata": doc["metadata"]}
+                for doc_id, doc in self._state.documents.items()
+            }
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"documents": documents}, f)
+            os.replace(temp_path, self.path)
+            self._loaded_version = self._file_version()
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload_if_changed(self):
+        """Pick up changes another worker saved to disk"""
+        with self._lock:
+            version = self._file_version()
+            if version is not None and version != self._loaded_version:
+                self.load()
+
+    def rebuild(self, texts, metadatas):
+        """Replace the whole index with the given chunks"""
+        with self._lock, file_lock(self.path):
+            state = _IndexState()
+            for text, metadata in zip(texts, metadatas):
+                state.add(chunk_key(metadata, text), text, metadata)
+            self._state = state
+            self.save()
+            print(f"Keyword index rebuilt with {len(state.documents)} chunks")
+
+    def add_documents(self, texts, metadatas):
+        """Add or replace chunks without touching the rest of the index"""
+        with self._lock, file_lock(self.path):
+            self.reload_if_changed()
+            state = self._state.fork()
+            for text, metadata in zip(texts, metadatas):
+                state.add(chunk_key(metadata, text), text, metadata)
+            self._state = state
+            self.save()
+
+    def remove_source(self, source):
+        """Remove every chunk that came from the given source document
+
+        Returns:
+            int: Number of chunks removed
+        """
+        with self._lock, file_lock(self.path):
+            self.reload_if_changed()
+            doc_ids = list(self._state.sources.get(source, []))
+            if doc_ids:
+                state = self._state.fork()
+                for doc_id in doc_ids:
+                    state.remove(doc_id)
+                self._state = state
+                self.save()
+            return len(doc_ids)
+
+    def search(self, query, k=10):
+        """Score chunks against the query with BM25
+
+        Returns:
+            list: (doc_id, score, text, metadata) tuples, best first
+        """
+        self.reload_if_changed()
+        # A published state never changes, so it is scored without the lock
+        state = self._state
+        if not state.documents:
+            return []
+
+        n_docs = len(state.documents)
+        avg_length = state.total_length / n_docs if n_docs else 0
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = state.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = state.documents[doc_id]["length"]
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length) if avg_length else self.k1
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        results = []
+        for doc_id, score in scores.most_common(k):
+            doc = state.documents[doc_id]
+            results.append((doc_id, score, doc["text"], doc["metadata"]))
+        return results
+
+_keyword_indexes = {}
+_keyword_index_lock = threading.Lock()
+
+def keyword_index_path(namespace):
+    """Path of the keyword index paired with a vector namespace"""
+    from utils.vector_namespaces import LEGACY_NAMESPACE
+    if namespace == LEGACY_NAMESPACE:
+        return Config.KEYWORD_INDEX_PATH
+    base, ext = os.path.splitext(Config.KEYWORD_INDEX_PATH)
+    return f"{base}.{namespace}{ext or '.json'}"
+
+def get_keyword_index(namespace=None):
+    """Get the process-wide keyword index for a namespace (the active one by default)
+
+    Each vector namespace has its own keyword index, so switching the active
+    namespace swaps both indexes at once.
+    """
+    if namespace is None:
+        from utils.vector_namespaces import get_active_namespace
+        namespace = get_active_namespace()
+    index = _keyword_indexes.get(namespace)
+    if index is None:
+        with _keyword_index_lock:
+            index = _keyword_indexes.get(namespace)
+            if index is None:
+                index = KeywordIndex(path=keyword_index_path(namespace))
+                _keyword_indexes[namespace] = index
+    return index
+
+def discard_keyword_index(namespace):
+    """Forget and delete the keyword index of a dropped namespace"""
+    with _keyword_index_lock:
+        _keyword_indexes.pop(namespace, None)
+    path = keyword_index_path(namespace)
+    for stale in (path, path + ".lock"):
+        if os.path.exists(stale):
+            os.remove(stale)
@@ -0,0 +1,60 @@
+import threading
+import warnings
+from config.config import Config
+
+# Chat model clients by (provider, model, temperature). A client holds an HTTP
+# connection pool and is safe to share between request threads, so one per
+# process is reused instead of opening new connections for every query.
+_chat_models = {}
+_chat_models_lock = threading.Lock()
+
+def get_chat_model(model_name=None, temperature=0.3):
+    """Shared chat model client for the configured provider, importing its SDK on first use"""
+    if not Config.GROQ_API_KEY:
+        raise ValueError("No AI provider configured. Please set GROQ_API_KEY.")
+    model_name = model_name or Config.GROQ_MODEL
+    key = ("groq", model_name, temperature)
+    model = _chat_models.get(key)
+    if model is None:
+        with _chat_models_lock:
+            model = _chat_models.get(key)
+            if model is None:
+                from langchain_groq import ChatGroq
+                print(f"Using Groq AI with model: {model_name}")
+                model = ChatGroq(
+                    groq_api_key=Config.GROQ_API_KEY,
+                    model_name=model_name,
+                    temperature=temperature,
+                    max_tokens=2048,
+                    timeout=Config.GROQ_TIMEOUT,
+                    max_retries=3
+                )
+                _chat_models[key] = model
+    return model
+
+def reset_chat_models():
+    """Forget the shared clients so a forked worker opens its own connections"""
+    with _chat_models_lock:
+        _chat_models.clear()
+
+def new_conversation_memory():
+    """Empty per-session conversation memory"""
+    from langchain_classic.memory import ConversationBufferMemory
+    # Suppress the deprecation warning for memory
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ConversationBufferMemory(
+            memory_key='chat_history',
+            return_messages=True
+        )
+
+def build_conversation_chain(llm, retriever, memory, template):
+    """Retrieval-augmented conversation chain answering with the given prompt template"""
+    from langchain_classic.chains import ConversationalRetrievalChain
+    from langchain_core.prompts.chat import ChatPromptTemplate
+    return ConversationalRetrievalChain.from_llm(
+        llm=llm,
+        retriever=retriever,
+        memory=memory,
+        combine_docs_chain_kwargs={"prompt": ChatPromptTemplate.from_template(template)}
+    )
@@ -0,0 +1,45 @@
+import os
+
+# Fields of /proc/<pid>/smaps_rollup reported, in kB
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+def process_memory(pid=None):
+    """Memory of a process in MB, split into shared and private pages (Linux only)
+
+    Pss (proportional set size) charges each shared page to the processes
+    sharing it in equal parts, so summing Pss over the gunicorn master and
+    its workers gives the real footprint of the deployment, which summing
+    Rss would overstate.
+
+    Returns:
+        dict: Field name (lowercase) -> MB, or {"error": ...} when unavailable
+    """
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError as e:
+        return {"error": f"smaps_rollup is not available: {str(e)}"}
+
+    memory = {"pid": pid}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(":") in SMAPS_FIELDS:
+            memory[parts[0].rstrip(":").lower()] = round(int(parts[1]) / 1024, 1)
+    return memory
+
+def child_pids(pid):
+    """PIDs of the direct children of a process, e.g. gunicorn's workers"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # The command name can contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
@@ -0,0 +1,80 @@
+import base64
+import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from config.config import Config
+
+# Newest first; _id breaks ties between entries with the same timestamp
+KEYSET_SORT = [("timestamp", -1), ("_id", -1)]
+
+def encode_cursor(document):
+    """Opaque cursor pointing just past a document in KEYSET_SORT order"""
+    raw = f"{document['timestamp'].isoformat()}|{document['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """(timestamp, _id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        timestamp, object_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except (ValueError, UnicodeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+def after_cursor(cursor):
+    """Filter for the documents after a cursor in KEYSET_SORT order"""
+    timestamp, object_id = decode_cursor(cursor)
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "_id": {"$lt": object_id}}
+    ]}
+
+def _parse_date(value, end_of_day=False):
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {value}") from e
+    if end_of_day and len(value) == 10:
+        # A bare YYYY-MM-DD as the upper bound includes that whole day
+        parsed += datetime.timedelta(days=1)
+    return parsed
+
+def parse_page_params(args):
+    """Page size, cursor and date range from request query arguments
+
+    Accepts limit, cursor, from and to (YYYY-MM-DD or ISO datetime, UTC).
+
+    Returns:
+        dict: limit, cursor, start, end (start/end None when not given)
+
+    Raises:
+        ValueError: On a malformed value, with a message for the client
+    """
+    try:
+        limit = int(args.get("limit") or Config.HISTORY_PAGE_SIZE)
+    except ValueError as e:
+        raise ValueError("limit must be a number") from e
+    cursor = args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor)
+    return {
+        "limit": max(1, min(limit, Config.HISTORY_MAX_PAGE_SIZE)),
+        "cursor": cursor,
+        "start": _parse_date(args["from"]) if args.get("from") else None,
+        "end": _parse_date(args["to"], end_of_day=True) if args.get("to") else None
+    }
+
+def range_filter(query, start=None, end=None):
+    """Add a [start, end) timestamp range to a filter"""
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lt"] = end
+    return query
+
+def page_result(documents, limit):
+    """Split a limit + 1 fetch into the page and the cursor of the next one"""
+    page = documents[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(documents) > limit else None
+    return page, next_cursor
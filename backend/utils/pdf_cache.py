@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import requests
+from config.config import Config
+from utils.file_lock import file_lock
+
+class PdfCache:
+    """Content-addressed local cache of Cloudinary PDFs
+
+    Blobs are stored once per sha256 under blobs/, and a JSON index maps each
+    public_id to the blob, Cloudinary version and HTTP validators. A listing
+    whose version matches the index is served without any network request;
+    otherwise the download is revalidated with If-None-Match/If-Modified-Since
+    so an unchanged file costs a 304 instead of a full transfer. Every read
+    re-checks the blob's sha256, and blobs are evicted least recently used
+    once the cache grows past PDF_CACHE_MAX_MB.
+
+    Downloads run without any lock. Index updates hold the thread lock and a
+    file lock on index.json, and reload the index first, so workers sharing
+    the directory never overwrite each other's entries.
+    """
+
+    def __init__(self, directory=None, max_mb=None):
+        self.directory = directory or Config.PDF_CACHE_DIR
+        self.max_bytes = int((max_mb or Config.PDF_CACHE_MAX_MB) * 1024 * 1024)
+        self.blob_dir = os.path.join(self.directory, "blobs")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self._lock = threading.RLock()
+        self._loaded_version = None
+        self.entries = {}
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "student-chatbot-pdf-cache"})
+        self.reset_stats()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        with self._lock, file_lock(self.index_path):
+            self._load()
+            self._remove_orphan_blobs()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+            self._loaded_version = self._index_version()
+        except Exception as e:
+            print(f"Error reading PDF cache index, starting empty: {str(e)}")
+            self.entries = {}
+
+    def _index_version(self):
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _reload_if_changed(self):
+        # Another worker may have added or evicted entries
+        version = self._index_version()
+        if version is not None and version != self._loaded_version:
+            self._load()
+
+    def _save(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f)
+        os.replace(temp_path, self.index_path)
+        self._loaded_version = self._index_version()
+
+    def _remove_orphan_blobs(self):
+        """Delete blobs no entry refers to, so they do not escape the size bound"""
+        referenced = {f"{entry['sha256']}.pdf" for entry in self.entries.values()}
+        removed = 0
+        for name in os.listdir(self.blob_dir):
+            if name not in referenced:
+                try:
+                    os.remove(os.path.join(self.blob_dir, name))
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            print(f"Removed {removed} unreferenced blobs from the PDF cache")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.pdf")
+
+    @staticmethod
+    def _sha256(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _verified_path(self, public_id):
+        """Path of a cached blob whose checksum still matches, else None"""
+        entry = self.entries.get(public_id)
+        if not entry:
+            return None
+        path = self._blob_path(entry["sha256"])
+        if os.path.exists(path) and self._sha256(path) == entry["sha256"]:
+            return path
+        print(f"PDF cache entry for {public_id} is missing or corrupt, refetching")
+        self.entries.pop(public_id, None)
+        self._remove_blob_if_unused(entry["sha256"])
+        self._save()
+        return None
+
+    def _remove_blob_if_unused(self, digest):
+        if any(entry["sha256"] == digest for entry in self.entries.values()):
+            return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _touch(self, public_id):
+        self.entries[public_id]["last_used"] = time.time()
+
+    def _evict(self, keep=None):
+        # Blobs are shared between public_ids with identical content
+        blob_sizes = {entry["sha256"]: entry["size"] for entry in self.entries.values()}
+        total = sum(blob_sizes.values())
+        if total <= self.max_bytes:
+            return
+        for public_id, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if public_id == keep:
+                continue
+            del self.entries[public_id]
+            if not any(other["sha256"] == entry["sha256"] for other in self.entries.values()):
+                total -= entry["size"]
+                self._remove_blob_if_unused(entry["sha256"])
+            print(f"Evicted {public_id} from the PDF cache")
+
+    def _store(self, public_id, source_path, version=None, etag=None, last_modified=None, url=None):
+        """Move or copy a file into the blob store and index it under public_id"""
+        digest = self._sha256(source_path)
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.replace(source_path, blob_path)
+        elif os.path.abspath(source_path) != os.path.abspath(blob_path):
+            os.remove(source_path)
+
+        previous = self.entries.get(public_id)
+        self.entries[public_id] = {
+            "sha256": digest,
+            "size": os.path.getsize(blob_path),
+            "version": version,
+            "etag": etag,
+            "last_modified": last_modified,
+            "url": url,
+            "last_used": time.time()
+        }
+        if previous and previous["sha256"] != digest:
+            self._remove_blob_if_unused(previous["sha256"])
+        self._evict(keep=public_id)
+        self._save()
+        return blob_path
+
+    def put(self, public_id, pdf_file, version=None, etag=None, url=None):
+        """Add a local file (e.g. a just-uploaded PDF) to the cache without moving it
+
+        Args:
+            pdf_file: Local path or binary stream positioned at the start
+
+        Returns:
+            str: Path of the cached blob
+        """
+        with tempfile.NamedTemporaryFile(delete=False, dir=self.directory, suffix=".part") as temp:
+            if isinstance(pdf_file, (str, os.PathLike)):
+                with open(pdf_file, "rb") as source:
+                    shutil.copyfileobj(source, temp)
+            else:
+                shutil.copyfileobj(pdf_file, temp)
+        with self._lock, file_lock(self.index_path):
+            self._reload_if_changed()
+            return self._store(public_id, temp.name, version=version, etag=etag, url=url)
+
+    def invalidate(self, public_id):
+        """Drop a public_id, e.g. after the PDF was deleted"""
+        with self._lock, file_lock(self.index_path):
+            self._reload_if_changed()
+            entry = self.entries.pop(public_id, None)
+            if entry:
+                self._remove_blob_if_unused(entry["sha256"])
+                self._save()
+
+    def fetch(self, resource):
+        """Get a local path for a Cloudinary PDF resource
+
+        Args:
+            resource: Resource dict with public_id, secure_url/url and version
+
+        Returns:
+            str: Path of the verified cached file; callers must not modify it
+        """
+        public_id = resource.get("public_id")
+        url = resource.get("secure_url", resource.get("url"))
+        version = resource.get("version")
+
+        with self._lock, file_lock(self.index_path):
+            self._reload_if_changed()
+            path = self._verified_path(public_id)
+            entry = dict(self.entries[public_id]) if path else None
+
+            # Same Cloudinary version: no network request at all
+            if path and version is not None and entry.get("version") == version:
+                self.hits += 1
+                self._touch(public_id)
+                return path
+
+        # The download runs unlocked so other fetches and previews are not held up
+        headers = {}
+        if path and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if path and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(url, headers=headers, stream=True, timeout=60)
+        if path and response.status_code == 304:
+            response.close()
+            with self._lock, file_lock(self.index_path):
+                self._reload_if_changed()
+                current = self.entries.get(public_id)
+                # Still the blob we revalidated, unless another worker changed it meanwhile
+                if current and current["sha256"] == entry["sha256"] and os.path.exists(path):
+                    self.revalidated += 1
+                    current["version"] = version if version is not None else current.get("version")
+                    self._touch(public_id)
+                    self._save()
+                    return path
+            response = self.session.get(url, stream=True, timeout=60)
+        response.raise_for_status()
+
+        temp = tempfile.NamedTemporaryFile(delete=False, dir=self.directory, suffix=".part")
+        try:
+            with temp:
+                for block in response.iter_content(chunk_size=65536):
+                    if block:
+                        temp.write(block)
+            size = os.path.getsize(temp.name)
+            if size == 0:
+                raise Exception("Downloaded file is empty")
+            with self._lock, file_lock(self.index_path):
+                self._reload_if_changed()
+                self.downloads += 1
+                self.bytes_downloaded += size
+                return self._store(
+                    public_id, temp.name,
+                    version=version,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    url=url
+                )
+        except Exception:
+            if os.path.exists(temp.name):
+                os.remove(temp.name)
+            raise
+
+    def report(self):
+        """Transfer statistics since the last reset"""
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "bytes_downloaded": self.bytes_downloaded,
+            "entries": len(self.entries)
+        }
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+def get_pdf_cache():
+    """Get the process-wide PDF cache"""
+    global _pdf_cache
+    if _pdf_cache is None:
+        with _pdf_cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = PdfCache()
+    return _pdf_cache
+
+def reset_pdf_cache():
+    """Drop the process-wide cache so a forked worker gets its own HTTP session"""
+    global _pdf_cache
+    with _pdf_cache_lock:
+        _pdf_cache = None
+
+def cache_uploaded_pdf(upload_result, pdf_file):
+    """Upload hook: seed the cache with the file that was just uploaded"""
+    get_pdf_cache().put(
+        upload_result["public_id"],
+        pdf_file,
+        version=upload_result.get("version"),
+        etag=upload_result.get("etag"),
+        url=upload_result.get("secure_url", upload_result.get("url"))
+    )
+    return {"cached": True}
@@ -1,44 +1,27 @@
 import os
-import tempfile
-import requests
-from PyPDF2 import PdfReader
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import cloudinary
-import cloudinary.uploader
-import cloudinary.utils
-import cloudinary.api
+import time
 from config.config import Config
 from services.cloudinary_service import CloudinaryService
-
-def get_embeddings_model():
-    """Get embeddings model based on configured provider"""
-    provider = Config.AI_PROVIDER.lower()
-    
-    # Only use HuggingFace embeddings for all providers
-    print("Using HuggingFace embeddings (free) for vector storage")
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
+from utils.embeddings import get_embeddings_model
+from utils.keyword_index import chunk_key, get_keyword_index
+from utils.vector_store import create_vector_store, ensure_index, get_index, list_index_names
+from utils.vector_writer import VectorStoreWriter
 
 def get_pdf_text(pdf_docs):
     """Extract text from PDF documents"""
+    from utils.extractors import get_extractor
+    
+    extractor = get_extractor()
     text = ""
     for pdf in pdf_docs:
         try:
-            pdf_reader = PdfReader(pdf)
+            pages = extractor.extract_pages(pdf)
             # Skip if PDF has no pages
-            if len(pdf_reader.pages) == 0:
+            if len(pages) == 0:
                 print(f"Skipping empty PDF: {pdf}")
                 continue
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+            for page_text in pages:
+                text += page_text
         except Exception as e:
             print(f"Error reading PDF {pdf}: {str(e)}")
             continue
@@ -46,6 +29,8 @@ def get_pdf_text(pdf_docs):
 
 def get_text_chunks(text, source=None):
     """Split text into chunks for processing with metadata"""
+    from langchain_text_splitters import CharacterTextSplitter
+    
     text_splitter = CharacterTextSplitter(
         separator="\n",
         chunk_size=1000,
@@ -87,168 +72,233 @@ def sanitize_chunks(chunks):
     
     return sanitized_chunks
 
+def sanitize_chunks_with_metadata(text_chunks, metadatas):
+    """Sanitize chunks one by one so metadata stays aligned with the surviving chunks"""
+    clean_chunks = []
+    clean_metadatas = []
+    for chunk, metadata in zip(text_chunks, metadatas):
+        cleaned = sanitize_chunks([chunk])
+        if cleaned:
+            clean_chunks.append(cleaned[0])
+            clean_metadatas.append(metadata)
+    return clean_chunks, clean_metadatas
+
 def get_vector_store(text_chunks, metadatas=None):
-    """Create Pinecone vector store from text chunks"""
-    # Initialize Pinecone with v3 API
-    pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+    """Build a fresh namespace from text chunks and switch queries over to it
+    
+    Chunks are written to a new namespace while the active one keeps serving
+    queries. The pointer is switched only after the new namespace reports the
+    expected vector count; a failed build is dropped and the active namespace
+    is left untouched.
+    """
+    from utils.vector_namespaces import (
+        new_namespace, begin_build, abort_build, wait_for_vector_count, activate_namespace
+    )
+    
+    if not metadatas or len(metadatas) != len(text_chunks):
+        metadatas = [{"source": "cloudinary_pdf", "chunk_id": str(i)} for i in range(len(text_chunks))]
     
     # Sanitize chunks to prevent encoding issues
+    clean_chunks, metadatas = sanitize_chunks_with_metadata(text_chunks, metadatas)
+    print(f"Original chunks: {len(text_chunks)}, Clean chunks: {len(clean_chunks)}")
+    
+    # Never replace the active namespace with an empty one
+    if not clean_chunks:
+        raise ValueError("No valid chunks after sanitization, keeping the active namespace")
+    
+    # Check if index exists, if not create it
+    index_name = Config.PINECONE_INDEX_NAME
+    ensure_index(index_name)
+    
+    embeddings = get_embeddings_model()
+    ids = [chunk_key(metadata, chunk) for chunk, metadata in zip(clean_chunks, metadatas)]
+    
+    namespace = new_namespace()
     try:
-        clean_chunks = sanitize_chunks(text_chunks)
-        print(f"Original chunks: {len(text_chunks)}, Clean chunks: {len(clean_chunks)}")
-        
-        # Check if we have any valid chunks after cleaning
-        if not clean_chunks:
-            print("WARNING: No valid chunks after sanitization, using default text")
-            clean_chunks = ["This is a student query chatbot for academic assistance."]
-            metadatas = [{"source": "default"}]
-        else:
-            # Always create fresh minimal metadata to avoid any size issues
-            metadatas = []
-            for i in range(len(clean_chunks)):
-                metadatas.append({
-                    "source": "cloudinary_pdf", 
-                    "chunk_id": str(i)
-                })
-        
-        # Check if index exists, if not create it
-        index_name = Config.PINECONE_INDEX_NAME
-        # Only HuggingFace embedding dimension is supported
-        dimension = 384
-        
-        # Check if the index already exists
-        indexes = [idx.name for idx in pc.list_indexes()]
-        if index_name not in indexes:
-            print(f"Creating Pinecone index: {index_name}")
-            pc.create_index(
-                name=index_name,
-                dimension=dimension,
-                metric="cosine"
-            )
-        
-        # Create embeddings with retry logic
-        embeddings = get_embeddings_model()
-        
-        # Create and return the vector store
-        print(f"Creating vector store from {len(clean_chunks)} chunks")
-        vectorstore = PineconeVectorStore.from_texts(
-            texts=clean_chunks,
-            embedding=embeddings,
-            metadatas=metadatas if metadatas and len(metadatas) == len(clean_chunks) else None,
-            index_name=index_name,
-            namespace="course_materials"
-        )
-        
-        return vectorstore
-        
+        # Build the keyword index over the same chunks for hybrid retrieval. This
+        # happens before the namespace becomes a write target: uploads indexed
+        # during the build are then merged into it instead of being reset away
+        get_keyword_index(namespace).rebuild(clean_chunks, metadatas)
+        begin_build(namespace)
+        
+        # Encode in CPU batches and upsert in parallel batches
+        print(f"Creating vector store from {len(clean_chunks)} chunks in namespace {namespace}")
+        writer = VectorStoreWriter(embeddings, index_name=index_name, namespace=namespace)
+        writer.write(clean_chunks, metadatas, ids)
+        
+        # Uploads during the build were written here too, so wait for at least
+        # the written IDs whose PDF was not deleted in the meantime
+        vector_count = wait_for_vector_count(namespace, _prune_deleted_sources(namespace, ids))
     except Exception as e:
-        print(f"Error creating vector store: {str(e)}")
-        # Create a minimal vector store with default content
-        default_text = ["This is a student query chatbot for academic assistance."]
-        embeddings = get_embeddings_model()
-        
-        vectorstore = PineconeVectorStore.from_texts(
-            texts=default_text,
-            embedding=embeddings,
-            metadatas=[{"source": "default"}],
-            index_name=Config.PINECONE_INDEX_NAME,
-            namespace="course_materials"
-        )
-        
-        return vectorstore
+        print(f"Error building namespace {namespace}, keeping the active namespace: {str(e)}")
+        abort_build(namespace)
+        raise
+    
+    activate_namespace(namespace, vector_count)
+    return create_vector_store(embeddings, namespace=namespace, index_name=index_name)
+
+def _prune_deleted_sources(namespace, ids):
+    """Remove vectors of PDFs deleted during a rebuild from its namespace
+    
+    A delete during the build may reach the namespace before the writer
+    does, which would bring the deleted PDF back.
+    
+    Returns:
+        int: Number of written IDs that should remain
+    """
+    from utils.vector_maintenance import PLACEHOLDER_SOURCES, delete_source_vectors, source_from_vector_id
+    
+    live_sources = {resource.get("public_id") for resource in CloudinaryService().list_pdfs(refresh=True)}
+    remaining = 0
+    deleted_sources = set()
+    for vector_id in set(ids):
+        source = source_from_vector_id(vector_id)
+        if source is None or source in live_sources or source in PLACEHOLDER_SOURCES:
+            remaining += 1
+        else:
+            deleted_sources.add(source)
+    for source in deleted_sources:
+        delete_source_vectors(source, namespace=namespace)
+    return remaining
 
 def create_embeddings():
-    """Create embeddings from PDFs stored in Cloudinary"""
+    """Create embeddings from PDFs stored in Cloudinary
+    
+    Raises:
+        RuntimeError: If Cloudinary lists no PDFs or none yields text; the
+        active namespace is left as it is
+    """
     # Get all PDFs from Cloudinary
     cloudinary_service = CloudinaryService()
-    pdf_resources = cloudinary_service.list_pdfs()
+    # Rebuilds are rare; always start from a complete, current listing
+    pdf_resources = cloudinary_service.list_pdfs(refresh=True)
     
     if not pdf_resources:
-        print("No PDF resources found in Cloudinary")
-        # Create a default embedding if no PDFs are available
-        default_text = "This is a student query chatbot for academic assistance."
-        chunks = get_text_chunks(default_text)
-        
-        return get_vector_store(chunks)
-    
-    # Get URLs directly from resources
-    pdf_urls = []
-    for resource in pdf_resources:
-        # Use secure_url when available, otherwise use url
-        url = resource.get('secure_url', resource.get('url'))
-        if url:
-            pdf_urls.append(url)
-            print(f"Using URL for {resource.get('public_id')}: {url}")
-    
-    print(f"Processing {len(pdf_urls)} PDFs from Cloudinary")
-    
-    # Extract text from all PDFs
-    from utils.cloudinary_utils import get_pdf_text_from_urls
-    all_text = get_pdf_text_from_urls(pdf_urls)
-    
-    if not all_text.strip():
-        print("No text extracted from PDFs, creating default vectorstore")
-        default_text = "This is a student query chatbot for academic assistance."
-        chunks = get_text_chunks(default_text)
-        return get_vector_store(chunks)
-    
-    # Create text chunks without including text in metadata
-    # Debug the text content first
-    print(f"Total text length: {len(all_text)} characters")
-    print(f"First 100 characters: {all_text[:100]}")
-    print(f"Number of newlines: {all_text.count('\n')}")
-    
-    # Force chunking by length if needed
-    chunks = []
-    if len(all_text) > 5000:  # If text is very long
-        # Manual chunking by fixed size
-        chunk_size = 800  # Smaller chunks to be safe
-        for i in range(0, len(all_text), chunk_size):
-            chunk = all_text[i:i+chunk_size]
-            if chunk.strip():  # Only add non-empty chunks
-                chunks.append(chunk)
-        print(f"Manually created {len(chunks)} chunks")
-    else:
-        # Try standard chunking for shorter texts
-        text_splitter = CharacterTextSplitter(
-            separator="\n",
-            chunk_size=800,  # Smaller chunk size
-            chunk_overlap=100,  # Less overlap
-            length_function=len
-        )
-        chunks = text_splitter.split_text(all_text)
-        print(f"Text splitter created {len(chunks)} chunks")
-    
-    # Ensure we have chunks
-    if len(chunks) == 0:
-        print("WARNING: No chunks created, falling back to default")
-        chunks = [all_text[i:i+800] for i in range(0, len(all_text), 800)]
-        print(f"Force created {len(chunks)} chunks")
-    
-    # Create minimal metadata with only essential information
-    metadatas = []
-    for i in range(len(chunks)):
-        metadatas.append({
-            "source": "cloudinary_pdf", 
-            "chunk_id": str(i)
-        })
-    
-    print(f"Created {len(chunks)} chunks with minimal metadata")
+        # An empty listing is more likely a Cloudinary or credentials problem
+        # than a deliberate wipe; never replace the index with nothing
+        raise RuntimeError("No PDF resources found in Cloudinary; keeping the active namespace")
+    
+    print(f"Processing {len(pdf_resources)} PDFs from Cloudinary")
+    
+    # Extract per-page text so chunks can record their source PDF and page
+    from utils.cloudinary_utils import get_pdf_pages_from_resources
+    pages = get_pdf_pages_from_resources(pdf_resources)
+    
+    if not pages:
+        # Most likely a download failure; keep serving the active namespace
+        raise RuntimeError(f"No text extracted from {len(pdf_resources)} PDFs")
+    
+    print(f"Total text length: {sum(len(page['text']) for page in pages)} characters")
+    
+    # Chunk along heading, paragraph and sentence boundaries
+    from utils.chunking import chunk_pages
+    chunks, metadatas = chunk_pages(
+        pages,
+        chunk_size=Config.CHUNK_SIZE_TOKENS,
+        chunk_overlap=Config.CHUNK_OVERLAP_TOKENS
+    )
+    
+    print(f"Created {len(chunks)} chunks from {len(pages)} pages")
+    
+    # Repeated headers, footers and copied rules would crowd out useful results
+    if Config.DEDUP_ENABLED:
+        from utils.dedup import deduplicate_chunks
+        chunks, metadatas, _ = deduplicate_chunks(chunks, metadatas)
 
     # Use the unified get_vector_store logic, which already selects the correct embedding model
     return get_vector_store(chunks, metadatas)
 
+def index_pdf(public_id, pdf_file, namespace=None):
+    """Re-index a single PDF, replacing exactly the vectors of that document
+    
+    Args:
+        public_id: Cloudinary public_id of the PDF
+        pdf_file: Local path or binary file object with the PDF content
+        namespace: Namespace to update; defaults to the active namespace and
+            any namespace a rebuild is currently writing
+        
+    Returns:
+        dict: Write statistics from the vector writer
+    """
+    from utils.cloudinary_utils import extract_pdf_pages
+    from utils.chunking import chunk_pages
+    from utils.vector_maintenance import delete_source_vectors
+    from utils.vector_namespaces import get_write_namespaces
+    
+    pages = extract_pdf_pages(pdf_file, public_id)
+    chunks, metadatas = chunk_pages(
+        pages,
+        chunk_size=Config.CHUNK_SIZE_TOKENS,
+        chunk_overlap=Config.CHUNK_OVERLAP_TOKENS
+    )
+    chunks, metadatas = sanitize_chunks_with_metadata(chunks, metadatas)
+    dedup_report = None
+    if Config.DEDUP_ENABLED and chunks:
+        from utils.dedup import deduplicate_chunks
+        chunks, metadatas, dedup_report = deduplicate_chunks(chunks, metadatas)
+    ids = [chunk_key(m, c) for c, m in zip(chunks, metadatas)]
+    
+    stats = {"vectors": 0}
+    embeddings = get_embeddings_model()
+    for target in ([namespace] if namespace else get_write_namespaces()):
+        # Remove the previous version first so shorter documents leave no stale chunks
+        delete_source_vectors(public_id, namespace=target)
+        if not chunks:
+            continue
+        writer = VectorStoreWriter(embeddings, namespace=target)
+        stats = writer.write(chunks, metadatas, ids)
+        get_keyword_index(target).add_documents(chunks, metadatas)
+        print(f"Indexed {len(chunks)} chunks from {public_id} into {target}")
+    
+    if not chunks:
+        print(f"No text extracted from {public_id}, nothing to index")
+    if dedup_report:
+        stats["dedup"] = dedup_report
+    return stats
+
+EXTRA_PDF_LEASE = "extra-pdf-append"
+
 def append_to_pdf(question, answer):
-    """Append question and answer to extra.pdf in Cloudinary"""
+    """Append question and answer to extra.pdf in Cloudinary
+    
+    The download, rewrite and upload run under a MongoDB lease, so answers
+    added at the same time in different workers are applied one after the
+    other instead of overwriting each other.
+    
+    Returns:
+        bool: True if the updated PDF was uploaded
+    """
+    import socket
+    import threading
+    from models.models import JobLease
+    
+    lease = JobLease()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    deadline = time.monotonic() + Config.EXTRA_PDF_LEASE_WAIT
+    while not lease.acquire(EXTRA_PDF_LEASE, owner, ttl=Config.EXTRA_PDF_LEASE_TTL):
+        if time.monotonic() > deadline:
+            print("Timed out waiting for another worker to finish updating extra.pdf")
+            return False
+        time.sleep(0.5)
+    try:
+        return _append_to_pdf(question, answer)
+    finally:
+        try:
+            lease.release(EXTRA_PDF_LEASE, owner)
+        except Exception as e:
+            print(f"Error releasing the extra.pdf lease: {str(e)}")
+
+def _append_to_pdf(question, answer):
     import tempfile
     import shutil
     import uuid
-    import cloudinary
-    import cloudinary.uploader
-    from services.cloudinary_service import CloudinaryService
-    from config.config import Config
+    from PyPDF2 import PdfReader
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from services.cloudinary_service import get_cloudinary
     
     # Use Cloudinary service
+    cloudinary = get_cloudinary()
     cloudinary_service = CloudinaryService()
     
     # Create a temporary directory for working with files
@@ -258,19 +308,27 @@ def append_to_pdf(question, answer):
     # Get existing extra PDF from Cloudinary if it exists
     extra_pdf_public_id = None
     try:
-        # List all PDFs and find the one with 'extra' in the name
-        pdfs = cloudinary_service.list_pdfs()
+        # Look up extra.pdf by prefix, falling back to any PDF with 'extra' in the name
+        pdfs = cloudinary_service.find_by_prefix(f"{Config.PDF_FOLDER}/extra")
+        if not pdfs:
+            pdfs = cloudinary_service.list_pdfs()
         for pdf in pdfs:
             if 'extra' in pdf.get('public_id', '').lower():
                 extra_pdf_public_id = pdf.get('public_id')
                 extra_pdf_url = pdf.get('url')
+                extra_pdf_resource = pdf
                 break
         
         # Download the PDF if it exists
         if extra_pdf_public_id and extra_pdf_url:
             print(f"Found existing extra PDF in Cloudinary: {extra_pdf_public_id}")
-            from utils.cloudinary_utils import download_pdf
-            pdf_path = download_pdf(extra_pdf_url, temp_dir)
+            if Config.PDF_CACHE_ENABLED:
+                # Work on a copy; the cached blob must stay intact
+                from utils.pdf_cache import get_pdf_cache
+                shutil.copyfile(get_pdf_cache().fetch(extra_pdf_resource), pdf_path)
+            else:
+                from utils.cloudinary_utils import download_pdf
+                pdf_path = download_pdf(extra_pdf_url, temp_dir)
         else:
             print("No existing extra PDF found in Cloudinary. Creating a new one.")
     except Exception as e:
@@ -484,10 +542,23 @@ def append_to_pdf(question, answer):
             )
             
             print(f"Successfully uploaded updated PDF to Cloudinary: {result.get('public_id')}")
+            cloudinary_service.invalidate_listing()
             
-            # Skip automatic embedding creation as requested
-            print("PDF uploaded to Cloudinary successfully. Embeddings will not be created automatically.")
-            print("Use the 'Rebuild Embeddings' button in the admin dashboard to update embeddings.")
+            # The next append starts from this version without downloading it
+            if Config.PDF_CACHE_ENABLED:
+                try:
+                    from utils.pdf_cache import cache_uploaded_pdf
+                    cache_uploaded_pdf(result, pdf_path)
+                except Exception as cache_error:
+                    print(f"Error caching updated PDF: {str(cache_error)}")
+            
+            # Replace only this document's vectors, in the background
+            try:
+                from services.indexing_service import get_indexing_service
+                with open(pdf_path, 'rb') as f:
+                    get_indexing_service().enqueue(result.get('public_id', public_id), f.read())
+            except Exception as index_error:
+                print(f"Error queueing re-index of updated PDF: {str(index_error)}")
             
             # Clean up
             if os.path.exists(pdf_path):
@@ -554,27 +625,23 @@ def update_vectorstore(pdf_path=None, question=None, answer=None):
 def embeddings_exist():
     """Check if embeddings already exist in Pinecone"""
     try:
-        # Initialize Pinecone
-        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-        
         # Check if index exists
         index_name = Config.PINECONE_INDEX_NAME
-        indexes = [idx.name for idx in pc.list_indexes()]
+        indexes = list_index_names()
         
         if index_name not in indexes:
             print(f"Index {index_name} does not exist")
             return False
         
         # Get the index
-        index = pc.Index(index_name)
+        index = get_index(index_name)
         
-        # Check if the index has vectors in the namespace
-        stats = index.describe_index_stats()
-        namespaces = stats.get("namespaces", {})
-        course_materials = namespaces.get("course_materials", {})
-        vector_count = course_materials.get("vector_count", 0)
+        # Check if the index has vectors in the active namespace
+        from utils.vector_namespaces import get_active_namespace, namespace_vector_count
+        namespace = get_active_namespace(refresh=True)
+        vector_count = namespace_vector_count(namespace, index)
         
-        print(f"Found {vector_count} vectors in the course_materials namespace")
+        print(f"Found {vector_count} vectors in the {namespace} namespace")
         
         # Return True if there are vectors in the namespace
         return vector_count > 0
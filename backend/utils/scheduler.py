@@ -0,0 +1,82 @@
+import os
+import socket
+import threading
+
+class PeriodicJob:
+    """Run a function on a fixed interval in a daemon thread
+
+    With lease=True the job takes a lease in MongoDB before each run, so when
+    several workers schedule the same job only one of them runs it per
+    interval.
+    """
+
+    def __init__(self, name, interval, func, initial_delay=None, lease=False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.initial_delay = interval if initial_delay is None else initial_delay
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the job thread if it is not already running"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+        print(f"Started periodic job '{self.name}' every {self.interval}s")
+
+    def stop(self):
+        """Ask the job thread to exit after its current run"""
+        self._stop.set()
+
+    def _acquire_lease(self):
+        from models.models import JobLease
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        # Expire slightly before the next run so the holder can renew it
+        return JobLease().acquire(self.name, owner, ttl=self.interval * 0.9)
+
+    def run_once(self):
+        """Run the job immediately in the calling thread"""
+        try:
+            if self.lease and not self._acquire_lease():
+                print(f"Periodic job '{self.name}' is running in another worker, skipping")
+                return None
+            return self.func()
+        except Exception as e:
+            print(f"Periodic job '{self.name}' failed: {str(e)}")
+            return None
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while True:
+            self.run_once()
+            if self._stop.wait(self.interval):
+                return
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def schedule_job(name, interval, func, initial_delay=None, lease=False):
+    """Register and start a periodic job once per process
+
+    Returns:
+        PeriodicJob: The running job, or None when interval is not positive
+    """
+    if not interval or interval <= 0:
+        print(f"Periodic job '{name}' disabled")
+        return None
+    with _jobs_lock:
+        job = _jobs.get(name)
+        if job is None:
+            job = PeriodicJob(name, interval, func, initial_delay, lease)
+            _jobs[name] = job
+        job.start()
+        return job
+
+def get_job(name):
+    """Get a registered periodic job by name"""
+    return _jobs.get(name)
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+class SessionStore:
+    """Thread-safe per-session conversation state
+
+    The session maps are guarded by one store-wide lock, held only for
+    dictionary operations. Each session additionally has its own lock that a
+    request holds for its whole turn, because the conversation memory is read
+    and then appended by the chain: two concurrent turns of the same session
+    would otherwise interleave their messages. Different sessions never wait
+    for each other.
+    """
+
+    def __init__(self, memory_factory, timeout=7200, cleanup_interval=3600):
+        self.memory_factory = memory_factory
+        self.timeout = timeout
+        self.cleanup_interval = cleanup_interval
+        self._lock = threading.Lock()
+        self._memories = {}     # session_id -> conversation memory
+        self._timestamps = {}   # session_id -> last activity time
+        self._session_locks = {}
+        self._last_cleanup = time.time()
+
+    def _session_lock(self, session_id):
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = self._session_locks[session_id] = threading.Lock()
+            self._timestamps[session_id] = time.time()
+            return lock
+
+    @contextmanager
+    def hold(self, session_id):
+        """Serialize the turns of one session for the duration of the block"""
+        lock = self._session_lock(session_id)
+        with lock:
+            # Refresh after a possibly long wait so cleanup does not see the session as idle
+            self.touch(session_id)
+            yield
+
+    @asynccontextmanager
+    async def ahold(self, session_id, poll_interval=0.01):
+        """hold() for coroutines: waits for the session without blocking the event loop
+
+        The session lock is a thread lock shared with hold(), so it is polled
+        rather than awaited; same-session turns rarely overlap.
+        """
+        lock = self._session_lock(session_id)
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+        try:
+            self.touch(session_id)
+            yield
+        finally:
+            lock.release()
+
+    def touch(self, session_id):
+        """Record activity on a session"""
+        with self._lock:
+            self._timestamps[session_id] = time.time()
+
+    def get_memory(self, session_id, create=False):
+        """The session's memory, created on demand when create is True; else None if missing"""
+        with self._lock:
+            memory = self._memories.get(session_id)
+            if memory is None and create:
+                memory = self._memories[session_id] = self.memory_factory()
+            return memory
+
+    def messages(self, session_id):
+        """Snapshot of the session's messages as strings"""
+        memory = self.get_memory(session_id)
+        if memory is None:
+            return []
+        return [str(msg) for msg in list(memory.chat_memory.messages)]
+
+    def cleanup_expired(self, force=False):
+        """Drop idle sessions, at most once per cleanup_interval unless forced
+
+        Sessions with a turn in progress are skipped even when they look idle.
+
+        Returns:
+            int: Number of sessions removed
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_cleanup < self.cleanup_interval:
+                return 0
+            self._last_cleanup = now
+            removed = 0
+            for session_id, last_active in list(self._timestamps.items()):
+                if now - last_active <= self.timeout:
+                    continue
+                lock = self._session_locks.get(session_id)
+                if lock is not None and not lock.acquire(blocking=False):
+                    continue
+                try:
+                    self._memories.pop(session_id, None)
+                    self._timestamps.pop(session_id, None)
+                    self._session_locks.pop(session_id, None)
+                    removed += 1
+                finally:
+                    if lock is not None:
+                        lock.release()
+            return removed
+
+    def __len__(self):
+        with self._lock:
+            return len(self._timestamps)
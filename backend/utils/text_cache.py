@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from config.config import Config
+
+def content_hash(pdf_file):
+    """sha256 of a PDF given as a path or a seekable binary file object"""
+    digest = hashlib.sha256()
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    else:
+        position = pdf_file.tell()
+        pdf_file.seek(0)
+        for block in iter(lambda: pdf_file.read(1024 * 1024), b""):
+            digest.update(block)
+        pdf_file.seek(position)
+    return digest.hexdigest()
+
+class TextCache:
+    """Gzipped per-PDF page texts keyed by content hash and extractor version
+
+    An unchanged PDF keeps its hash across rebuilds and re-uploads, so its
+    pages come back from disk instead of going through PyPDF2 again. Bumping
+    the extractor version misses every entry, so stale text is never reused.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or Config.TEXT_CACHE_DIR
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self.seconds_spent = 0.0
+
+    def _path(self, digest, extractor_version):
+        version_key = hashlib.sha1(extractor_version.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{digest}-{version_key}.json.gz")
+
+    def get(self, digest, extractor_version):
+        """Cached pages as (page, text) pairs, or None on a miss"""
+        path = self._path(digest, extractor_version)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable text cache entry {path}: {str(e)}")
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.seconds_saved += record.get("seconds", 0.0)
+        return record["pages"]
+
+    def put(self, digest, extractor_version, pages, seconds):
+        """Store extracted (page, text) pairs with the time extraction took"""
+        with self._lock:
+            self.seconds_spent += seconds
+        path = self._path(digest, extractor_version)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump({"extractor": extractor_version, "seconds": round(seconds, 3), "pages": pages}, f)
+        os.replace(temp_path, path)
+
+    def report(self):
+        """Hit rate and extraction time saved since the last reset"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "seconds_spent": round(self.seconds_spent, 2)
+        }
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+def get_text_cache():
+    """Get the process-wide extracted-text cache"""
+    global _text_cache
+    if _text_cache is None:
+        with _text_cache_lock:
+            if _text_cache is None:
+                _text_cache = TextCache()
+    return _text_cache
@@ -0,0 +1,78 @@
+import os
+import re
+
+# Page objects, but not the /Pages tree nodes
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+# Bytes kept from the previous chunk so a marker split across reads is still seen
+PAGE_MARKER_OVERLAP = 32
+
+class PdfValidationError(ValueError):
+    """Raised when an uploaded file is not an acceptable PDF"""
+
+class ValidatedPdfStream:
+    """Read-through wrapper that validates a PDF while it is being uploaded
+
+    The header is checked on the first read, the byte count is enforced on
+    every read, and page objects are counted as the bytes pass through. The
+    page limit is checked when the end of the file is reached, before the
+    final chunk is handed to the uploader, so an oversized document never
+    completes its upload.
+
+    Page counting only sees uncompressed page objects; PDFs that keep them in
+    compressed object streams report 0 pages and pass the page limit.
+    """
+
+    def __init__(self, stream, name="upload.pdf", max_bytes=None, max_pages=None):
+        self.stream = stream
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.bytes_read = 0
+        self.pages = 0
+        self._tail = b""
+        self._checked_header = False
+        self.total_bytes = self.size()
+
+    # The uploader sizes the file with seek/tell and closes it with a context manager;
+    # the underlying stream is left open for the upload hooks
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def tell(self):
+        return self.stream.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.stream.seek(offset, whence)
+
+    def size(self):
+        """Total size of the underlying stream without moving the read position"""
+        position = self.stream.tell()
+        self.stream.seek(0, os.SEEK_END)
+        size = self.stream.tell()
+        self.stream.seek(position)
+        return size
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        if not self._checked_header:
+            if not chunk.startswith(b"%PDF-"):
+                raise PdfValidationError(f"{self.name} is not a PDF file")
+            self._checked_header = True
+
+        self.bytes_read += len(chunk)
+        if self.max_bytes and self.bytes_read > self.max_bytes:
+            raise PdfValidationError(
+                f"{self.name} exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit"
+            )
+
+        window = self._tail + chunk
+        self.pages += len(PAGE_PATTERN.findall(window)) - len(PAGE_PATTERN.findall(self._tail))
+        self._tail = window[-PAGE_MARKER_OVERLAP:]
+
+        at_end = not chunk or self.stream.tell() >= self.total_bytes
+        if at_end and self.max_pages and self.pages > self.max_pages:
+            raise PdfValidationError(f"{self.name} has {self.pages} pages; the limit is {self.max_pages}")
+        return chunk
@@ -0,0 +1,131 @@
+from config.config import Config
+from utils.keyword_index import get_keyword_index
+from utils.vector_namespaces import get_active_namespace, get_write_namespaces, sweep_stale_namespaces
+from utils.vector_store import get_index
+
+# Sources used for placeholder vectors when no PDFs are available
+PLACEHOLDER_SOURCES = {"default", "cloudinary_pdf"}
+
+def source_from_vector_id(vector_id):
+    """Get the source public_id from a '<public_id>#<chunk_id>' vector ID"""
+    if "#" not in vector_id:
+        return None
+    return vector_id.rsplit("#", 1)[0]
+
+def _delete_ids(index, ids, namespace, batch_size):
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        index.delete(ids=batch, namespace=namespace)
+        deleted += len(batch)
+    return deleted
+
+def delete_source_vectors(public_id, namespace=None, batch_size=None):
+    """Delete every vector and keyword entry that came from one PDF
+
+    Vector IDs are prefixed with the source public_id, so the IDs are listed
+    by prefix and deleted in batches. Indexes that cannot list IDs fall back
+    to a metadata-filtered delete on the 'source' field. Without an explicit
+    namespace, the active namespace and any rebuild in progress are cleaned.
+
+    Returns:
+        int: Number of vectors deleted (-1 when deleted by metadata filter)
+    """
+    batch_size = batch_size or Config.DELETE_BATCH_SIZE
+    index = get_index()
+
+    total = 0
+    for target in ([namespace] if namespace else get_write_namespaces()):
+        try:
+            deleted = 0
+            for ids in index.list(prefix=f"{public_id}#", namespace=target):
+                deleted += _delete_ids(index, list(ids), target, batch_size)
+            print(f"Deleted {deleted} vectors for {public_id} from {target}")
+        except Exception as e:
+            print(f"Listing vectors by prefix failed ({str(e)}), deleting by metadata filter")
+            index.delete(filter={"source": {"$eq": public_id}}, namespace=target)
+            deleted = -1
+        total = -1 if deleted < 0 or total < 0 else total + deleted
+
+        removed = get_keyword_index(target).remove_source(public_id)
+        print(f"Removed {removed} keyword index entries for {public_id} from {target}")
+    return total
+
+def sweep_orphan_vectors(namespace=None, batch_size=None):
+    """Delete vectors and keyword entries whose PDF is no longer in Cloudinary
+
+    Also drops rebuild namespaces that were never garbage-collected. Indexes
+    that cannot list IDs (pod-based) fall back to a metadata-filtered delete
+    for each source the keyword index has but Cloudinary no longer lists.
+
+    Returns:
+        dict: Counts of scanned, orphaned and deleted vectors (scanned is None
+        and deleted_vectors -1 when deleted by metadata filter)
+    """
+    from services.cloudinary_service import CloudinaryService
+
+    namespace = namespace or get_active_namespace(refresh=True)
+    batch_size = batch_size or Config.DELETE_BATCH_SIZE
+    index = get_index()
+
+    # Snapshot the indexed sources before listing Cloudinary. A PDF is uploaded
+    # before it is indexed, so anything indexed by now is in the listing below;
+    # listing first would let a PDF indexed in between look like an orphan.
+    try:
+        vector_ids = [vector_id for ids in index.list(namespace=namespace) for vector_id in ids]
+    except Exception as e:
+        print(f"Listing vectors failed ({str(e)}), sweeping by keyword index sources")
+        vector_ids = None
+    keyword_index = get_keyword_index(namespace)
+    # Another worker may have indexed or removed PDFs since this one loaded it
+    keyword_index.reload_if_changed()
+    keyword_sources = list(keyword_index.sources)
+    # A stale listing could miss a PDF uploaded by another worker and delete its vectors
+    live_sources = {resource.get("public_id") for resource in CloudinaryService().list_pdfs(refresh=True)}
+
+    orphan_sources = set()
+    if vector_ids is None:
+        scanned = None
+        deleted = 0
+        for source in keyword_sources:
+            if source not in live_sources and source not in PLACEHOLDER_SOURCES:
+                index.delete(filter={"source": {"$eq": source}}, namespace=namespace)
+                orphan_sources.add(source)
+                deleted = -1
+    else:
+        scanned = len(vector_ids)
+        orphan_ids = []
+        for vector_id in vector_ids:
+            source = source_from_vector_id(vector_id)
+            # IDs without a source prefix (legacy vectors) and placeholders are left alone
+            if source and source not in live_sources and source not in PLACEHOLDER_SOURCES:
+                orphan_ids.append(vector_id)
+                orphan_sources.add(source)
+        deleted = _delete_ids(index, orphan_ids, namespace, batch_size)
+
+    keyword_removed = 0
+    for source in keyword_sources:
+        if source not in live_sources and source not in PLACEHOLDER_SOURCES:
+            keyword_removed += keyword_index.remove_source(source)
+
+    try:
+        dropped_namespaces = sweep_stale_namespaces()
+    except Exception as e:
+        print(f"Error dropping stale namespaces: {str(e)}")
+        dropped_namespaces = []
+
+    report = {
+        "namespace": namespace,
+        "scanned": scanned,
+        "orphan_sources": sorted(orphan_sources),
+        "deleted_vectors": deleted,
+        "deleted_keyword_entries": keyword_removed,
+        "dropped_namespaces": dropped_namespaces
+    }
+    if scanned is None:
+        print(f"Orphan sweep: deleted vectors of {len(orphan_sources)} missing PDFs by filter, "
+              f"{keyword_removed} keyword entries")
+    else:
+        print(f"Orphan sweep: scanned {scanned} vectors, deleted {deleted} from "
+              f"{len(orphan_sources)} missing PDFs, {keyword_removed} keyword entries")
+    return report
@@ -0,0 +1,160 @@
+import datetime
+import threading
+import time
+import uuid
+from config.config import Config
+from utils.vector_store import get_index
+
+# Namespace used before blue/green switching; served until the first rebuild
+LEGACY_NAMESPACE = "course_materials"
+
+_active = {"namespace": None, "checked_at": 0.0}
+_active_lock = threading.Lock()
+
+def _pointer_model():
+    from models.models import VectorNamespace
+    return VectorNamespace()
+
+def new_namespace():
+    """Name for a fresh rebuild namespace"""
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    return f"{Config.VECTOR_NAMESPACE_PREFIX}-{stamp}-{uuid.uuid4().hex[:6]}"
+
+def get_active_namespace(refresh=False):
+    """Namespace that queries should read, cached for NAMESPACE_POINTER_TTL seconds
+
+    Falls back to the last known namespace (or the legacy one) when the
+    pointer cannot be read, so a database hiccup never breaks retrieval.
+    """
+    now = time.monotonic()
+    with _active_lock:
+        if (not refresh and _active["namespace"]
+                and now - _active["checked_at"] < Config.NAMESPACE_POINTER_TTL):
+            return _active["namespace"]
+        try:
+            pointer = _pointer_model().get_pointer() or {}
+            _active["namespace"] = pointer.get("namespace") or LEGACY_NAMESPACE
+        except Exception as e:
+            print(f"Error reading active namespace pointer: {str(e)}")
+            _active["namespace"] = _active["namespace"] or LEGACY_NAMESPACE
+        _active["checked_at"] = now
+        return _active["namespace"]
+
+def get_write_namespaces():
+    """Namespaces incremental updates must reach: the active one and any rebuild in progress"""
+    namespaces = [get_active_namespace(refresh=True)]
+    try:
+        building = (_pointer_model().get_pointer() or {}).get("building")
+    except Exception as e:
+        print(f"Error reading building namespace: {str(e)}")
+        building = None
+    if building and building not in namespaces:
+        namespaces.append(building)
+    return namespaces
+
+def namespace_vector_count(namespace, index=None):
+    """Vector count Pinecone reports for a namespace"""
+    index = index or get_index()
+    stats = index.describe_index_stats()
+    return stats.get("namespaces", {}).get(namespace, {}).get("vector_count", 0)
+
+def wait_for_vector_count(namespace, expected, timeout=None, interval=2):
+    """Wait until a namespace reports at least the expected number of vectors
+
+    Index statistics lag behind upserts, so the count is polled.
+
+    Raises:
+        RuntimeError: If the count is still short when the timeout expires
+    """
+    timeout = Config.NAMESPACE_VALIDATE_TIMEOUT if timeout is None else timeout
+    index = get_index()
+    deadline = time.monotonic() + timeout
+    while True:
+        count = namespace_vector_count(namespace, index)
+        if count >= expected:
+            print(f"Namespace {namespace} validated with {count}/{expected} vectors")
+            return count
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Namespace {namespace} has {count}/{expected} vectors after {timeout}s")
+        time.sleep(interval)
+
+def drop_namespace(namespace):
+    """Delete every vector in a namespace and its keyword index"""
+    from utils.keyword_index import discard_keyword_index
+
+    if namespace == get_active_namespace(refresh=True):
+        print(f"Refusing to drop active namespace {namespace}")
+        return False
+    try:
+        get_index().delete(delete_all=True, namespace=namespace)
+    except Exception as e:
+        # Pinecone reports a missing namespace as an error; nothing left to drop
+        print(f"Error dropping namespace {namespace}: {str(e)}")
+    discard_keyword_index(namespace)
+    print(f"Dropped namespace {namespace}")
+    return True
+
+def begin_build(namespace):
+    """Mark namespace as the rebuild target so incremental updates also reach it
+
+    Raises:
+        RuntimeError: If another rebuild is already running
+    """
+    if not _pointer_model().set_building(namespace):
+        raise RuntimeError("Another embeddings rebuild is already in progress")
+
+def abort_build(namespace):
+    """Forget a failed rebuild and drop what it wrote"""
+    try:
+        _pointer_model().clear_building(namespace)
+    except Exception as e:
+        print(f"Error clearing building namespace: {str(e)}")
+    drop_namespace(namespace)
+
+def activate_namespace(namespace, vector_count, gc_delay=None):
+    """Switch queries to namespace and drop the previous one after a grace period
+
+    Returns:
+        str: The previously active namespace
+    """
+    previous = _pointer_model().switch(namespace, vector_count).get("namespace") or LEGACY_NAMESPACE
+    with _active_lock:
+        _active["namespace"] = namespace
+        _active["checked_at"] = time.monotonic()
+    print(f"Switched active namespace from {previous} to {namespace}")
+
+    if previous != namespace:
+        # Let queries that already resolved the old namespace finish first
+        gc_delay = Config.NAMESPACE_GC_DELAY if gc_delay is None else gc_delay
+        timer = threading.Timer(gc_delay, drop_namespace, args=(previous,))
+        timer.daemon = True
+        timer.start()
+    return previous
+
+def sweep_stale_namespaces():
+    """Drop rebuild namespaces that are neither active nor being built
+
+    Covers namespaces left behind when a process exits before its delayed
+    garbage collection runs.
+
+    Returns:
+        list: Names of the dropped namespaces
+    """
+    pointer = _pointer_model().get_pointer() or {}
+    if not pointer.get("namespace"):
+        return []
+    switched_at = pointer.get("switched_at")
+    if switched_at and datetime.datetime.utcnow() - switched_at < datetime.timedelta(seconds=Config.NAMESPACE_GC_DELAY):
+        # The previous namespace is still in its grace period
+        return []
+    keep = {pointer.get("namespace"), pointer.get("building")}
+    prefix = f"{Config.VECTOR_NAMESPACE_PREFIX}-"
+    stats = get_index().describe_index_stats()
+    dropped = []
+    for namespace in stats.get("namespaces", {}):
+        if namespace in keep:
+            continue
+        if namespace.startswith(prefix) or namespace == LEGACY_NAMESPACE:
+            if drop_namespace(namespace):
+                dropped.append(namespace)
+    return dropped
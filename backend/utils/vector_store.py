@@ -0,0 +1,51 @@
+import threading
+from config.config import Config
+
+# Dimension of the all-MiniLM-L6-v2 vectors stored in the index
+DIMENSION = 384
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_pinecone():
+    """Get the process-wide Pinecone client, importing the SDK on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from pinecone import Pinecone
+                _client = Pinecone(api_key=Config.PINECONE_API_KEY)
+    return _client
+
+def reset_pinecone():
+    """Drop the shared client so a forked worker opens its own connection pool"""
+    global _client
+    with _client_lock:
+        _client = None
+
+def get_index(index_name=None, pool_threads=None):
+    """Get a handle to the Pinecone index"""
+    index_name = index_name or Config.PINECONE_INDEX_NAME
+    if pool_threads:
+        return get_pinecone().Index(index_name, pool_threads=pool_threads)
+    return get_pinecone().Index(index_name)
+
+def list_index_names():
+    """Names of the indexes in the project (one API round trip)"""
+    return [idx.name for idx in get_pinecone().list_indexes()]
+
+def ensure_index(index_name=None):
+    """Create the index if it does not exist yet"""
+    index_name = index_name or Config.PINECONE_INDEX_NAME
+    if index_name not in list_index_names():
+        print(f"Creating Pinecone index: {index_name}")
+        get_pinecone().create_index(name=index_name, dimension=DIMENSION, metric="cosine")
+
+def create_vector_store(embedding, namespace=None, index_name=None):
+    """LangChain vector store over the index, importing langchain_pinecone on first use"""
+    from langchain_pinecone import PineconeVectorStore
+    return PineconeVectorStore(
+        index_name=index_name or Config.PINECONE_INDEX_NAME,
+        embedding=embedding,
+        namespace=namespace
+    )
@@ -0,0 +1,121 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import Config
+from utils.vector_store import get_index
+
+class VectorStoreWriter:
+    """Encode chunks in CPU batches and upsert them to Pinecone in parallel
+
+    Encoding and uploading overlap: while one batch is being encoded, the
+    previous batches are upserted by a small thread pool.
+    """
+
+    def __init__(self, embeddings, index_name=None, namespace="course_materials",
+                 embed_batch_size=None, upsert_batch_size=None, upsert_workers=None,
+                 max_retries=None, text_key="text"):
+        self.embeddings = embeddings
+        self.index_name = index_name or Config.PINECONE_INDEX_NAME
+        self.namespace = namespace
+        self.embed_batch_size = embed_batch_size or Config.EMBED_BATCH_SIZE
+        self.upsert_batch_size = upsert_batch_size or Config.UPSERT_BATCH_SIZE
+        self.upsert_workers = upsert_workers or Config.UPSERT_WORKERS
+        self.max_retries = max_retries or Config.UPSERT_MAX_RETRIES
+        self.text_key = text_key
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = get_index(self.index_name, pool_threads=self.upsert_workers)
+        return self._index
+
+    def _upsert_with_retry(self, vectors):
+        """Upsert one batch, retrying with exponential backoff"""
+        index = self._get_index()
+        for attempt in range(self.max_retries):
+            try:
+                index.upsert(vectors=vectors, namespace=self.namespace)
+                return len(vectors)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = (2 ** attempt) + random.uniform(0, 1)
+                print(f"Upsert of {len(vectors)} vectors failed (attempt {attempt + 1}), retrying in {delay:.2f} seconds: {str(e)}")
+                time.sleep(delay)
+
+    def write(self, texts, metadatas, ids):
+        """Embed and upsert chunks
+
+        Args:
+            texts: Chunk texts
+            metadatas: Metadata dicts aligned with texts
+            ids: Vector IDs aligned with texts
+
+        Returns:
+            dict: Write statistics including vectors per second
+        """
+        # Count this write's lookups only; queries share the cache meanwhile
+        cache = getattr(self.embeddings, "cache", None)
+        cache_stats = cache.new_stats() if cache is not None else None
+
+        start = time.perf_counter()
+        embed_seconds = 0.0
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=self.upsert_workers) as executor:
+            for batch_start in range(0, len(texts), self.embed_batch_size):
+                batch_end = batch_start + self.embed_batch_size
+                batch_texts = texts[batch_start:batch_end]
+
+                encode_start = time.perf_counter()
+                if cache is not None:
+                    embeddings = self.embeddings.embed_documents(batch_texts, stats=cache_stats)
+                else:
+                    embeddings = self.embeddings.embed_documents(batch_texts)
+                embed_seconds += time.perf_counter() - encode_start
+
+                records = []
+                for text, metadata, vector_id, values in zip(
+                    batch_texts, metadatas[batch_start:batch_end], ids[batch_start:batch_end], embeddings
+                ):
+                    records.append({
+                        "id": vector_id,
+                        "values": values,
+                        "metadata": {**metadata, self.text_key: text}
+                    })
+
+                for i in range(0, len(records), self.upsert_batch_size):
+                    futures.append(executor.submit(self._upsert_with_retry, records[i:i + self.upsert_batch_size]))
+
+                print(f"Encoded {min(batch_end, len(texts))}/{len(texts)} chunks")
+
+            written = 0
+            failed_batches = 0
+            for future in futures:
+                try:
+                    written += future.result()
+                except Exception as e:
+                    failed_batches += 1
+                    print(f"Upsert batch failed after {self.max_retries} attempts: {str(e)}")
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "vectors": written,
+            "failed_batches": failed_batches,
+            "seconds": round(elapsed, 2),
+            "embed_seconds": round(embed_seconds, 2),
+            "vectors_per_second": round(written / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        print(f"Wrote {written} vectors in {stats['seconds']}s "
+              f"({stats['vectors_per_second']} vectors/sec, {stats['embed_seconds']}s encoding)")
+
+        if cache is not None:
+            cache.flush()
+            stats["embedding_cache"] = cache.report(cache_stats)
+            print(f"Embedding cache hit rate: {stats['embedding_cache']['hit_rate']:.1%} "
+                  f"({stats['embedding_cache']['hits']} hits, {stats['embedding_cache']['misses']} misses, "
+                  f"{stats['embedding_cache']['evictions']} evictions)")
+
+        if failed_batches:
+            raise RuntimeError(f"{failed_batches} upsert batches failed; {written}/{len(texts)} vectors written")
+        return stats
@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import datetime
+from config.config import Config
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+class WarmupStep:
+    """One dependency initialized during warm-up"""
+
+    def __init__(self, name, func, requires=(), critical=True):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.critical = critical
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.attempts = 0
+        self.seconds = None
+        self.ready_at = None
+
+    def describe(self):
+        return {
+            "state": self.state,
+            "critical": self.critical,
+            "attempts": self.attempts,
+            "seconds": self.seconds,
+            "ready_at": self.ready_at,
+            "error": self.error
+        }
+
+class WarmupManager:
+    """Initialize slow dependencies in a background thread after the app is built
+
+    Steps run in registration order once the steps they require are ready.
+    Failed critical steps, and the steps waiting on them, are retried every
+    WARMUP_RETRY_INTERVAL seconds until they succeed, so a dependency that
+    is down at boot does not leave the process permanently unready. The
+    process is ready when every critical step is; non-critical steps are
+    attempted once and only reported.
+    """
+
+    def __init__(self, retry_interval=None):
+        self.retry_interval = Config.WARMUP_RETRY_INTERVAL if retry_interval is None else retry_interval
+        self.steps = {}
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread = None
+
+    def add_step(self, name, func, requires=(), critical=True):
+        """Register a step; func's return value is kept as the step's result"""
+        for required in requires:
+            if required not in self.steps:
+                raise ValueError(f"Warm-up step '{name}' requires unknown step '{required}'")
+        self.steps[name] = WarmupStep(name, func, requires, critical)
+        return self
+
+    def start(self):
+        """Start the warm-up thread if it is not already running"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            for step in self.steps.values():
+                if self._settled(step):
+                    continue
+                if all(self.steps[required].state == READY for required in step.requires):
+                    self._run_step(step)
+            if all(self._settled(step) for step in self.steps.values()):
+                print(f"Warm-up finished in {time.time() - self.started_at:.1f}s")
+                return
+            time.sleep(self.retry_interval)
+
+    @staticmethod
+    def _settled(step):
+        # Non-critical steps (e.g. an initial index build) are only attempted once
+        return step.state == READY or (step.state == FAILED and not step.critical)
+
+    def _run_step(self, step):
+        with self._lock:
+            step.state = RUNNING
+            step.attempts += 1
+        started = time.time()
+        print(f"Warm-up: starting {step.name}")
+        try:
+            result = step.func()
+        except Exception as e:
+            print(f"Warm-up: {step.name} failed: {str(e)}")
+            with self._changed:
+                step.state = FAILED
+                step.error = str(e)
+                step.seconds = round(time.time() - started, 2)
+                self._changed.notify_all()
+            return
+        with self._changed:
+            step.state = READY
+            step.result = result
+            step.error = None
+            step.seconds = round(time.time() - started, 2)
+            step.ready_at = datetime.now().isoformat()
+            self._changed.notify_all()
+        print(f"Warm-up: {step.name} ready in {step.seconds}s")
+
+    def result(self, name, timeout=0):
+        """Result of a step, waiting up to timeout seconds; None if it is not ready"""
+        step = self.steps[name]
+        with self._changed:
+            if step.state != READY and timeout:
+                self._changed.wait_for(lambda: step.state == READY, timeout)
+            return step.result if step.state == READY else None
+
+    def is_ready(self):
+        return all(step.state == READY for step in self.steps.values() if step.critical)
+
+    def status(self):
+        """Readiness plus the state of every step"""
+        with self._lock:
+            return {
+                "ready": self.is_ready(),
+                "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+                "dependencies": {name: step.describe() for name, step in self.steps.items()}
+            }
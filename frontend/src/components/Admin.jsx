@@ -3,15 +3,21 @@ import { useNavigate } from 'react-router-dom'
 import { RiDashboardLine, RiLogoutBoxLine, RiMessage2Line, RiDeleteBin6Line, RiBarChart2Line, RiFileTextLine, RiRefreshLine } from 'react-icons/ri'
 import QueryAnalytics from './QueryAnalytics';
 import PDFManagement from './PDFManagement';
-import { rebuildEmbeddings } from '../lib/api';
+import { getAdminChatHistory, getUnansweredQueries, rebuildEmbeddings } from '../lib/api';
 import { api } from "../lib/api";
 
 function Admin() {
   const navigate = useNavigate();
   const [unansweredQueries, setUnansweredQueries] = useState([]);
+  const [unansweredSort, setUnansweredSort] = useState('recent');
+  const [unansweredNext, setUnansweredNext] = useState(null);
   const [response, setResponse] = useState({});
   const [activeTab, setActiveTab] = useState('dashboard');
   const [adminChatHistory, setAdminChatHistory] = useState([]);
+  const [historyCursor, setHistoryCursor] = useState(null);
+  const [historyTotal, setHistoryTotal] = useState(null);
+  const [historyFilters, setHistoryFilters] = useState({ user: '', from: '', to: '' });
+  const [loadingHistory, setLoadingHistory] = useState(false);
   const [rebuilding, setRebuilding] = useState(false);
   const [stats, setStats] = useState({
     total_users: 0,
@@ -19,18 +25,24 @@ function Admin() {
     unanswered_queries: 0
   });
 
-  // Fetch unanswered queries
-  useEffect(() => {
-    const fetchUnansweredQueries = async () => {
-      try {
-        const res = await api.get("/api/unanswered-queries");
-        setUnansweredQueries(res.data.queries);
-      } catch (error) {
-        console.error("Error fetching unanswered queries:", error);
+  // Fetch a page of unanswered queries; "recent" pages by cursor, "frequent" (grouped) by offset
+  const fetchUnansweredQueries = async (next = null) => {
+    try {
+      const params = { sort: unansweredSort };
+      if (next !== null) {
+        params[unansweredSort === 'frequent' ? 'offset' : 'cursor'] = next;
       }
-    };
+      const data = await getUnansweredQueries(params);
+      setUnansweredQueries((prev) => (next !== null ? [...prev, ...data.queries] : data.queries));
+      setUnansweredNext(unansweredSort === 'frequent' ? data.next_offset : data.next_cursor);
+    } catch (error) {
+      console.error("Error fetching unanswered queries:", error);
+    }
+  };
+
+  useEffect(() => {
     fetchUnansweredQueries();
-  }, []);
+  }, [unansweredSort]);
 
   // Fetch stats
   useEffect(() => {
@@ -48,18 +60,27 @@ function Admin() {
     fetchStats();
   }, []);
 
-  const fetchAdminChatHistory = async () => {
+  // Fetch one page of chat history; with a cursor the page is appended
+  const fetchAdminChatHistory = async (cursor = null) => {
+    setLoadingHistory(true);
     try {
       const token = localStorage.getItem('adminToken');
-      const res = await api.get('/api/admin/chat-history', {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setAdminChatHistory(res.data.history);
+      const data = await getAdminChatHistory(token, { ...historyFilters, cursor });
+      setAdminChatHistory((previous) => (cursor ? [...previous, ...data.history] : data.history));
+      setHistoryCursor(data.next_cursor);
+      setHistoryTotal(data.total_is_estimate ? `~${data.total}` : data.total);
     } catch (error) {
       console.error("Error fetching chat history:", error);
+    } finally {
+      setLoadingHistory(false);
     }
   };
 
+  const handleHistoryFilter = (e) => {
+    e.preventDefault();
+    fetchAdminChatHistory();
+  };
+
   const handleResponseSubmit = async (id) => {
     try {
       await api.post("/api/add-response", {
@@ -205,11 +226,26 @@ function Admin() {
 
             {/* Unanswered Queries Section */}
             <div className="mt-8 text-white">
-              <h2 className="text-xl font-bold mb-4">Unanswered Queries</h2>
+              <div className="flex justify-between items-center mb-4">
+                <h2 className="text-xl font-bold">Unanswered Queries</h2>
+                <select
+                  value={unansweredSort}
+                  onChange={(e) => setUnansweredSort(e.target.value)}
+                  className="p-2 bg-gray-700 text-white rounded"
+                >
+                  <option value="recent">Most recent</option>
+                  <option value="frequent">Most asked</option>
+                </select>
+              </div>
               {unansweredQueries.length > 0 ? (
                 unansweredQueries.map(query => (
                   <div key={query._id} className="mb-4 bg-gray-800 p-4 rounded-lg">
-                    <p className="mb-2">Q: {query.question}</p>
+                    <p className="mb-2">
+                      Q: {query.question}
+                      {query.count > 1 && (
+                        <span className="ml-2 text-sm text-purple-400">asked {query.count} times</span>
+                      )}
+                    </p>
                     <button
                       onClick={() => handleDeleteQuery(query._id)}
                       className="text-red-500 hover:text-red-700 p-1"
@@ -234,6 +270,14 @@ function Admin() {
               ) : (
                 <div className="text-gray-400">No unanswered queries.</div>
               )}
+              {unansweredNext !== null && unansweredNext !== undefined && (
+                <button
+                  onClick={() => fetchUnansweredQueries(unansweredNext)}
+                  className="px-4 py-2 bg-gray-700 text-white rounded hover:bg-gray-600"
+                >
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         )}
@@ -241,6 +285,36 @@ function Admin() {
         {activeTab === 'chat-history' && (
           <div className="bg-gray-800 rounded-lg p-6">
             <h2 className="text-2xl text-white mb-4">User Chat History</h2>
+            <form onSubmit={handleHistoryFilter} className="flex flex-wrap gap-2 mb-4">
+              <input
+                type="text"
+                placeholder="Username"
+                value={historyFilters.user}
+                onChange={(e) => setHistoryFilters({ ...historyFilters, user: e.target.value })}
+                className="p-2 bg-gray-700 text-white rounded"
+              />
+              <input
+                type="date"
+                value={historyFilters.from}
+                onChange={(e) => setHistoryFilters({ ...historyFilters, from: e.target.value })}
+                className="p-2 bg-gray-700 text-white rounded"
+              />
+              <input
+                type="date"
+                value={historyFilters.to}
+                onChange={(e) => setHistoryFilters({ ...historyFilters, to: e.target.value })}
+                className="p-2 bg-gray-700 text-white rounded"
+              />
+              <button
+                type="submit"
+                className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700"
+              >
+                Filter
+              </button>
+              {historyTotal !== null && (
+                <span className="self-center text-gray-400 text-sm">{historyTotal} conversations</span>
+              )}
+            </form>
             <div className="space-y-4">
               {adminChatHistory.map((chat) => (
                 <div key={chat._id} className="bg-gray-700 p-4 rounded-lg">
@@ -262,6 +336,20 @@ function Admin() {
                   </div>
                 </div>
               ))}
+              {adminChatHistory.length === 0 && !loadingHistory && (
+                <div className="text-gray-400 text-center">No chat history found</div>
+              )}
+              {historyCursor && (
+                <div className="text-center">
+                  <button
+                    onClick={() => fetchAdminChatHistory(historyCursor)}
+                    disabled={loadingHistory}
+                    className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 disabled:opacity-50"
+                  >
+                    {loadingHistory ? 'Loading...' : 'Load more'}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
         )}
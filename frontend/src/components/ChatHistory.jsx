@@ -1,32 +1,40 @@
 import React, { useState, useEffect } from 'react';
-import { api } from "../lib/api";
+import { getChatHistory } from "../lib/api";
 import { format } from 'date-fns';
 import SpotlightCard from './ui/SpotlightCard';
 
 function ChatHistory() {
   const [chatHistory, setChatHistory] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
-  useEffect(() => {
-    const fetchChatHistory = async () => {
-      try {
-        const token = localStorage.getItem('userToken');
-        const response = await api.get('/api/chat-history', {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        setChatHistory(response.data.history);
-      } catch (err) {
-        setError('Failed to load chat history');
-        console.error('Error:', err);
-      } finally {
-        setLoading(false);
-      }
-    };
+  // Fetch one page; with a cursor the page is appended to what is already shown
+  const fetchChatHistory = async (cursor = null) => {
+    try {
+      const token = localStorage.getItem('userToken');
+      const data = await getChatHistory(token, cursor ? { cursor } : {});
+      setChatHistory((previous) => (cursor ? [...previous, ...data.history] : data.history));
+      setNextCursor(data.next_cursor);
+      setTotal(data.total);
+    } catch (err) {
+      setError('Failed to load chat history');
+      console.error('Error:', err);
+    }
+  };
 
-    fetchChatHistory();
+  useEffect(() => {
+    fetchChatHistory().finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchChatHistory(nextCursor);
+    setLoadingMore(false);
+  };
+
   if (loading) return <div className="text-white text-center">Loading...</div>;
   if (error) return <div className="text-red-500 text-center">{error}</div>;
 
@@ -57,6 +65,17 @@ function ChatHistory() {
         {chatHistory.length === 0 && (
           <div className="text-gray-400 text-center">No chat history found</div>
         )}
+        {nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : `Load more (${chatHistory.length} of ${total})`}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
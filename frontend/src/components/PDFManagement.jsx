@@ -37,21 +37,23 @@ function PDFManagement() {
   };
 
   const handleUpload = async (event) => {
-    const file = event.target.files[0];
-    if (!file) return;
+    const files = Array.from(event.target.files);
+    if (files.length === 0) return;
 
-    if (file.type !== 'application/pdf') {
+    if (files.some((file) => file.type !== 'application/pdf')) {
       alert('Only PDF files are allowed!');
       return;
     }
 
     setUploading(true);
     try {
+      // Several files go through the batch endpoint, which uploads them in parallel
+      const batch = files.length > 1;
       const formData = new FormData();
-      formData.append('file', file);
+      files.forEach((file) => formData.append(batch ? 'files' : 'file', file));
       
       const token = localStorage.getItem('adminToken');
-      const response = await fetch('/api/pdfs/upload', {
+      const response = await fetch(batch ? '/api/pdfs/upload-batch' : '/api/pdfs/upload', {
         method: 'POST',
         body: formData,
         headers: {
@@ -59,16 +61,27 @@ function PDFManagement() {
         }
       });
       
+      const result = await response.json().catch(() => ({}));
       if (!response.ok) {
-        throw new Error('Upload failed');
+        throw new Error(result.error || (response.status === 413 ? 'File too large' : 'Upload failed'));
       }
 
-      alert('PDF uploaded successfully!');
+      if (batch) {
+        const failed = result.results.filter((item) => item.status === 'failed');
+        alert(result.message + (failed.length
+          ? '\n' + failed.map((item) => `${item.filename}: ${item.error}`).join('\n')
+          : ''));
+      } else if (result.indexing) {
+        alert('PDF uploaded successfully! It will be searchable once background indexing finishes.');
+      } else {
+        alert('PDF uploaded successfully!');
+      }
       loadPDFs(); // Refresh the list
     } catch (error) {
       alert('Failed to upload PDF: ' + error.message);
     } finally {
       setUploading(false);
+      event.target.value = '';
     }
   };
 
@@ -114,6 +127,7 @@ function PDFManagement() {
             <input
               type="file"
               accept=".pdf"
+              multiple
               onChange={handleUpload}
               className="absolute inset-0 w-full h-full opacity-0 cursor-pointer"
               disabled={uploading}
@@ -119,10 +119,13 @@ export const rebuildEmbeddings = async () => {
 };
 
 // Chat endpoints
-export const getChatHistory = async (token) => {
+// History endpoints return one page: { history, next_cursor, total, total_is_estimate }.
+// Pass next_cursor back as params.cursor to fetch the following page.
+export const getChatHistory = async (token, params = {}) => {
   try {
     const response = await api.get('/api/chat-history', {
       headers: { Authorization: `Bearer ${token}` },
+      params,
     });
     return response.data;
   } catch (error) {
@@ -144,9 +147,10 @@ export const submitQuery = async (query, token) => {
 };
 
 // Admin endpoints
-export const getUnansweredQueries = async () => {
+// params: sort ('recent' or 'frequent'), limit, cursor (recent) or offset (frequent)
+export const getUnansweredQueries = async (params = {}) => {
   try {
-    const response = await api.get("/api/unanswered-queries");
+    const response = await api.get("/api/unanswered-queries", { params });
     return response.data;
   } catch (error) {
     console.error('Error fetching unanswered queries:', error);
@@ -166,10 +170,12 @@ export const getAdminStats = async (token) => {
   }
 };
 
-export const getAdminChatHistory = async (token) => {
+// params: limit, cursor, user (username), from and to (YYYY-MM-DD)
+export const getAdminChatHistory = async (token, params = {}) => {
   try {
     const response = await api.get('/api/admin/chat-history', {
       headers: { Authorization: `Bearer ${token}` },
+      params,
     });
     return response.data;
   } catch (error) {